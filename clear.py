@@ -21,6 +21,7 @@ if __name__ == "__main__":
         "tests/**/*.synctex.gz",
         "tests/**/*.tex",
         "tests/**/*.pdf",
+        "tests/**/*.d2l.json",
         "examples/**/*.aux",
         "examples/**/*.fdb_latexmk",
         "examples/**/*.fls",
@@ -28,6 +29,7 @@ if __name__ == "__main__":
         "examples/**/*.synctex.gz",
         "examples/**/*.tex",
         "examples/**/*.pdf",
+        "examples/**/*.d2l.json",
     ]
     root = Path(".")
 
@@ -1,11 +1,17 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
-from subprocess import run
 
+from data2latex.rasterize import rasterize_page
+
+# Requires pdftoppm from Poppler utilities (e.g. package poppler-utils)
 os.chdir(os.path.abspath("./examples"))
 
-for file in glob("*.pdf"):
-    run(
-        f"C:/Program Files/ImageMagick-7.1.0-Q16-HDRI/convert.exe -density 300 -background white -alpha remove {file} ../docs/_static/img/{file}.png"
-    )
+
+def convert(file: str) -> None:
+    rasterize_page(file, 1, f"../docs/_static/img/{file}.png", dpi=300)
     print(file, "done")
+
+
+with ThreadPoolExecutor() as executor:
+    list(executor.map(convert, glob("*.pdf")))
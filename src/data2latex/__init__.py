@@ -1,14 +1,108 @@
-from .dm import DocumentManager, gd, gdm
-from .features import (
-    finish,
-    latex,
-    pdf,
-    reset,
-    section,
-    setup,
-    text,
-    use_multi_page_standalone,
-    use_one_page_standalone,
-)
-from .plot import plot
-from .table import table
+import sys
+from importlib import import_module
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Dict, List, Set
+
+# Submodules (and PyLaTeX with them) are imported on first attribute access,
+# so `import data2latex` stays cheap for short-lived processes.
+# The imports below are only seen by type checkers.
+if TYPE_CHECKING:
+    from .budget import BudgetExceededError, BudgetWarning
+    from .builddir import prune_build_directory, set_build_directory
+    from .compiler import CompilationError, set_max_concurrent_compilations
+    from .dm import DocumentManager, gd, gdm
+    from .features import (
+        finish,
+        finish_async,
+        latex,
+        latex_async,
+        pdf,
+        pdf_async,
+        reset,
+        section,
+        set_budget,
+        setup,
+        text,
+        use_deferred_rendering,
+        use_fragment_output,
+        use_multi_page_standalone,
+        use_one_page_standalone,
+        use_spooled_body,
+    )
+    from .plot import plot
+    from .preview import SVGPreview, preview_plot, preview_table
+    from .profiling import Profiler, profile
+    from .rasterize import rasterize_pages
+    from .report import BuildReport
+    from .table import KeyedTable, table
+    from .watch import watch
+
+_lazy_attributes: Dict[str, str] = {
+    "BudgetExceededError": "budget",
+    "BudgetWarning": "budget",
+    "prune_build_directory": "builddir",
+    "set_build_directory": "builddir",
+    "CompilationError": "compiler",
+    "set_max_concurrent_compilations": "compiler",
+    "DocumentManager": "dm",
+    "gd": "dm",
+    "gdm": "dm",
+    "finish": "features",
+    "finish_async": "features",
+    "latex": "features",
+    "latex_async": "features",
+    "pdf": "features",
+    "pdf_async": "features",
+    "reset": "features",
+    "section": "features",
+    "set_budget": "features",
+    "setup": "features",
+    "text": "features",
+    "use_deferred_rendering": "features",
+    "use_fragment_output": "features",
+    "use_multi_page_standalone": "features",
+    "use_one_page_standalone": "features",
+    "use_spooled_body": "features",
+    "plot": "plot",
+    "SVGPreview": "preview",
+    "preview_plot": "preview",
+    "preview_table": "preview",
+    "Profiler": "profiling",
+    "profile": "profiling",
+    "rasterize_pages": "rasterize",
+    "BuildReport": "report",
+    "KeyedTable": "table",
+    "table": "table",
+    "watch": "watch",
+}
+
+__all__ = list(_lazy_attributes)
+
+# Submodules with the same name as the function they provide.
+_shadowed_submodules: Set[str] = {"plot", "table", "watch"}
+
+
+class _PackageModule(ModuleType):
+    def __setattr__(self, name: str, value: Any) -> None:
+        # The import system sets every loaded submodule as an attribute of the package,
+        # which would replace the function by the module, e.g. data2latex.table.
+        if name in _shadowed_submodules and isinstance(value, ModuleType):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _lazy_attributes.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    # Cache the attribute so __getattr__ is not called again.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
+
+
+sys.modules[__name__].__class__ = _PackageModule
@@ -0,0 +1,183 @@
+import math
+import warnings
+from typing import Any, Dict, List, Literal, Optional, TypeAlias
+
+# Strategies for fragments over the budget. Moving plot data into external files
+# (\addplot table) is not offered, pgfplots keeps the prepared coordinates in main memory
+# either way, so it does not lift the limit, while decimation and LuaLaTeX do.
+BudgetPolicy: TypeAlias = Literal["ignore", "warn", "error", "decimate", "lualatex"]
+
+# Default size of TeX main memory in words (TeX Live texmf.cnf: main_memory)
+TEX_MAIN_MEMORY: int = 5_000_000
+# Rough cost of one plot point, table cell and source character. The numbers
+# are calibrated on pgfplots scatter/line plots and tabularray tables with siunitx
+# and are meant to catch documents which are far over the limits, not to be exact.
+WORDS_PER_POINT: int = 50
+WORDS_PER_CELL: int = 60
+WORDS_PER_CHARACTER: int = 1
+SECONDS_PER_POINT: float = 50e-6
+SECONDS_PER_CELL: float = 1e-3
+SECONDS_PER_CHARACTER: float = 1e-7
+
+
+class BudgetWarning(UserWarning):
+    """
+    Estimated TeX memory or compile time of the document exceeds the budget.
+    """
+
+
+class BudgetExceededError(RuntimeError):
+    """
+    Estimated TeX memory or compile time of the document exceeds the budget
+    and the budget policy is ``"error"``.
+    """
+
+
+class FragmentEstimate:
+    """
+    Estimated TeX main memory and compile time of one table or plot.
+    """
+
+    def __init__(
+        self, kind: str, points: int = 0, cells: int = 0, characters: int = 0
+    ) -> None:
+        self.kind = kind
+        self.points = points
+        self.cells = cells
+        self.characters = characters
+        self.memory: int = (
+            points * WORDS_PER_POINT
+            + cells * WORDS_PER_CELL
+            + characters * WORDS_PER_CHARACTER
+        )
+        self.compile_time: float = (
+            points * SECONDS_PER_POINT
+            + cells * SECONDS_PER_CELL
+            + characters * SECONDS_PER_CHARACTER
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "points": self.points,
+            "cells": self.cells,
+            "characters": self.characters,
+            "memory": self.memory,
+            "compile_time": self.compile_time,
+        }
+
+
+class Budget:
+    """
+    Limits checked before the document is compiled. Each table and plot must fit
+    into the TeX main memory on its own (``pgfplots`` and ``tabularray`` release
+    the memory after the environment ends) and the whole document should compile
+    within the time limit.
+
+    :param policy: What to do with fragments over the memory limit: ``"ignore"``, ``"warn"`` (:class:`BudgetWarning`),
+        ``"error"`` (:class:`BudgetExceededError`) or ``"decimate"`` for keeping every n-th point of the plots
+        (tables are only warned about) or ``"lualatex"`` for accepting them because the document is compiled
+        with ``compiler="auto"``, defaults to ``"warn"``
+    :type policy: BudgetPolicy, optional
+    :param memory_limit: Main memory in words available for one fragment, defaults to 80 % of :data:`TEX_MAIN_MEMORY`
+    :type memory_limit: int, optional
+    :param compile_time_limit: Estimated compile time of the whole document in seconds, ``None`` for no limit, defaults to ``None``
+    :type compile_time_limit: Optional[float], optional
+    """
+
+    def __init__(
+        self,
+        policy: BudgetPolicy = "warn",
+        memory_limit: int = int(TEX_MAIN_MEMORY * 0.8),
+        compile_time_limit: Optional[float] = None,
+    ) -> None:
+        if policy not in ["ignore", "warn", "error", "decimate", "lualatex"]:
+            raise ValueError(
+                f"Unknown budget policy '{policy}'. Supporting 'ignore', 'warn', 'error', 'decimate' and 'lualatex'."
+            )
+        self.policy = policy
+        self.memory_limit = memory_limit
+        self.compile_time_limit = compile_time_limit
+
+    def max_points(self) -> int:
+        """
+        Get the number of plot points which fit into the memory limit.
+        """
+        return max(self.memory_limit // WORDS_PER_POINT, 1)
+
+    def decimation_step(self, points: int) -> int:
+        """
+        Get the step for keeping every n-th point of the plot, so it fits into the memory limit.
+
+        :param points: Number of points of all series in the plot
+        :type points: int
+        :return: Step, ``1`` if the plot is not decimated
+        :rtype: int
+        """
+        if self.policy != "decimate" or points <= self.max_points():
+            return 1
+        return math.ceil(points / self.max_points())
+
+    def check(self, estimate: FragmentEstimate) -> None:
+        """
+        Warn or raise according to the policy if the fragment exceeds the memory limit.
+        """
+        if (
+            self.policy in ["ignore", "lualatex"]
+            or estimate.memory <= self.memory_limit
+        ):
+            return
+        self.exceeded(
+            f"Estimated TeX memory of the {estimate.kind} ({estimate.points} points, "
+            f"{estimate.cells} cells) is {estimate.memory} words, "
+            f"which exceeds the budget of {self.memory_limit} words."
+        )
+
+    def select_engine(self, estimates: List[FragmentEstimate]) -> str:
+        """
+        Select ``lualatex``, which allocates memory dynamically, if some fragment
+        exceeds the memory limit, otherwise faster ``pdflatex``.
+
+        :return: Compiler name
+        :rtype: str
+        """
+        if any(e.memory > self.memory_limit for e in estimates):
+            return "lualatex"
+        return "pdflatex"
+
+    def check_document(self, estimates: List[FragmentEstimate]) -> None:
+        """
+        Warn or raise according to the policy if the document exceeds the compile time limit.
+        """
+        if self.policy == "ignore" or self.compile_time_limit is None:
+            return
+        compile_time = sum(e.compile_time for e in estimates)
+        if compile_time > self.compile_time_limit:
+            self.exceeded(
+                f"Estimated compile time of the document is {compile_time:.1f} s, "
+                f"which exceeds the budget of {self.compile_time_limit:.1f} s."
+            )
+
+    def check_engine(
+        self, estimates: List[FragmentEstimate], compiler: Optional[str]
+    ) -> None:
+        """
+        Warn if the ``"lualatex"`` policy accepted fragments over the memory limit,
+        but the document is compiled by another engine, which will run out of memory.
+        """
+        if self.policy != "lualatex" or compiler == "lualatex":
+            return
+        oversized = [e for e in estimates if e.memory > self.memory_limit]
+        if oversized:
+            warnings.warn(
+                f"Estimated TeX memory of {len(oversized)} table(s) or plot(s) exceeds the budget "
+                f"of {self.memory_limit} words, they were accepted for LuaLaTeX, "
+                f"but the document is compiled with '{compiler}'. "
+                "Use compiler='lualatex' or compiler='auto'.",
+                BudgetWarning,
+            )
+
+    def exceeded(self, message: str) -> None:
+        if self.policy == "error":
+            raise BudgetExceededError(message)
+        warnings.warn(message, BudgetWarning)
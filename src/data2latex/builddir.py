@@ -0,0 +1,116 @@
+import hashlib
+import os
+import shutil
+import time
+from typing import List, Optional, Tuple
+
+# Root of the managed build directory, None if documents are compiled next to their target path
+_build_directory: Optional[str] = None
+
+
+def set_build_directory(path: Optional[str]) -> None:
+    """
+    Compile documents in a managed build directory, e.g. on tmpfs. Every document gets
+    its own subdirectory, where the .aux, .log, .toc and other files written by the compiler
+    are kept between the builds, so rebuilds need fewer compiler passes. Only the final PDF
+    is copied to the target path, the copy is atomic. The directory is shared by all documents.
+
+    :param path: Path to the build directory, which is created if needed, ``None`` for compiling
+        next to the target path and removing the auxiliary files.
+    :type path: Optional[str]
+    """
+    global _build_directory
+    if path is not None:
+        path = os.path.abspath(path)
+        os.makedirs(path, exist_ok=True)
+    _build_directory = path
+
+
+def build_directory() -> Optional[str]:
+    """
+    Get the root of the managed build directory or ``None`` if it is not used.
+    """
+    return _build_directory
+
+
+def job_directory(filepath: str) -> Optional[str]:
+    """
+    Get the subdirectory of the managed build directory for the document, the directory is created if needed.
+
+    :param filepath: Absolute file path of the document without extension
+    :type filepath: str
+    :return: Path to the subdirectory or ``None`` if the build directory is not used
+    :rtype: Optional[str]
+    """
+    if _build_directory is None:
+        return None
+    digest = hashlib.sha1(filepath.encode("utf-8")).hexdigest()[:12]
+    path = os.path.join(_build_directory, f"{os.path.basename(filepath)}-{digest}")
+    os.makedirs(path, exist_ok=True)
+    # The modification time of the directory marks the last build for pruning
+    os.utime(path)
+    return path
+
+
+def copy_atomic(source: str, destination: str) -> None:
+    """
+    Copy the file, so the destination is either the old or the complete new file at any time.
+    The file is copied next to the destination first and then renamed.
+    """
+    temporary = f"{destination}.{os.getpid()}.tmp"
+    try:
+        shutil.copyfile(source, temporary)
+        os.replace(temporary, destination)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def directory_size(path: str) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+
+
+def prune_build_directory(
+    max_age: Optional[float] = None, max_size: Optional[int] = None
+) -> int:
+    """
+    Remove build files of documents which were not built for a long time and then of the least
+    recently built documents until the build directory fits into the size limit.
+
+    :param max_age: Maximum time in seconds since the last build of the document, ``None`` for no limit, defaults to ``None``
+    :type max_age: Optional[float], optional
+    :param max_size: Maximum size of the build directory in bytes, ``None`` for no limit, defaults to ``None``
+    :type max_size: Optional[int], optional
+    :return: Number of removed document directories
+    :rtype: int
+    :raises RuntimeError: Build directory is not set.
+    """
+    if _build_directory is None:
+        raise RuntimeError(
+            "Build directory is not set, call set_build_directory() first."
+        )
+    jobs: List[Tuple[float, int, str]] = []
+    for entry in os.scandir(_build_directory):
+        if entry.is_dir(follow_symlinks=False):
+            jobs.append((entry.stat().st_mtime, directory_size(entry.path), entry.path))
+    jobs.sort()
+    now = time.time()
+    total = sum(size for _, size, _ in jobs)
+    removed = 0
+    for mtime, size, path in jobs:
+        too_old = max_age is not None and now - mtime > max_age
+        too_large = max_size is not None and total > max_size
+        if not too_old and not too_large:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,262 @@
+import argparse
+import os
+import sys
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .iter_protocols import CSVColumn, CSVRows
+
+# Extensions of the supported input files
+CSV_EXTENSIONS: List[str] = [".csv", ".txt"]
+TSV_EXTENSIONS: List[str] = [".tsv", ".tab"]
+NUMPY_EXTENSIONS: List[str] = [".npy", ".npz"]
+
+
+def none_or_str(value: str) -> Optional[str]:
+    return None if value.lower() == "none" else value
+
+
+def load_input(
+    path: str,
+    delimiter: Optional[str] = None,
+    header: bool = False,
+    key: Optional[str] = None,
+) -> Tuple[Any, List[str]]:
+    """
+    Open the input file without reading it into memory. CSV/TSV files are streamed row by row
+    and ``.npy`` files are memory-mapped. Arrays stored in ``.npz`` archives must be decompressed into memory.
+
+    :param path: Path to the input file
+    :type path: str
+    :param delimiter: Column delimiter for text files, guessed from the extension if ``None``, defaults to ``None``
+    :type delimiter: Optional[str], optional
+    :param header: ``True`` if the first row of the text file holds the column names, defaults to ``False``
+    :type header: bool, optional
+    :param key: Name of the array inside ``.npz`` archive, the first array is used if ``None``, defaults to ``None``
+    :type key: Optional[str], optional
+    :raises ValueError: Unsupported input file.
+    :return: Rows of the CSV file or NumPy array, and the column names
+    :rtype: Tuple[Any, List[str]]
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in NUMPY_EXTENSIONS:
+        import numpy as np
+
+        loaded: Any = np.load(path, mmap_mode="r")
+        if extension == ".npz":
+            if key is None:
+                key = loaded.files[0]
+            loaded = loaded[key]
+        if loaded.ndim == 1:
+            loaded = loaded.reshape(-1, 1)
+        return (loaded, [])
+    elif extension in CSV_EXTENSIONS + TSV_EXTENSIONS or delimiter is not None:
+        if delimiter is None:
+            delimiter = "\t" if extension in TSV_EXTENSIONS else ","
+        rows = CSVRows(path, delimiter=delimiter)
+        if not header:
+            return (rows, [])
+        names = rows.header()
+        return (rows, names)
+    raise ValueError(
+        f"Unsupported input file '{path}'. Supporting .csv, .tsv, .npy and .npz files."
+    )
+
+
+def column_index(column: str, names: List[str]) -> int:
+    if column in names:
+        return names.index(column)
+    try:
+        return int(column)
+    except ValueError:
+        raise ValueError(f"Unknown column '{column}', available columns: {names}.")
+
+
+def columns(
+    data: Any, names: List[str], header: bool, x: str, y: Optional[List[str]]
+) -> Tuple[Any, List[Any], List[str]]:
+    """
+    Select X and Y columns without copying the data.
+
+    :return: X column, Y columns and names of the Y columns
+    :rtype: Tuple[Any, List[Any], List[str]]
+    """
+    column_count: int = 0
+    if isinstance(data, CSVRows):
+        # The first row has all the columns, header() closes the file right after reading it
+        column_count = len(names) if len(names) > 0 else len(data.header())
+    else:
+        column_count = data.shape[1]
+    x_index = column_index(x, names)
+    y_indices = (
+        [column_index(c, names) for c in y]
+        if y is not None
+        else [i for i in range(column_count) if i != x_index]
+    )
+    y_names = [names[i] if i < len(names) else str(i) for i in y_indices]
+    if isinstance(data, CSVRows):
+        rows = CSVRows(data.path, data.delimiter, skip_rows=1 if header else 0)
+        return (
+            CSVColumn(rows, x_index),
+            [CSVColumn(rows, i) for i in y_indices],
+            y_names,
+        )
+    return (data[:, x_index], [data[:, i] for i in y_indices], y_names)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="data2latex",
+        description="Convert CSV/TSV/.npy/.npz files into LaTeX tables and plots.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="document",
+        help="Output file path. Extension .tex generates only LaTeX source, .pdf only the compiled document, no extension both. Defaults to 'document'.",
+    )
+    parser.add_argument(
+        "--compiler",
+        default="pdflatex",
+        choices=["pdflatex", "lualatex", "latexmk", "auto"],
+        help="LaTeX compiler, defaults to 'pdflatex'.",
+    )
+    parser.add_argument(
+        "--standalone",
+        action="store_true",
+        help="Place each table and plot on its own cropped page.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Rebuild the document whenever some input file changes, only the changed tables and plots are generated again.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("inputs", nargs="+", help="Input files.")
+    common.add_argument(
+        "--delimiter", default=None, help="Column delimiter of text files."
+    )
+    common.add_argument(
+        "--header",
+        action="store_true",
+        help="The first row of text files holds the column names.",
+    )
+    common.add_argument("--key", default=None, help="Array name in .npz archives.")
+    common.add_argument("--caption", default=None)
+    common.add_argument("--label", default=None)
+
+    table_parser = subparsers.add_parser(
+        "table", parents=[common], help="Create tables, one for each input file."
+    )
+    table_parser.add_argument("--rules", default="")
+    table_parser.add_argument("--float-format", default="{:0.3f}")
+    table_parser.add_argument("--col-align", default="c", choices=["l", "c", "r", "j"])
+    table_parser.add_argument("--top-head-bold", action="store_true")
+    table_parser.add_argument("--left-head-bold", action="store_true")
+    table_parser.add_argument("--no-siunitx", action="store_true")
+    table_parser.add_argument("--no-try-number", action="store_true")
+    table_parser.add_argument("--no-adjustbox", action="store_true")
+
+    plot_parser = subparsers.add_parser(
+        "plot", parents=[common], help="Create plots, one for each input file."
+    )
+    plot_parser.add_argument(
+        "-x", default="0", help="Name or index of the X column, defaults to 0."
+    )
+    plot_parser.add_argument(
+        "-y",
+        nargs="+",
+        default=None,
+        help="Names or indices of the Y columns, defaults to all other columns.",
+    )
+    plot_parser.add_argument("--xlabel", default=None)
+    plot_parser.add_argument("--ylabel", default=None)
+    plot_parser.add_argument("--grid", default=None)
+    plot_parser.add_argument("--mode", nargs=2, default=["lin", "lin"])
+    plot_parser.add_argument("--line", type=none_or_str, default=None)
+    plot_parser.add_argument("--mark", type=none_or_str, default="*")
+    plot_parser.add_argument("--width", default=None)
+    plot_parser.add_argument("--height", default=None)
+    plot_parser.add_argument("--legend-pos", default="top right")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Entry point of the ``data2latex`` command.
+
+    :param argv: Command line arguments, ``sys.argv[1:]`` if ``None``, defaults to ``None``
+    :type argv: Optional[Sequence[str]], optional
+    :return: Exit code
+    :rtype: int
+    """
+    from .features import finish
+    from .watch import watch
+
+    args = build_parser().parse_args(argv)
+    filepath, extension = os.path.splitext(args.output)
+    extension = extension.lower()
+    if extension not in [".tex", ".pdf"]:
+        filepath, extension = args.output, ""
+    finish_options = {
+        "generate_tex": extension != ".pdf",
+        "compile_tex": extension != ".tex",
+        "compiler": args.compiler,
+    }
+    if args.watch:
+        watch(lambda: build(args), args.inputs, filepath, **finish_options)
+        return 0
+    build(args)
+    finish(filepath, **finish_options)
+    return 0
+
+
+def build(args: argparse.Namespace) -> None:
+    """
+    Add a table or plot for each input file into the document.
+    """
+    from .features import use_multi_page_standalone
+    from .plot import plot
+    from .table import table
+
+    if args.standalone:
+        use_multi_page_standalone()
+    for path in args.inputs:
+        data, names = load_input(path, args.delimiter, args.header, args.key)
+        if args.command == "table":
+            table(
+                data,
+                rules=args.rules,
+                caption=args.caption,
+                label=args.label,
+                float_format=args.float_format,
+                col_align=args.col_align,
+                top_head_bold=args.top_head_bold,
+                left_head_bold=args.left_head_bold,
+                use_siunitx=not args.no_siunitx,
+                str_try_number=not args.no_try_number,
+                use_adjustbox=not args.no_adjustbox,
+            )
+        else:
+            X, Y, y_names = columns(data, names, args.header, args.x, args.y)
+            plot(
+                [X] * len(Y),
+                Y,
+                caption=args.caption,
+                xlabel=args.xlabel,
+                ylabel=args.ylabel,
+                grid=args.grid,
+                mode=tuple(args.mode),
+                legend=y_names if args.header else None,
+                legend_pos=args.legend_pos,
+                width=args.width,
+                height=args.height,
+                label=args.label,
+                line=args.line,
+                mark=args.mark,
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+import errno
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeAlias,
+    cast,
+)
+
+from .builddir import copy_atomic
+from .report import BuildReport, CompilerPass, count_latexmk_runs, needs_rerun
+
+# PyLaTeX and asyncio are imported only where needed to keep the import time low.
+if TYPE_CHECKING:
+    import asyncio
+
+# Supported compilers, "auto" selects pdflatex or lualatex from the size of the document
+CompilerName: TypeAlias = Literal["pdflatex", "lualatex", "latexmk", "auto"]
+
+# Files created during compilation which are removed afterwards
+CLEAN_EXTENSIONS: List[str] = ["aux", "log", "out", "fls", "fdb_latexmk"]
+
+# Maximum number of engine runs when the log keeps asking for a rerun
+MAX_RUNS: int = 4
+# TeX error message ends with the source line, e.g. "l.42 \foo"
+ERROR_END_PATTERN = re.compile(r"l\.\d+\b")
+# Maximum number of lines of one reported error
+MAX_ERROR_LINES: int = 10
+# Line printed after the error when the compiler halts, it is not reported as another error
+FATAL_ERROR_LINE: str = "!  ==> Fatal error occurred"
+
+
+class CompilationError(subprocess.CalledProcessError):
+    """
+    Raised when the LaTeX compiler fails. The exception carries the build report
+    of the failed build, e.g. with the parsed ``TeX capacity exceeded`` message.
+    """
+
+    def __init__(
+        self,
+        returncode: int,
+        cmd: List[str],
+        output: bytes,
+        report: BuildReport,
+    ) -> None:
+        super().__init__(returncode, cmd, output)
+        self.report = report
+
+
+def read_log(filepath: str) -> str:
+    """
+    Read the compilation log, the log is written in the TeX internal 8-bit encoding.
+
+    :param filepath: File path without extension
+    :type filepath: str
+    :return: Content of the .log file or empty string if there is no log
+    :rtype: str
+    """
+    try:
+        with open(filepath + ".log", "r", encoding="latin-1") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def clean_auxiliary_files(filepath: str) -> None:
+    for ext in CLEAN_EXTENSIONS:
+        try:
+            os.remove(filepath + "." + ext)
+        except FileNotFoundError:
+            pass
+    from pylatex.utils import rm_temp_dir  # pyright: ignore [reportMissingTypeStubs]
+
+    rm_temp_dir()
+
+
+def compiler_commands(
+    filepath: str,
+    compiler: Optional[str],
+    compiler_args: Optional[List[str]],
+    output_directory: Optional[str] = None,
+) -> List[Tuple[str, List[str]]]:
+    """
+    Build the compiler command lines in the order in which they should be tried.
+    The compilers stop at the first error instead of trying to recover from it.
+
+    :param filepath: Absolute file path without extension
+    :type filepath: str
+    :param compiler: Compiler name or ``None`` for trying ``latexmk`` and then ``pdflatex``
+    :type compiler: Optional[str]
+    :param compiler_args: Additional compiler arguments
+    :type compiler_args: Optional[List[str]]
+    :param output_directory: Directory for the PDF and auxiliary files, ``None`` for the directory of the .tex file
+    :type output_directory: Optional[str], optional
+    :return: Pairs of compiler name and full command
+    :rtype: List[Tuple[str, List[str]]]
+    """
+    if compiler_args is None:
+        compiler_args = []
+
+    compilers: Tuple[Tuple[str, List[str]], ...]
+    if compiler is not None:
+        compilers = ((compiler, []),)
+    else:
+        compilers = (("latexmk", ["--pdf"]), ("pdflatex", []))
+
+    main_arguments = ["--interaction=nonstopmode", "--halt-on-error", filepath + ".tex"]
+    commands: List[Tuple[str, List[str]]] = []
+    for name, arguments in compilers:
+        if output_directory is not None:
+            option = "--outdir" if name == "latexmk" else "--output-directory"
+            arguments = arguments + [f"{option}={output_directory}"]
+        commands.append((name, [name] + arguments + compiler_args + main_arguments))
+    return commands
+
+
+def output_filepath(filepath: str, output_directory: Optional[str]) -> str:
+    """
+    Get the file path without extension of the PDF and auxiliary files written by the compiler.
+    """
+    if output_directory is None:
+        return filepath
+    return os.path.join(output_directory, os.path.basename(filepath))
+
+
+class CompilerOutput:
+    """
+    Console output of one compiler pass, which is read line by line while the compiler runs.
+    TeX errors (from the line starting with ``!`` to the ``l.<number>`` line showing
+    the source) are printed as soon as they appear.
+
+    :param filepath: File path without extension, used in the error messages
+    :type filepath: str
+    :param silent: ``False`` for printing all lines as they appear, otherwise only errors are printed
+    :type silent: bool
+    """
+
+    def __init__(self, filepath: str, silent: bool) -> None:
+        self.filepath = filepath
+        self.silent = silent
+        self.lines: List[bytes] = []
+        self.errors: List[str] = []
+        self.error: Optional[List[str]] = None
+
+    def feed(self, line: bytes) -> None:
+        self.lines.append(line)
+        text = line.decode(errors="replace").rstrip("\r\n")
+        if not self.silent:
+            print(text, flush=True)
+        if self.error is not None:
+            self.error.append(text)
+            if ERROR_END_PATTERN.match(text) or len(self.error) >= MAX_ERROR_LINES:
+                self.report_error()
+        elif text.startswith("!") and not text.startswith(FATAL_ERROR_LINE):
+            self.error = [text]
+
+    def close(self) -> None:
+        if self.error is not None:
+            self.report_error()
+
+    def report_error(self) -> None:
+        message = "\n".join(cast(List[str], self.error))
+        self.error = None
+        self.errors.append(message)
+        if self.silent:
+            print(f"{self.filepath}.tex: {message}", file=sys.stderr, flush=True)
+
+    @property
+    def output(self) -> bytes:
+        return b"".join(self.lines)
+
+
+def record_pass(
+    filepath: str,
+    report: BuildReport,
+    name: str,
+    command: List[str],
+    wall_time: float,
+    returncode: int,
+    output: CompilerOutput,
+) -> str:
+    """
+    Record finished compiler pass into the build report.
+
+    :return: Compilation log
+    :rtype: str
+    :raises CompilationError: The compiler has failed.
+    """
+    output.close()
+    runs = 1
+    if name == "latexmk":
+        runs = count_latexmk_runs(output.output.decode(errors="replace"))
+    report.compiler = name
+    report.passes.append(CompilerPass(command, wall_time, returncode, runs=runs))
+    report.errors.extend(output.errors)
+    log = read_log(filepath)
+    report.parse_log(log)
+    report.succeeded = returncode == 0
+
+    if not report.succeeded:
+        if output.silent and not output.errors:
+            # Errors were not recognized in the output, print all of it
+            print(output.output.decode(errors="replace"))
+        raise CompilationError(returncode, command, output.output, report)
+    return log
+
+
+def should_rerun(name: str, log: str, runs: int, rerun: bool) -> bool:
+    """
+    Decide whether the engine should run again, ``latexmk`` does its own reruns.
+    """
+    return rerun and name != "latexmk" and runs < MAX_RUNS and needs_rerun(log)
+
+
+def clean_up(
+    filepath: str, output_directory: Optional[str], clean: bool, clean_tex: bool
+) -> None:
+    """
+    Copy the PDF from the output directory and remove the files which should not be kept.
+    """
+    if output_directory is not None:
+        copy_atomic(
+            output_filepath(filepath, output_directory) + ".pdf", filepath + ".pdf"
+        )
+    if clean:
+        clean_auxiliary_files(output_filepath(filepath, output_directory))
+    if clean_tex:
+        os.remove(filepath + ".tex")
+
+
+def no_compiler_found() -> Exception:
+    from pylatex.errors import CompilerError  # pyright: ignore [reportMissingTypeStubs]
+
+    # Notify user that none of the compilers worked.
+    return CompilerError(
+        "No LaTex compiler was found\n"
+        "Either specify a LaTex compiler "
+        "or make sure you have latexmk or pdfLaTex installed."
+    )
+
+
+def compile_tex(
+    filepath: str,
+    report: BuildReport,
+    compiler: Optional[str] = "pdflatex",
+    compiler_args: Optional[List[str]] = None,
+    clean: bool = True,
+    clean_tex: bool = True,
+    silent: bool = True,
+    rerun: bool = True,
+    output_directory: Optional[str] = None,
+) -> None:
+    """
+    Compile already generated .tex file and record every compiler pass into the build report.
+    The compiler stops at the first error, which is printed as soon as it appears in the output.
+    The engine runs again only if the log asks for it, e.g. because labels or references have changed.
+
+    :param filepath: Absolute file path without extension
+    :type filepath: str
+    :param report: Report which will be filled with the compilation statistics
+    :type report: BuildReport
+    :param compiler: Compiler name or ``None`` for trying ``latexmk`` and then ``pdflatex``, defaults to ``"pdflatex"``
+    :type compiler: Optional[str], optional
+    :param compiler_args: Additional compiler arguments, defaults to ``None``
+    :type compiler_args: Optional[List[str]], optional
+    :param clean: ``True`` for removing auxiliary files, defaults to ``True``
+    :type clean: bool, optional
+    :param clean_tex: ``True`` for removing the .tex file, defaults to ``True``
+    :type clean_tex: bool, optional
+    :param silent: ``False`` for printing compiler output, defaults to ``True``
+    :type silent: bool, optional
+    :param rerun: ``True`` for running the engine again (at most :data:`MAX_RUNS` times) when the log asks for it, defaults to ``True``
+    :type rerun: bool, optional
+    :param output_directory: Directory for the auxiliary files (e.g. the managed build directory), the PDF is copied
+        from there next to the .tex file, ``None`` for the directory of the .tex file, defaults to ``None``
+    :type output_directory: Optional[str], optional
+    :raises CompilationError: The compiler has failed.
+    :raises CompilerError: No compiler was found.
+    """
+    for name, command in compiler_commands(
+        filepath, compiler, compiler_args, output_directory
+    ):
+        runs = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                process = subprocess.Popen(
+                    command,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    cwd=os.path.dirname(filepath),
+                )
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    break
+                raise
+            output = CompilerOutput(filepath, silent)
+            with process:
+                for line in cast(IO[bytes], process.stdout):
+                    output.feed(line)
+            log = record_pass(
+                output_filepath(filepath, output_directory),
+                report,
+                name,
+                command,
+                time.perf_counter() - start,
+                process.returncode,
+                output,
+            )
+            runs += 1
+            if not should_rerun(name, log, runs, rerun):
+                break
+        if runs == 0:
+            # If compiler does not exist, try next in the list
+            continue
+        clean_up(filepath, output_directory, clean, clean_tex)
+        return
+    raise no_compiler_found()
+
+
+#
+# Asynchronous compilation
+#
+
+_compile_semaphore: Optional["asyncio.Semaphore"] = None
+_compile_semaphore_loop: Optional["asyncio.AbstractEventLoop"] = None
+_max_concurrent_compilations: int = os.cpu_count() or 1
+
+
+def set_max_concurrent_compilations(count: int) -> None:
+    """
+    Set how many LaTeX compilers can run at the same time when using the asynchronous API.
+    The limit is shared by all calls of :func:`data2latex.finish_async` and :func:`data2latex.pdf_async`.
+
+    :param count: Maximum number of running compilers, defaults to the number of CPUs.
+    :type count: int
+    :raises ValueError: The limit must be at least one.
+    """
+    global _compile_semaphore, _max_concurrent_compilations
+    if count < 1:
+        raise ValueError("The limit of concurrent compilations must be at least one.")
+    _max_concurrent_compilations = count
+    # The semaphore will be recreated with the new limit on next use.
+    _compile_semaphore = None
+
+
+def max_concurrent_compilations() -> int:
+    """
+    Get the limit of LaTeX compilers running at the same time.
+    """
+    return _max_concurrent_compilations
+
+
+def compile_semaphore() -> "asyncio.Semaphore":
+    """
+    Get the semaphore limiting concurrent compilations in the running event loop.
+    """
+    import asyncio
+
+    global _compile_semaphore, _compile_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _compile_semaphore is None or _compile_semaphore_loop is not loop:
+        _compile_semaphore = asyncio.Semaphore(_max_concurrent_compilations)
+        _compile_semaphore_loop = loop
+    return _compile_semaphore
+
+
+async def compile_tex_async(
+    filepath: str,
+    report: BuildReport,
+    compiler: Optional[str] = "pdflatex",
+    compiler_args: Optional[List[str]] = None,
+    clean: bool = True,
+    clean_tex: bool = True,
+    silent: bool = True,
+    rerun: bool = True,
+    output_directory: Optional[str] = None,
+) -> None:
+    """
+    Asynchronous version of :func:`compile_tex` driving the compiler with :func:`asyncio.create_subprocess_exec`.
+    If the task is cancelled, the running compiler process is killed.
+
+    :raises CompilationError: The compiler has failed.
+    :raises CompilerError: No compiler was found.
+    """
+    import asyncio
+
+    async with compile_semaphore():
+        for name, command in compiler_commands(
+            filepath, compiler, compiler_args, output_directory
+        ):
+            runs = 0
+            while True:
+                start = time.perf_counter()
+                try:
+                    process = await asyncio.create_subprocess_exec(
+                        *command,
+                        stdin=asyncio.subprocess.DEVNULL,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.STDOUT,
+                        cwd=os.path.dirname(filepath),
+                    )
+                except OSError as e:
+                    if e.errno == errno.ENOENT:
+                        break
+                    raise
+                output = CompilerOutput(filepath, silent)
+                try:
+                    async for line in cast(asyncio.StreamReader, process.stdout):
+                        output.feed(line)
+                    await process.wait()
+                except asyncio.CancelledError:
+                    if process.returncode is None:
+                        process.kill()
+                        await process.wait()
+                    raise
+                log = await asyncio.to_thread(
+                    record_pass,
+                    output_filepath(filepath, output_directory),
+                    report,
+                    name,
+                    command,
+                    time.perf_counter() - start,
+                    cast(int, process.returncode),
+                    output,
+                )
+                runs += 1
+                if not should_rerun(name, log, runs, rerun):
+                    break
+            if runs == 0:
+                # If compiler does not exist, try next in the list
+                continue
+            await asyncio.to_thread(
+                clean_up, filepath, output_directory, clean, clean_tex
+            )
+            return
+        raise no_compiler_found()
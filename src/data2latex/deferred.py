@@ -0,0 +1,338 @@
+import functools
+import re
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypeAlias,
+    TypeVar,
+    cast,
+)
+
+from pylatex.base_classes import (  # pyright: ignore [reportMissingTypeStubs]
+    Container,
+    LatexObject,
+)
+from pylatex.utils import dumps_list  # pyright: ignore [reportMissingTypeStubs]
+
+from .budget import Budget, FragmentEstimate
+from .shared import SharedArrays, attach, detach, loads
+
+if TYPE_CHECKING:
+    from .dm import DocumentManager
+    from .watch import FragmentCache
+
+ExecutorName: TypeAlias = Literal["thread", "process"]
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Names of preamble definitions requested while rendering are replaced by placeholders,
+# the definitions are replayed in document order when the fragments are spliced back
+PLACEHOLDER_PATTERN = re.compile("\x00(\\d+)\x00")
+
+_local = threading.local()
+
+# Set by watch(), tables and plots are taken from the cache of the previous runs.
+# Kept outside of the document manager, so setup functions can still be called by the build.
+_fragment_cache: Optional["FragmentCache"] = None
+
+
+def active_recorder() -> Optional["FragmentRecorder"]:
+    """
+    Get the recorder of the fragment rendered by the current thread or ``None``.
+    """
+    return getattr(_local, "recorder", None)
+
+
+def use_fragment_cache(cache: Optional["FragmentCache"]) -> None:
+    """
+    Set the fragment cache used by :func:`deferrable` functions, ``None`` for no cache.
+    """
+    global _fragment_cache
+    _fragment_cache = cache
+
+
+def active_fragment_cache() -> Optional["FragmentCache"]:
+    """
+    Get the fragment cache, ``None`` if there is no cache or a fragment is being rendered by this thread.
+    """
+    if active_recorder() is not None:
+        return None
+    return _fragment_cache
+
+
+class DeferredFragment:
+    """
+    Recorded call of :func:`table` or :func:`plot`, which is rendered when the document is finished.
+    Only references to the data are kept, so the data must not change before :func:`finish`.
+    """
+
+    def __init__(
+        self,
+        function: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+
+class RenderedFragment(LatexObject):
+    """
+    Already serialized top level fragment with the packages it requires.
+    """
+
+    def __init__(
+        self, kind: str, latex: str, packages: Any, label: Optional[str] = None
+    ) -> None:
+        self._latex_name = kind
+        self.latex = latex
+        self.packages = packages
+        self.label = label
+
+    def dumps(self) -> str:
+        return self.latex
+
+
+class RecordingBudget(Budget):
+    """
+    Budget which keeps the messages of exceeded fragments instead of warning,
+    so they are reported by the main thread in document order.
+    """
+
+    def __init__(self, budget: Budget) -> None:
+        super().__init__(budget.policy, budget.memory_limit, budget.compile_time_limit)
+        self.messages: List[str] = []
+
+    def exceeded(self, message: str) -> None:
+        if self.policy == "error":
+            super().exceeded(message)
+        self.messages.append(message)
+
+
+class FragmentRecorder:
+    """
+    Stand-in for the document manager while a deferred fragment is rendered. Requested
+    preamble definitions are recorded and their names are replaced by placeholders.
+    """
+
+    deferred: None = None
+
+    def __init__(self, using_standalone: bool, budget: Budget, escape: bool) -> None:
+        self.using_standalone = using_standalone
+        self.budget = RecordingBudget(budget)
+        self.escape = escape
+        self.estimates: List[FragmentEstimate] = []
+        self.definitions: List[Tuple[str, Tuple[Any, ...]]] = []
+        self.fragments: List[RenderedFragment] = []
+
+    def define(self, method: str, *args: Any) -> str:
+        self.definitions.append((method, args))
+        return f"\x00{len(self.definitions) - 1}\x00"
+
+    def define_color(self, rgb: Tuple[int, int, int]) -> str:
+        return self.define("define_color", rgb)
+
+    def define_pgfplots_style(self, kind: str, options: str) -> str:
+        return self.define("define_pgfplots_style", kind, options)
+
+    def define_tblr_environment(self, inner: str) -> str:
+        return self.define("define_tblr_environment", inner)
+
+    def add_preamble_definition(self, definition: str) -> None:
+        self.define("add_preamble_definition", definition)
+
+    def append(self, content: Any) -> None:
+        from .dm import fragment_kind, fragment_label
+
+        if isinstance(content, Container):
+            content._propagate_packages()  # pyright: ignore [reportPrivateUsage]
+        packages = getattr(content, "packages", [])
+        self.fragments.append(
+            RenderedFragment(
+                fragment_kind(content),
+                dumps_list([content], escape=self.escape),
+                type(packages)(packages),
+                fragment_label(content),
+            )
+        )
+
+
+def deferrable(function: F) -> F:
+    """
+    Record calls of the decorated function as :class:`DeferredFragment` when the document
+    uses deferred rendering, take them from the fragment cache in watch mode, otherwise call it right away.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        from .dm import gdm
+
+        dm = gdm()
+        cache = active_fragment_cache()
+        if dm.deferred is not None:
+            dm.append(DeferredFragment(wrapper, args, kwargs))  # pyright: ignore
+        elif cache is not None:
+            cache.call(dm, DeferredFragment(wrapper, args, kwargs))
+        else:
+            return function(*args, **kwargs)
+
+    return cast(F, wrapper)
+
+
+def render_fragment(
+    fragment: DeferredFragment, using_standalone: bool, budget: Budget, escape: bool
+) -> FragmentRecorder:
+    """
+    Render one deferred fragment, runs in a worker thread or process.
+    """
+    recorder = FragmentRecorder(using_standalone, budget, escape)
+    _local.recorder = recorder
+    try:
+        fragment.function(*fragment.args, **fragment.kwargs)
+    finally:
+        _local.recorder = None
+    return recorder
+
+
+def render_shared(
+    block_name: Optional[str],
+    payload: bytes,
+    using_standalone: bool,
+    budget: Budget,
+    escape: bool,
+) -> FragmentRecorder:
+    """
+    Render one deferred fragment pickled by :class:`SharedArrays`, runs in a worker process.
+    Large NumPy arrays of the fragment are read-only views into the shared memory block.
+    """
+    block = attach(block_name)
+    try:
+        fragment: DeferredFragment = loads(payload, block)
+        recorder = render_fragment(fragment, using_standalone, budget, escape)
+        del fragment
+        return recorder
+    finally:
+        detach(block)
+
+
+def substitute(value: Any, names: List[Any]) -> Any:
+    if not isinstance(value, str) or "\x00" not in value:
+        return value
+    return PLACEHOLDER_PATTERN.sub(lambda m: names[int(m.group(1))], value)
+
+
+def replay(dm: "DocumentManager", recorder: FragmentRecorder) -> List[RenderedFragment]:
+    """
+    Apply preamble definitions, budget messages and estimates of the rendered fragment
+    to the document. The recorder is not modified, so it can be replayed again.
+
+    :return: Fragments with names of the definitions instead of the placeholders
+    :rtype: List[RenderedFragment]
+    """
+    names: List[Any] = []
+    for method, args in recorder.definitions:
+        args = tuple(substitute(a, names) for a in args)
+        names.append(getattr(dm, method)(*args))
+    for message in recorder.budget.messages:
+        dm.budget.exceeded(message)
+    dm.estimates.extend(recorder.estimates)
+    return [
+        RenderedFragment(
+            f.latex_name,
+            substitute(f.latex, names),
+            f.packages,
+            f.label,
+        )
+        for f in recorder.fragments
+    ]
+
+
+class DeferredRenderer:
+    """
+    Renders fragments recorded by :func:`deferrable` functions in a pool of workers
+    and splices them back into the document body in document order.
+
+    :param executor: ``"thread"`` or ``"process"`` pool
+    :type executor: ExecutorName
+    :param max_workers: Maximum number of workers, ``None`` for the number of processors
+    :type max_workers: Optional[int]
+    """
+
+    def __init__(self, executor: ExecutorName, max_workers: Optional[int]) -> None:
+        if executor not in ["thread", "process"]:
+            raise ValueError(
+                f"Unknown executor '{executor}'. Supporting 'thread' and 'process'."
+            )
+        self.executor = executor
+        self.max_workers = max_workers
+
+    def create_executor(self) -> Executor:
+        if self.executor == "process":
+            return ProcessPoolExecutor(self.max_workers)
+        return ThreadPoolExecutor(self.max_workers)
+
+    def render(self, dm: "DocumentManager") -> None:
+        """
+        Replace all deferred fragments of the document body by rendered ones. Preamble definitions,
+        budget messages and estimates are applied in document order, so the output is the same
+        as if the fragments were rendered right when they were added.
+
+        :param dm: Document manager with the deferred fragments
+        :type dm: DocumentManager
+        """
+        data: List[Any] = dm.document.data
+        indices = [
+            i for i, item in enumerate(data) if isinstance(item, DeferredFragment)
+        ]
+        if len(indices) == 0:
+            return
+        context = (dm.using_standalone, dm.budget, dm.document.escape)
+        fragments = [data[i] for i in indices]
+        if len(fragments) == 1 or self.max_workers == 1:
+            recorders = [render_fragment(f, *context) for f in fragments]
+        elif self.executor == "process":
+            recorders = self.render_processes(fragments, context)
+        else:
+            with self.create_executor() as executor:
+                recorders = list(
+                    executor.map(
+                        render_fragment,
+                        fragments,
+                        *[[c] * len(fragments) for c in context],
+                    )
+                )
+        rendered: Dict[int, List[RenderedFragment]] = {}
+        for index, recorder in zip(indices, recorders):
+            rendered[index] = replay(dm, recorder)
+        dm.document.data = [
+            f for i, item in enumerate(data) for f in rendered.get(i, [item])
+        ]
+
+    def render_processes(
+        self, fragments: List[DeferredFragment], context: Tuple[bool, Budget, bool]
+    ) -> List[FragmentRecorder]:
+        """
+        Render the fragments in a process pool. Large NumPy arrays are copied once into a shared
+        memory block instead of being pickled for every worker, so workers get the data without
+        another copy. The block is removed when the pool has finished, also if some worker failed.
+        """
+        with SharedArrays() as shared:
+            payloads = [shared.dumps(f) for f in fragments]
+            block_name = shared.allocate()
+            with self.create_executor() as executor:
+                return list(
+                    executor.map(
+                        render_shared,
+                        [block_name] * len(payloads),
+                        payloads,
+                        *[[c] * len(payloads) for c in context],
+                    )
+                )
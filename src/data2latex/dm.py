@@ -1,4 +1,7 @@
-from typing import Any, List, Literal, Optional, Set, Union, cast
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Literal, Optional, Set, Tuple, Union, cast
 
 from pylatex import (  # pyright: ignore [reportMissingTypeStubs]
     Command,
@@ -6,8 +9,38 @@ from pylatex import (  # pyright: ignore [reportMissingTypeStubs]
     Package,
     UnsafeCommand,
 )
-from pylatex.base_classes import LatexObject  # pyright: ignore [reportMissingTypeStubs]
-from pylatex.utils import NoEscape  # pyright: ignore [reportMissingTypeStubs]
+from pylatex.base_classes import (  # pyright: ignore [reportMissingTypeStubs]
+    Container,
+    LatexObject,
+)
+from pylatex.labelref import Label  # pyright: ignore [reportMissingTypeStubs]
+from pylatex.utils import (  # pyright: ignore [reportMissingTypeStubs]
+    NoEscape,
+    dumps_list,  # pyright: ignore [reportUnknownVariableType]
+)
+
+from .budget import Budget, FragmentEstimate
+from .builddir import job_directory
+from .compiler import compile_tex as compile_tex_file
+from .compiler import CompilerName, compile_tex_async
+from .deferred import (
+    DeferredRenderer,
+    ExecutorName,
+    RenderedFragment,
+    active_recorder,
+)
+from .fragments import FRAGMENT_KINDS, FragmentWriter
+from .manifest import BuildManifest, HashingWriter, text_hash
+from .profiling import active_profiler, phase, profiled
+from .sharding import compile_sharded
+from .report import BuildReport, FragmentStats
+from .spool import BodySpool
+
+# Names given by define_color(), define_pgfplots_style() and define_tblr_environment(),
+# e.g. "d2lFF0000", "d2l series 3" and "dtoltblrb", not followed by another name character
+DEFINITION_NAME_PATTERN = re.compile(
+    r"(?:d2l(?:[0-9A-F]{6}| [a-z]+ \d+)|dtoltblr[a-j]+)(?![\w])"
+)
 
 
 class DocumentManager:
@@ -78,6 +111,18 @@ class DocumentManager:
 
         self.using_standalone: bool = False
         self.using_standalone_multi: bool = False
+        self.spool: Optional[BodySpool] = None
+        self.deferred: Optional[DeferredRenderer] = None
+        self.fragment_output: Optional[FragmentWriter] = None
+        self.colors: Dict[Tuple[int, int, int], str] = {}
+        self.pgfplots_styles: Dict[Tuple[str, str], str] = {}
+        self.tblr_environments: Dict[str, str] = {}
+        self.preamble_definitions: Set[str] = set()
+        # LaTeX source of the named definitions and ids of their preamble objects
+        self.named_definitions: Dict[str, str] = {}
+        self.named_definition_ids: Set[int] = set()
+        self.budget = Budget()
+        self.estimates: List[FragmentEstimate] = []
 
         geometry_options: Optional[List[str]] = []
         if horizontal_margin is not None:
@@ -179,33 +224,565 @@ class DocumentManager:
 
     def append(self, content: Union[str, LatexObject]) -> None:
         """
-        Append LaTeX content into the document.
+        Append LaTeX content into the document. If the body is spooled,
+        the content is serialized immediately and only its packages are kept.
+        """
+        if (
+            self.fragment_output is not None
+            and fragment_kind(content) in FRAGMENT_KINDS
+        ):
+            self.write_fragment(cast(LatexObject, content))
+        elif self.spool is None:
+            self.document.append(content)  # pyright: ignore [reportUnknownMemberType]
+        else:
+            self.spool_content(content)
+
+    def define_color(self, rgb: Tuple[int, int, int]) -> str:
+        """
+        Get the name of the color defined by ``\\definecolor`` in the preamble.
+        The color is defined on the first request only, so the same color is parsed once
+        by ``xcolor`` no matter how many times it is used.
+
+        :param rgb: Red, green and blue component (0-255)
+        :type rgb: Tuple[int, int, int]
+        :return: Color name
+        :rtype: str
+        """
+        name = self.colors.get(rgb)
+        if name is None:
+            name = self.colors[rgb] = "d2l" + "".join(f"{x:02X}" for x in rgb)
+            cast(Set[Any], self.document.packages).add(  # pyright: ignore
+                Package("xcolor")
+            )
+            self.add_named_definition(
+                name,
+                Command(
+                    "definecolor", arguments=[name, "RGB", ",".join(map(str, rgb))]
+                ),
+            )
+        return name
+
+    def define_pgfplots_style(self, kind: str, options: str) -> str:
+        """
+        Get the name of the ``pgfplots`` style defined by ``\\pgfplotsset`` in the preamble.
+        The style is defined on the first request only, plots with the same options
+        refer to the same style.
+
+        :param kind: Kind of the style used in its name, e.g. ``"series"`` or ``"axis"``
+        :type kind: str
+        :param options: Serialized options with indentation level ``2``
+        :type options: str
+        :return: Style name
+        :rtype: str
+        """
+        key = (kind, options)
+        name = self.pgfplots_styles.get(key)
+        if name is None:
+            count = sum(1 for k in self.pgfplots_styles if k[0] == kind)
+            name = self.pgfplots_styles[key] = f"d2l {kind} {count + 1}"
+            self.add_named_definition(
+                name,
+                NoEscape(f"\\pgfplotsset{{%\n\t{name}/.style={{{options}\t}}%\n}}"),
+            )
+        return name
+
+    def define_tblr_environment(self, inner: str) -> str:
+        """
+        Get the name of the ``tabularray`` environment defined by ``\\NewTblrEnviron``
+        in the preamble with the default inner specification. The environment is defined
+        on the first request only, tables with the same specification share it.
+
+        :param inner: Serialized inner specification, e.g. ``row{1}`` and ``column{1}`` settings
+        :type inner: str
+        :return: Environment name
+        :rtype: str
+        """
+        name = self.tblr_environments.get(inner)
+        if name is None:
+            # Digits are replaced by letters, so the name stays a plain control sequence
+            suffix = "".join(
+                chr(ord("a") + int(d)) for d in str(len(self.tblr_environments))
+            )
+            name = self.tblr_environments[inner] = f"dtoltblr{suffix}"
+            self.add_named_definition(
+                name,
+                NoEscape(
+                    f"\\NewTblrEnviron{{{name}}}%\n\\SetTblrInner[{name}]{{{inner}}}"
+                ),
+            )
+        return name
+
+    def add_named_definition(
+        self, name: str, definition: Union[str, LatexObject]
+    ) -> None:
+        self.named_definitions[name] = (
+            definition.dumps()
+            if isinstance(definition, LatexObject)
+            else str(definition)
+        )
+        self.named_definition_ids.add(id(definition))
+        self.document.preamble.append(  # pyright: ignore [reportUnknownMemberType]
+            definition
+        )
+
+    def definitions_hash(self, fragment: str) -> Optional[str]:
+        """
+        Get hash of the named preamble definitions (colors, styles, table environments)
+        used by the fragment, so a page can be compared without the definitions of other pages.
+        Computed only in multi page standalone mode, which is the only one rasterized per page.
+
+        :param fragment: LaTeX source of the fragment
+        :type fragment: str
+        :return: SHA-256 hex digest or ``None`` if not computed
+        :rtype: Optional[str]
+        """
+        if not self.using_standalone_multi:
+            return None
+        used = sorted(
+            {
+                name
+                for name in DEFINITION_NAME_PATTERN.findall(fragment)
+                if name in self.named_definitions
+            }
+        )
+        return text_hash("".join(self.named_definitions[name] for name in used))
+
+    def dumps_head_base(self) -> str:
+        """
+        Represent the preamble without the named definitions, which are shared by the fragments using them.
+        Packages are sorted, because their order depends on which table or plot was added first.
+        """
+        document = self.document
+        preamble = [
+            p for p in document.preamble if id(p) not in self.named_definition_ids
+        ]
+        packages = sorted(
+            p if isinstance(p, str) else p.dumps()
+            for p in document.packages  # pyright: ignore [reportUnknownMemberType, reportUnknownVariableType]
+        )
+        head = document.documentclass.dumps() + "%\n"
+        head += "%\n".join(packages) + "%\n"
+        head += dumps_list(document.variables) + "%\n"
+        return head + dumps_list(preamble) + "%\n"
+
+    def add_preamble_definition(self, definition: str) -> None:
+        """
+        Add LaTeX definition into the preamble unless it was already added.
+
+        :param definition: LaTeX code, which is not escaped
+        :type definition: str
+        """
+        if definition not in self.preamble_definitions:
+            self.preamble_definitions.add(definition)
+            self.document.preamble.append(  # pyright: ignore [reportUnknownMemberType]
+                NoEscape(definition)
+            )
+
+    def use_spool(self, max_memory: int) -> None:
         """
-        self.document.append(content)  # pyright: ignore [reportUnknownMemberType]
+        Start serializing appended content into a temporary body file. Content appended so far
+        is serialized immediately. Content appended directly into :meth:`gd` afterwards
+        is placed behind all the spooled content.
 
+        :param max_memory: Number of characters kept in memory before spilling to disk
+        :type max_memory: int
+        :raises RuntimeError: The body is already spooled.
+        """
+        if self.spool is not None:
+            raise RuntimeError("The document body is already spooled.")
+        if self.deferred is not None:
+            raise RuntimeError("Deferred rendering cannot be combined with spooling.")
+        if self.fragment_output is not None:
+            raise RuntimeError("Fragment output cannot be combined with spooling.")
+        self.spool = BodySpool(max_memory, self.document.content_separator)
+        data: List[Any] = self.document.data
+        self.document.data = []
+        for item in data:
+            self.spool_content(item)
+
+    def use_deferred(
+        self, executor: ExecutorName = "process", max_workers: Optional[int] = None
+    ) -> None:
+        """
+        Record tables and plots instead of rendering them right away. The recorded fragments
+        are rendered in a pool of workers by :meth:`render_deferred`.
+
+        :param executor: ``"thread"`` or ``"process"`` pool, defaults to ``"process"``
+        :type executor: ExecutorName, optional
+        :param max_workers: Maximum number of workers, ``None`` for the number of processors, defaults to ``None``
+        :type max_workers: Optional[int], optional
+        :raises RuntimeError: The document body is spooled.
+        """
+        if self.spool is not None:
+            raise RuntimeError("Deferred rendering cannot be combined with spooling.")
+        if self.fragment_output is not None:
+            raise RuntimeError(
+                "Deferred rendering cannot be combined with fragment output."
+            )
+        self.deferred = DeferredRenderer(executor, max_workers)
+
+    def render_deferred(self) -> None:
+        """
+        Render all recorded tables and plots and splice them into the body in document order.
+        """
+        if self.deferred is not None:
+            with phase("render"):
+                self.deferred.render(self)
+
+    def use_fragment_output(
+        self, directory: str, max_workers: Optional[int] = None
+    ) -> None:
+        """
+        Write tables and plots into their own .tex files instead of appending them to the document.
+        Packages and definitions required by the fragments are written into a shared preamble file
+        in the same directory by :meth:`finish`, which does not generate the document itself.
+
+        :param directory: Directory for the fragments, created if needed
+        :type directory: str
+        :param max_workers: Maximum number of writing threads, ``None`` for the default, defaults to ``None``
+        :type max_workers: Optional[int], optional
+        :raises RuntimeError: The document body is spooled or rendered deferred.
+        """
+        if self.spool is not None:
+            raise RuntimeError("Fragment output cannot be combined with spooling.")
+        if self.deferred is not None:
+            raise RuntimeError(
+                "Deferred rendering cannot be combined with fragment output."
+            )
+        document_packages: Set[str] = {
+            p.dumps()
+            for p in self.document.packages  # pyright: ignore [reportUnknownMemberType, reportUnknownVariableType]
+        }
+        self.fragment_output = FragmentWriter(directory, document_packages, max_workers)
+
+    def write_fragment(self, content: LatexObject) -> None:
+        fragment_output = cast(FragmentWriter, self.fragment_output)
+        packages = fragment_output.write(
+            content,
+            fragment_kind(content),
+            fragment_label(content),
+            self.document.escape,
+        )
+        document_packages: Set[LatexObject | str] = cast(
+            Set[Any],
+            self.document.packages,  # pyright: ignore [reportUnknownMemberType]
+        )
+        for p in packages:
+            document_packages.add(p)
+
+    def spool_content(self, content: Union[str, LatexObject]) -> None:
+        spool = cast(BodySpool, self.spool)
+        document_packages: Set[LatexObject | str] = cast(
+            Set[Any],
+            self.document.packages,  # pyright: ignore [reportUnknownMemberType]
+        )
+        if isinstance(content, Container):
+            content._propagate_packages()  # pyright: ignore [reportPrivateUsage]
+        if isinstance(content, LatexObject):
+            for p in content.packages:  # pyright: ignore [reportUnknownMemberType]
+                document_packages.add(p)
+        fragment: str = dumps_list([content], escape=self.document.escape)
+        spool.write(
+            fragment,
+            kind=fragment_kind(content),
+            label=fragment_label(content),
+            definitions=self.definitions_hash(fragment),
+        )
+
+    def dumps_head(self, extra_preamble: str = "") -> str:
+        """
+        Represent the document preamble as a string in LaTeX syntax, including the ``\\begin{document}`` line.
+
+        :param extra_preamble: LaTeX code placed at the end of the preamble, defaults to ``""``
+        :type extra_preamble: str, optional
+        :return: Document class, packages and preamble
+        :rtype: str
+        """
+        document = self.document
+        head = document.documentclass.dumps() + "%\n"
+        head += document.dumps_packages() + "%\n"
+        head += dumps_list(document.variables) + "%\n"
+        head += dumps_list(document.preamble) + "%\n"
+        head += extra_preamble
+        begin = Command("begin", arguments=document.latex_name)
+        return head + "%\n" + begin.dumps() + document.content_separator
+
+    def dumps_tail(self) -> str:
+        """
+        Represent the end of the document as a string in LaTeX syntax.
+
+        :return: The ``\\end{document}`` line
+        :rtype: str
+        """
+        document = self.document
+        end = Command("end", document.latex_name)
+        return document.content_separator + end.dumps()
+
+    def write_tex(self, filepath: str, report: Optional[BuildReport] = None) -> None:
+        """
+        Write the document into .tex file. The output is the same as from :meth:`pylatex.Document.generate_tex`,
+        but the body is written one top level object at a time, so the size of each table and plot can be measured.
+
+        :param filepath: File path without extension
+        :type filepath: str
+        :param report: Build report for storing the size of the fragments, defaults to ``None``
+        :type report: Optional[BuildReport], optional
+        """
+        document = self.document
+        separator: str = document.content_separator
+        offset: int = 0
+        with open(filepath + ".tex", "w", encoding="utf-8") as tex_file:
+            f = HashingWriter(tex_file)
+            head: str = self.dumps_head()
+            f.write(head)
+            if self.spool is not None:
+                self.spool.copy_to(f)
+                offset = len(self.spool)
+                if report is not None:
+                    report.fragments.extend(self.spool.fragments)
+            for i, item in enumerate(document.data, offset):
+                fragment: str = dumps_list([item], escape=document.escape)
+                if i > 0:
+                    f.write(separator)
+                f.write(fragment)
+                if report is not None:
+                    report.fragments.append(
+                        FragmentStats(
+                            index=i,
+                            kind=fragment_kind(item),
+                            characters=len(fragment),
+                            label=fragment_label(item),
+                            digest=text_hash(fragment),
+                            definitions=self.definitions_hash(fragment),
+                        )
+                    )
+            f.write(self.dumps_tail())
+        if report is not None:
+            report.tex_hash = f.hexdigest()
+            report.head_hash = text_hash(head)
+            report.head_base_hash = text_hash(self.dumps_head_base())
+
+    def select_compiler(self, compiler: Optional[CompilerName]) -> Optional[str]:
+        """
+        Replace ``"auto"`` by ``"lualatex"`` if some table or plot does not fit
+        into the memory budget of ``pdflatex``, otherwise by ``"pdflatex"``.
+        """
+        if compiler == "auto":
+            return self.budget.select_engine(self.estimates)
+        return compiler
+
+    def is_up_to_date(
+        self, manifest: BuildManifest, report: BuildReport, force: bool
+    ) -> bool:
+        """
+        Decide whether the compilation can be skipped because the PDF compiled
+        from the same source is still on disk. Marks the report as skipped if so.
+        """
+        if force or report.tex_hash is None:
+            return False
+        if not manifest.is_up_to_date(report.tex_hash, report.compiler):
+            return False
+        report.skipped = True
+        report.compiler = manifest.compiler
+        return True
+
+    @profiled("finish")
     def finish(
         self,
         filepath: str = "document",
         generate_tex: bool = True,
         compile_tex: bool = True,
-        compiler: Optional[Literal["pdflatex", "latexmk"]] = "pdflatex",
-    ) -> None:
+        compiler: Optional[CompilerName] = "pdflatex",
+        report_callback: Optional[Callable[[BuildReport], None]] = None,
+        force: bool = False,
+        shards: Optional[int] = None,
+    ) -> BuildReport:
         """
-        Compile the document.
+        Compile the document. The compilation is skipped if the build manifest saved next to the PDF
+        shows that the PDF was compiled from the same source. With fragment output
+        (see :meth:`use_fragment_output`) only the fragment files, the shared preamble and the manifest are written.
 
         :param filepath: File path without extension, defaults to "document"
         :type filepath: str, optional
-        :param keep_tex: True for removing generated .tex file, defaults to False
-        :type keep_tex: bool, optional
+        :param generate_tex: ``True`` for keeping generated .tex file, defaults to ``True``
+        :type generate_tex: bool, optional
+        :param compile_tex: ``True`` for compiling the document, defaults to ``True``
+        :type compile_tex: bool, optional
+        :param compiler: Compiler name, defaults to ``"pdflatex"``
+        :type compiler: Optional[CompilerName], optional
+        :param report_callback: Function called with the build report, also when the compilation fails, defaults to ``None``
+        :type report_callback: Optional[Callable[[BuildReport], None]], optional
+        :param force: ``True`` for compiling even if nothing has changed, defaults to ``False``
+        :type force: bool, optional
+        :param shards: Maximum number of shards compiled in parallel, ``None`` for compiling the document at once, defaults to ``None``
+        :type shards: Optional[int], optional
+        :return: Build report with timings, TeX memory usage and the largest fragments
+        :rtype: BuildReport
         """
-        if generate_tex and not compile_tex:
-            self.document.generate_tex(  # pyright: ignore [reportUnknownMemberType]
-                filepath
-            )
-        if compile_tex:
-            self.document.generate_pdf(  # pyright: ignore [reportUnknownMemberType]
-                filepath, clean_tex=not generate_tex, compiler=compiler
-            )
+        filepath = absolute_filepath(filepath)
+        self.render_deferred()
+        compiler = self.select_compiler(compiler)
+        report = BuildReport(filepath, compiler if compile_tex else None)
+        report.estimates = list(self.estimates)
+        try:
+            if self.fragment_output is not None:
+                report.compiler = None
+                start = time.perf_counter()
+                self.fragment_output.close(self, report)
+                report.generate_time = time.perf_counter() - start
+                return report
+            if compile_tex:
+                self.budget.check_document(self.estimates)
+                self.budget.check_engine(self.estimates, compiler)
+            if generate_tex or compile_tex:
+                start = time.perf_counter()
+                self.write_tex(filepath, report)
+                report.generate_time = time.perf_counter() - start
+            if compile_tex:
+                manifest = BuildManifest.load(filepath)
+                if self.is_up_to_date(manifest, report, force):
+                    if not generate_tex:
+                        os.remove(filepath + ".tex")
+                elif shards is not None and shards > 1:
+                    compile_sharded(self, filepath, report, compiler, shards)
+                    manifest.update(cast(str, report.tex_hash), report.compiler)
+                    if not generate_tex:
+                        os.remove(filepath + ".tex")
+                else:
+                    output_directory = job_directory(filepath)
+                    report.build_directory = output_directory
+                    compile_tex_file(
+                        filepath,
+                        report,
+                        compiler=compiler,
+                        clean=output_directory is None,
+                        clean_tex=not generate_tex,
+                        output_directory=output_directory,
+                    )
+                    manifest.update(cast(str, report.tex_hash), report.compiler)
+        except BaseException:
+            report.succeeded = False
+            raise
+        finally:
+            profile_report(report)
+            if report_callback is not None:
+                report_callback(report)
+        return report
+
+    @profiled("finish")
+    async def finish_async(
+        self,
+        filepath: str = "document",
+        generate_tex: bool = True,
+        compile_tex: bool = True,
+        compiler: Optional[CompilerName] = "pdflatex",
+        report_callback: Optional[Callable[[BuildReport], None]] = None,
+        force: bool = False,
+        shards: Optional[int] = None,
+    ) -> BuildReport:
+        """
+        Asynchronous version of :meth:`finish`. The .tex file is written in a worker thread
+        and the compiler runs as an asyncio subprocess, which is killed if the task is cancelled.
+        Shards are compiled in a worker thread, their compilers finish even if the task is cancelled.
+        """
+        import asyncio
+
+        filepath = absolute_filepath(filepath)
+        await asyncio.to_thread(self.render_deferred)
+        compiler = self.select_compiler(compiler)
+        report = BuildReport(filepath, compiler if compile_tex else None)
+        report.estimates = list(self.estimates)
+        try:
+            if self.fragment_output is not None:
+                report.compiler = None
+                start = time.perf_counter()
+                await asyncio.to_thread(self.fragment_output.close, self, report)
+                report.generate_time = time.perf_counter() - start
+                return report
+            if compile_tex:
+                self.budget.check_document(self.estimates)
+                self.budget.check_engine(self.estimates, compiler)
+            if generate_tex or compile_tex:
+                start = time.perf_counter()
+                await asyncio.to_thread(self.write_tex, filepath, report)
+                report.generate_time = time.perf_counter() - start
+            if compile_tex:
+                manifest = BuildManifest.load(filepath)
+                if self.is_up_to_date(manifest, report, force):
+                    if not generate_tex:
+                        os.remove(filepath + ".tex")
+                elif shards is not None and shards > 1:
+                    await asyncio.to_thread(
+                        compile_sharded, self, filepath, report, compiler, shards
+                    )
+                    await asyncio.to_thread(
+                        manifest.update,
+                        cast(str, report.tex_hash),
+                        report.compiler,
+                    )
+                    if not generate_tex:
+                        os.remove(filepath + ".tex")
+                else:
+                    output_directory = job_directory(filepath)
+                    report.build_directory = output_directory
+                    await compile_tex_async(
+                        filepath,
+                        report,
+                        compiler=compiler,
+                        clean=output_directory is None,
+                        clean_tex=not generate_tex,
+                        output_directory=output_directory,
+                    )
+                    await asyncio.to_thread(
+                        manifest.update,
+                        cast(str, report.tex_hash),
+                        report.compiler,
+                    )
+        except BaseException:
+            report.succeeded = False
+            raise
+        finally:
+            profile_report(report)
+            if report_callback is not None:
+                report_callback(report)
+        return report
+
+
+def profile_report(report: BuildReport) -> None:
+    """
+    Record the phases and counters of finished build into the active profiler.
+    """
+    profiler = active_profiler()
+    if profiler is None:
+        return
+    profiler.add_time("generate", report.generate_time)
+    if report.passes:
+        profiler.add_time("compile", report.compile_time, calls=len(report.passes))
+    profiler.count("finish.fragments", len(report.fragments))
+    profiler.count("finish.tex_characters", sum(f.characters for f in report.fragments))
+    profiler.count("finish.compiler_passes", len(report.passes))
+    profiler.count("finish.skipped", int(report.skipped))
+
+
+def absolute_filepath(filepath: str) -> str:
+    if not os.path.basename(filepath):
+        return os.path.join(os.path.abspath(filepath), "default_basename")
+    return os.path.abspath(filepath)
+
+
+def fragment_kind(item: Any) -> str:
+    if isinstance(item, LatexObject):
+        return item.latex_name
+    return "text"
+
+
+def fragment_label(item: Any) -> Optional[str]:
+    if isinstance(item, RenderedFragment):
+        return item.label
+    for child in getattr(item, "data", []):
+        if isinstance(child, Label):
+            return str(child.marker)
+    return None
 
 
 def gdm() -> DocumentManager:
@@ -215,6 +792,10 @@ def gdm() -> DocumentManager:
     :return: Current document manager instance
     :rtype: DocumentManager
     """
+    recorder = active_recorder()
+    if recorder is not None:
+        # Deferred table or plot is being rendered by this thread
+        return cast(DocumentManager, recorder)
     return DocumentManager.gdm()
 
 
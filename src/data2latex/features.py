@@ -1,11 +1,15 @@
-from typing import List, Literal, Optional
+from typing import Callable, List, Literal, Optional
 
 from pylatex import Section  # pyright: ignore [reportMissingTypeStubs]
 from pylatex.utils import NoEscape  # pyright: ignore [reportMissingTypeStubs]
 from pylatex.base_classes import LatexObject  # pyright: ignore [reportMissingTypeStubs]
 
+from .budget import Budget, BudgetPolicy
+from .compiler import CompilerName
+from .deferred import ExecutorName
 from .dm import DocumentManager, gdm
 from .environments import Text
+from .report import BuildReport
 
 
 def section(title: str, numbering: bool = False, label: Optional[str] = None) -> None:
@@ -170,14 +174,105 @@ def use_multi_page_standalone(
     )
 
 
+def use_spooled_body(max_memory: int = 16 * 1024 * 1024) -> None:
+    """
+    Optional setup for generating large documents with bounded memory usage. Every table, plot and other content is converted into LaTeX source code right when it is appended and the PyLaTeX objects are released. The source code is kept in memory up to ``max_memory`` characters, then it is spilled into a temporary file. The file is copied behind the preamble when calling :func:`finish`. This can be combined with other setup functions, but it should be called before adding any content.
+
+    :param max_memory: Number of characters kept in memory before spilling to disk, defaults to ``16 * 1024 * 1024``.
+    :type max_memory: int, optional
+    :raises RuntimeError: The document body is already spooled.
+    """
+    gdm().use_spool(max_memory)
+
+
+def use_deferred_rendering(
+    executor: ExecutorName = "process", max_workers: Optional[int] = None
+) -> None:
+    """
+    Optional setup for documents with many large tables and plots. Calls of :func:`table` and :func:`plot` only record the data and options and return right away. The recorded fragments are rendered in a pool of workers when calling :func:`finish` and spliced back in document order, so the generated .tex file is the same as without this setup. The data must not be modified before :func:`finish`, the process pool also requires data, options and callables (e.g. ``str_convertor``) which can be pickled. Large NumPy arrays (also inside DataFrames) are placed once into shared memory and the worker processes get read-only views of them instead of copies. Exceptions and budget warnings of the fragments are raised when calling :func:`finish`. Cannot be combined with :func:`use_spooled_body`.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import data2latex as dtol
+        dtol.use_deferred_rendering()
+        for data in datasets:
+            dtol.table(data)  # Only recorded
+        dtol.finish()  # Tables are rendered on all processors
+
+    :param executor: ``"process"`` for a process pool using all processors or ``"thread"`` for a thread pool, which does not copy the data but is limited by the GIL. Defaults to ``"process"``.
+    :type executor: ExecutorName, optional
+    :param max_workers: Maximum number of workers, ``None`` for the number of processors. Defaults to ``None``.
+    :type max_workers: Optional[int], optional
+    :raises ValueError: Unknown executor.
+    :raises RuntimeError: The document body is spooled.
+    """
+    gdm().use_deferred(executor, max_workers)
+
+
+def use_fragment_output(directory: str, max_workers: Optional[int] = None) -> None:
+    """
+    Optional setup for including tables and plots into a hand-written document. Every :func:`table` and :func:`plot` is written into its own .tex file in ``directory`` instead of the document, the file is named after the label (``plot:results`` gives ``plot-results.tex``) or after the kind and order (e.g. ``figure2.tex``). The files are written in a pool of threads. :func:`finish` waits for them and writes ``preamble.tex`` with the packages and definitions (colors, styles) needed by the fragments and ``fragments.json`` with the list of files and their packages, the document itself is not generated. Files whose content has not changed are not rewritten, so their modification time does not trigger rebuilds. Cannot be combined with :func:`use_spooled_body` and :func:`use_deferred_rendering`.
+
+    .. highlight:: latex
+    .. code-block:: latex
+
+        \documentclass{report}
+        \input{fragments/preamble}
+        \begin{document}
+        \input{fragments/plot-results}
+        \end{document}
+
+    :param directory: Directory for the fragment files, created if needed.
+    :type directory: str
+    :param max_workers: Maximum number of writing threads, ``None`` for the default of :class:`concurrent.futures.ThreadPoolExecutor`. Defaults to ``None``.
+    :type max_workers: Optional[int], optional
+    :raises RuntimeError: The document body is spooled or rendered deferred.
+    """
+    gdm().use_fragment_output(directory, max_workers)
+
+
+def set_budget(
+    policy: BudgetPolicy = "warn",
+    memory_limit: Optional[int] = None,
+    compile_time_limit: Optional[float] = None,
+) -> None:
+    """
+    Configure the budget which estimates TeX main memory and compile time of every table and plot from the number of cells, points and characters before the document is compiled. Fragments over the budget are reported right when they are added, so "TeX capacity exceeded" errors are caught before :func:`finish`. The estimates are stored in the build report. Setup functions reset the budget, call this function after them.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import data2latex as dtol
+        dtol.set_budget("decimate")
+        dtol.plot(range(1_000_000), range(1_000_000))  # Every 13th point is kept
+        dtol.finish()
+
+    :param policy: ``"ignore"``, ``"warn"`` for :class:`BudgetWarning`, ``"error"`` for raising :class:`BudgetExceededError`, ``"decimate"`` for keeping every n-th point of the plots over the budget or ``"lualatex"`` for accepting them when the document is compiled with ``compiler="auto"``, which selects LuaLaTeX for them, :func:`finish` warns if they are compiled by another engine. Defaults to ``"warn"``.
+    :type policy: BudgetPolicy, optional
+    :param memory_limit: TeX main memory in words available for one table or plot, ``None`` for 80 % of the default pdfLaTeX memory. Defaults to ``None``.
+    :type memory_limit: Optional[int], optional
+    :param compile_time_limit: Estimated compile time of the whole document in seconds checked by :func:`finish`, ``None`` for no limit. Defaults to ``None``.
+    :type compile_time_limit: Optional[float], optional
+    :raises ValueError: Unknown budget policy.
+    """
+    if memory_limit is None:
+        gdm().budget = Budget(policy, compile_time_limit=compile_time_limit)
+    else:
+        gdm().budget = Budget(policy, memory_limit, compile_time_limit)
+
+
 def finish(
     filepath: str = "document",
     generate_tex: bool = True,
     compile_tex: bool = True,
-    compiler: Optional[Literal["pdflatex", "latexmk"]] = "pdflatex",
-) -> None:
+    compiler: Optional[CompilerName] = "pdflatex",
+    report_callback: Optional[Callable[[BuildReport], None]] = None,
+    force: bool = False,
+    shards: Optional[int] = None,
+) -> BuildReport:
     """
-    Generate LaTeX source code and compile the document.
+    Generate LaTeX source code and compile the document. A build manifest (``filepath + ".d2l.json"``) with the hash of the generated source is saved next to the .pdf file. If the source has not changed and the .pdf file is still on disk, the compilation is skipped. With :func:`use_fragment_output` only the fragment files, the shared preamble and the manifest are written.
 
     :param filepath: File name or file path without extension, defaults to ``"document"``.
     :type filepath: str, optional
@@ -185,25 +280,38 @@ def finish(
     :type generate_tex: bool, optional
     :param compile_tex: ``True`` for compiling the document into .pdf file, defaults to ``True``.
     :type compile_tex: bool, optional
-    :param compiler: Compiler name, ``pdflatex`` could be faster then ``latexmk``, defaults to ``"pdflatex"``.
-    :type compiler: Optional[Literal["pdflatex", "latexmk"]], optional
+    :param compiler: Compiler name, ``pdflatex`` could be faster then ``latexmk``. ``lualatex`` allocates TeX memory dynamically and compiles plots and tables which exceed the fixed memory of ``pdflatex``. ``auto`` selects ``lualatex`` if the estimated memory of some table or plot exceeds the budget (see :func:`set_budget`), otherwise ``pdflatex``. Defaults to ``"pdflatex"``.
+    :type compiler: Optional[CompilerName], optional
+    :param report_callback: Function which receives the build report, it is called even if the compilation fails. Defaults to ``None``.
+    :type report_callback: Optional[Callable[[BuildReport], None]], optional
+    :param force: ``True`` for compiling the document even if the build manifest shows that the .pdf file was already compiled from the same source, defaults to ``False``.
+    :type force: bool, optional
+    :param shards: Maximum number of shards for documents which take too long to compile at once. The body is split at section boundaries into shards of similar size which are compiled in parallel with the shared preamble (see :func:`set_max_concurrent_compilations`) and merged into one .pdf file with ``pdfpages``, which does not keep hyperlinks and the PDF outline (bookmarks). Page, section, figure and table numbering continues across the shards and references between the shards are resolved through their .aux files with the ``xr`` package. The counter settings of the shards are kept next to the document (``-shard1-counters.tex``...), so a rebuild with unchanged numbering compiles every shard only once. ``None`` for compiling the document at once, defaults to ``None``.
+    :type shards: Optional[int], optional
+    :return: Build report with wall time of each compiler pass, number of reruns, TeX memory usage parsed from the .log file and sizes of the tables and plots.
+    :rtype: BuildReport
     """
-    gdm().finish(
+    return gdm().finish(
         filepath=filepath,
         generate_tex=generate_tex,
         compile_tex=compile_tex,
         compiler=compiler,
+        report_callback=report_callback,
+        force=force,
+        shards=shards,
     )
 
 
-def latex(filepath: str = "document") -> None:
+def latex(filepath: str = "document") -> BuildReport:
     """
     Generate LaTeX source code.
 
     :param filepath: File name or file path without extension, defaults to ``"document"``.
     :type filepath: str, optional
+    :return: Build report with sizes of the tables and plots.
+    :rtype: BuildReport
     """
-    gdm().finish(
+    return gdm().finish(
         filepath=filepath,
         generate_tex=True,
         compile_tex=False,
@@ -211,18 +319,118 @@ def latex(filepath: str = "document") -> None:
 
 
 def pdf(
-    filepath: str = "document", compiler: Optional[Literal["pdflatex"]] = "pdflatex"
-) -> None:
+    filepath: str = "document",
+    compiler: Optional[CompilerName] = "pdflatex",
+    report_callback: Optional[Callable[[BuildReport], None]] = None,
+    force: bool = False,
+) -> BuildReport:
     """
     Compile the document without saving the .tex file.
 
     :param filepath: File name or file path without extension, defaults to ``"document"``.
     :type filepath: str, optional
-    :param compiler: Compiler name, ``pdflatex`` could be faster then ``latexmk``, defaults to ``"pdflatex"``.
-    :type compiler: Optional[Literal["pdflatex", "latexmk"]], optional
+    :param compiler: Compiler name, ``pdflatex`` could be faster then ``latexmk``. ``lualatex`` allocates TeX memory dynamically and compiles plots and tables which exceed the fixed memory of ``pdflatex``. ``auto`` selects ``lualatex`` if the estimated memory of some table or plot exceeds the budget (see :func:`set_budget`), otherwise ``pdflatex``. Defaults to ``"pdflatex"``.
+    :type compiler: Optional[CompilerName], optional
+    :param report_callback: Function which receives the build report, it is called even if the compilation fails. Defaults to ``None``.
+    :type report_callback: Optional[Callable[[BuildReport], None]], optional
+    :param force: ``True`` for compiling the document even if the build manifest shows that the .pdf file was already compiled from the same source, defaults to ``False``.
+    :type force: bool, optional
+    :return: Build report with compilation statistics.
+    :rtype: BuildReport
+    """
+    return gdm().finish(
+        filepath=filepath,
+        generate_tex=False,
+        compile_tex=True,
+        compiler=compiler,
+        report_callback=report_callback,
+        force=force,
+    )
+
+
+async def finish_async(
+    filepath: str = "document",
+    generate_tex: bool = True,
+    compile_tex: bool = True,
+    compiler: Optional[CompilerName] = "pdflatex",
+    report_callback: Optional[Callable[[BuildReport], None]] = None,
+    force: bool = False,
+    shards: Optional[int] = None,
+) -> BuildReport:
     """
-    gdm().finish(
-        filepath=filepath, generate_tex=False, compile_tex=True, compiler=compiler
+    Asynchronous version of :func:`finish` which does not block the event loop. The .tex file is written in a worker thread and the compiler is started with :func:`asyncio.create_subprocess_exec`. Cancelling the task kills the compiler process. The number of compilers running at the same time is limited by :func:`set_max_concurrent_compilations`.
+
+    :param filepath: File name or file path without extension, defaults to ``"document"``.
+    :type filepath: str, optional
+    :param generate_tex: ``True`` for generating .tex file, defaults to ``True``.
+    :type generate_tex: bool, optional
+    :param compile_tex: ``True`` for compiling the document into .pdf file, defaults to ``True``.
+    :type compile_tex: bool, optional
+    :param compiler: Compiler name, ``pdflatex`` could be faster then ``latexmk``. ``lualatex`` allocates TeX memory dynamically and compiles plots and tables which exceed the fixed memory of ``pdflatex``. ``auto`` selects ``lualatex`` if the estimated memory of some table or plot exceeds the budget (see :func:`set_budget`), otherwise ``pdflatex``. Defaults to ``"pdflatex"``.
+    :type compiler: Optional[CompilerName], optional
+    :param report_callback: Function which receives the build report, it is called even if the compilation fails. Defaults to ``None``.
+    :type report_callback: Optional[Callable[[BuildReport], None]], optional
+    :param force: ``True`` for compiling the document even if the build manifest shows that the .pdf file was already compiled from the same source, defaults to ``False``.
+    :type force: bool, optional
+    :param shards: Maximum number of shards compiled in parallel (see :func:`finish`), the shards are compiled in a worker thread and are not killed if the task is cancelled. ``None`` for compiling the document at once, defaults to ``None``.
+    :type shards: Optional[int], optional
+    :return: Build report with compilation statistics.
+    :rtype: BuildReport
+    """
+    return await gdm().finish_async(
+        filepath=filepath,
+        generate_tex=generate_tex,
+        compile_tex=compile_tex,
+        compiler=compiler,
+        report_callback=report_callback,
+        force=force,
+        shards=shards,
+    )
+
+
+async def latex_async(filepath: str = "document") -> BuildReport:
+    """
+    Asynchronous version of :func:`latex`, the .tex file is written in a worker thread.
+
+    :param filepath: File name or file path without extension, defaults to ``"document"``.
+    :type filepath: str, optional
+    :return: Build report with sizes of the tables and plots.
+    :rtype: BuildReport
+    """
+    return await gdm().finish_async(
+        filepath=filepath,
+        generate_tex=True,
+        compile_tex=False,
+    )
+
+
+async def pdf_async(
+    filepath: str = "document",
+    compiler: Optional[CompilerName] = "pdflatex",
+    report_callback: Optional[Callable[[BuildReport], None]] = None,
+    force: bool = False,
+) -> BuildReport:
+    """
+    Asynchronous version of :func:`pdf`. Cancelling the task kills the compiler process.
+
+    :param filepath: File name or file path without extension, defaults to ``"document"``.
+    :type filepath: str, optional
+    :param compiler: Compiler name, ``pdflatex`` could be faster then ``latexmk``. ``lualatex`` allocates TeX memory dynamically and compiles plots and tables which exceed the fixed memory of ``pdflatex``. ``auto`` selects ``lualatex`` if the estimated memory of some table or plot exceeds the budget (see :func:`set_budget`), otherwise ``pdflatex``. Defaults to ``"pdflatex"``.
+    :type compiler: Optional[CompilerName], optional
+    :param report_callback: Function which receives the build report, it is called even if the compilation fails. Defaults to ``None``.
+    :type report_callback: Optional[Callable[[BuildReport], None]], optional
+    :param force: ``True`` for compiling the document even if the build manifest shows that the .pdf file was already compiled from the same source, defaults to ``False``.
+    :type force: bool, optional
+    :return: Build report with compilation statistics.
+    :rtype: BuildReport
+    """
+    return await gdm().finish_async(
+        filepath=filepath,
+        generate_tex=False,
+        compile_tex=True,
+        compiler=compiler,
+        report_callback=report_callback,
+        force=force,
     )
 
 
@@ -0,0 +1,218 @@
+import json
+import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+from pylatex.base_classes import (  # pyright: ignore [reportMissingTypeStubs]
+    Container,
+    LatexObject,
+)
+from pylatex.utils import dumps_list  # pyright: ignore [reportMissingTypeStubs]
+
+from .manifest import file_hash, text_hash
+from .report import BuildReport, FragmentStats
+
+if TYPE_CHECKING:
+    from .dm import DocumentManager
+
+# Kinds of appended content written into their own files, other content stays in the document
+FRAGMENT_KINDS: List[str] = ["table", "figure"]
+
+# Files written next to the fragments
+PREAMBLE_FILENAME: str = "preamble.tex"
+MANIFEST_FILENAME: str = "fragments.json"
+
+# Characters of labels which are replaced in file names, e.g. "plot:results" -> "plot-results"
+UNSAFE_NAME_PATTERN = re.compile(r"[^\w.-]+")
+
+
+def write_if_changed(path: str, text: str) -> bool:
+    """
+    Write the text into the file unless the file already has the same content,
+    so the modification time changes only with the content. The file is replaced atomically.
+
+    :param path: Path to the file
+    :type path: str
+    :param text: New content of the file
+    :type text: str
+    :return: ``True`` if the file was written
+    :rtype: bool
+    """
+    if file_hash(path) == text_hash(text):
+        return False
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return True
+
+
+class FragmentFile:
+    """
+    One table or plot written into its own file.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        kind: str,
+        label: Optional[str],
+        packages: List[str],
+        future: "Future[FragmentStats]",
+    ) -> None:
+        self.filename = filename
+        self.kind = kind
+        self.label = label
+        self.packages = packages
+        self.future = future
+
+    def to_dict(self, stats: FragmentStats) -> Dict[str, Any]:
+        return {
+            "file": self.filename,
+            "kind": self.kind,
+            "label": self.label,
+            "packages": self.packages,
+            "digest": stats.digest,
+        }
+
+
+class FragmentWriter:
+    """
+    Writes every table and plot into its own .tex file, which can be included into a hand-written
+    document by ``\\input``. Packages and preamble definitions needed by the fragments are written
+    into :data:`PREAMBLE_FILENAME`, the list of files with their packages into :data:`MANIFEST_FILENAME`.
+    Files are serialized and written in a pool of threads and files with unchanged content are not touched.
+    The pool lives from the first fragment to :meth:`close`, so fragments can be added after
+    the document was finished, the next :meth:`close` writes all of them into the manifest.
+
+    :param directory: Directory for the fragments, created if needed
+    :type directory: str
+    :param document_packages: Packages of the document before any fragment was added, they are not written into the preamble file
+    :type document_packages: Set[str]
+    :param max_workers: Maximum number of threads, ``None`` for the default of :class:`ThreadPoolExecutor`
+    :type max_workers: Optional[int]
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        document_packages: Set[str],
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.directory = os.path.abspath(directory)
+        self.document_packages = document_packages
+        self.max_workers = max_workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.files: List[FragmentFile] = []
+        self.counters: Dict[str, int] = {}
+        # Lowercase, so the names are unique also on case-insensitive file systems
+        self.filenames: Set[str] = {PREAMBLE_FILENAME, MANIFEST_FILENAME}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def filename(self, kind: str, label: Optional[str]) -> str:
+        """
+        Unique file name of the fragment, labels which are the same after replacing
+        unsafe characters (e.g. ``tab:a`` and ``tab-a``) get a numbered suffix.
+        """
+        self.counters[kind] = self.counters.get(kind, 0) + 1
+        if label is None:
+            stem = f"{kind}{self.counters[kind]}"
+        else:
+            stem = UNSAFE_NAME_PATTERN.sub("-", label)
+        filename = f"{stem}.tex"
+        suffix = 1
+        while filename.lower() in self.filenames:
+            suffix += 1
+            filename = f"{stem}-{suffix}.tex"
+        self.filenames.add(filename.lower())
+        return filename
+
+    def write(
+        self, content: LatexObject, kind: str, label: Optional[str], escape: bool
+    ) -> List[LatexObject]:
+        """
+        Start writing the content into its own file.
+
+        :return: Packages required by the content
+        :rtype: List[LatexObject]
+        """
+        if isinstance(content, Container):
+            content._propagate_packages()  # pyright: ignore [reportPrivateUsage]
+        packages: List[LatexObject] = list(
+            content.packages  # pyright: ignore [reportUnknownMemberType, reportUnknownArgumentType]
+        )
+        filename = self.filename(kind, label)
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        future = self.executor.submit(
+            self.write_file, content, filename, kind, label, escape
+        )
+        self.files.append(
+            FragmentFile(filename, kind, label, [p.dumps() for p in packages], future)
+        )
+        return packages
+
+    def write_file(
+        self,
+        content: LatexObject,
+        filename: str,
+        kind: str,
+        label: Optional[str],
+        escape: bool,
+    ) -> FragmentStats:
+        fragment: str = dumps_list([content], escape=escape) + "%\n"
+        write_if_changed(os.path.join(self.directory, filename), fragment)
+        return FragmentStats(
+            index=0,
+            kind=kind,
+            characters=len(fragment),
+            label=label,
+            digest=text_hash(fragment),
+        )
+
+    def close(self, dm: "DocumentManager", report: BuildReport) -> None:
+        """
+        Wait for all fragment files, then write the preamble file and the manifest.
+
+        :param dm: Document manager with the preamble definitions
+        :type dm: DocumentManager
+        :param report: Build report for storing the fragments
+        :type report: BuildReport
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        document = dm.document
+        packages: List[str] = [
+            package
+            for package in (
+                p.dumps()
+                for p in document.packages  # pyright: ignore [reportUnknownMemberType, reportUnknownVariableType]
+            )
+            if package not in self.document_packages
+        ]
+        preamble: str = "".join(f"{p}%\n" for p in packages)
+        preamble += dumps_list(document.preamble) + "%\n"
+        write_if_changed(os.path.join(self.directory, PREAMBLE_FILENAME), preamble)
+        entries: List[Dict[str, Any]] = []
+        for i, file in enumerate(self.files):
+            stats = file.future.result()
+            stats.index = i
+            report.fragments.append(stats)
+            entries.append(file.to_dict(stats))
+        report.head_hash = text_hash(preamble)
+        manifest: Dict[str, Any] = {
+            "preamble": PREAMBLE_FILENAME,
+            "packages": packages,
+            "fragments": entries,
+        }
+        write_if_changed(
+            os.path.join(self.directory, MANIFEST_FILENAME),
+            json.dumps(manifest, indent=2) + "\n",
+        )
@@ -1,9 +1,11 @@
+import csv
 from numbers import Integral, Number
 from typing import (
     Any,
     Dict,
     Iterator,
     List,
+    Optional,
     Protocol,
     Sequence,
     Tuple,
@@ -22,34 +24,109 @@ def replace_multiple(
     return result
 
 
+# Characters ignored when deciding whether serialized option value is empty
+_EMPTY_VALUE_CHARACTERS: str = "\t\n %"
+# Maximum number of memoized serialized option dicts
+OPTIONS_CACHE_SIZE: int = 1024
+_options_cache: Dict[Tuple[Any, ...], Tuple[str, bool]] = {}
+
+
+def _is_blank(text: str) -> bool:
+    return not text.strip(_EMPTY_VALUE_CHARACTERS)
+
+
+def _options_key(data: Dict[Any, Any]) -> Optional[Tuple[Any, ...]]:
+    """
+    Hashable key of the option dict which contains no nested dicts or ``None``
+    if the dict cannot be memoized. Values are keyed by their type and string
+    representation because equal values can be serialized differently,
+    e.g. ``0.0`` and ``-0.0`` or ``(1, 2.0)`` and ``(1.0, 2)``.
+    """
+    key: List[Any] = []
+    for k, v in data.items():
+        if isinstance(v, dict):
+            return None
+        key.append((k, type(v), str(v)))
+    return tuple(key)
+
+
+def _serialize_options(data: Dict[Any, Any], level: int) -> Tuple[str, bool]:
+    """
+    Serialize option dict without enclosing braces.
+
+    :return: Serialized options and ``True`` if the dict contains no visible option
+    :rtype: Tuple[str, bool]
+    """
+    key = _options_key(data)
+    if key is not None:
+        cache_key = (level, key)
+        cached = _options_cache.get(cache_key)
+        if cached is None:
+            if len(_options_cache) >= OPTIONS_CACHE_SIZE:
+                _options_cache.clear()
+            cached = _options_cache[cache_key] = _serialize_options_uncached(
+                data, level
+            )
+        return cached
+    return _serialize_options_uncached(data, level)
+
+
+def _serialize_options_uncached(data: Dict[Any, Any], level: int) -> Tuple[str, bool]:
+    parts: List[str] = []
+    empty: bool = True
+    tabs = "\t" * level
+    for key, value in data.items():
+        if not isinstance(key, str) or len(key) == 0 or value is None:
+            continue
+        elif value == "":
+            part = key[1:] if key[0] == "`" else key
+            parts.append(part)
+            empty = empty and _is_blank(part)
+        else:
+            if isinstance(value, dict):
+                nested, nested_empty = _serialize_options(value, level + 1)
+                if nested_empty:
+                    continue
+                parts.append(f"{key}={{{nested}{tabs}}}")
+            else:
+                text = str(value)
+                if _is_blank(text):
+                    continue
+                parts.append(f"{key}={{{text}}}")
+            empty = False
+    # Commas between the parts are visible
+    empty = empty and len(parts) < 2
+    return (f"%\n{tabs}" + (",%\n" + tabs).join(parts) + "%\n", empty)
+
+
 def dict2str(
     data: Any | Dict[Any, Any],
     enclose: bool = False,
     level: int = 1,
 ) -> str:
-    result: str = ""
+    """
+    Serialize (nested) option dict into key-value list for LaTeX packages.
+    Options with ``None`` value are skipped, options with empty string value are written
+    without the value and options with empty nested dict are skipped. Serialized dicts
+    without nested dicts are memoized because the same options repeat across plot series
+    and table columns.
+
+    :param data: Option dict or single value
+    :type data: Any | Dict[Any, Any]
+    :param enclose: ``True`` for enclosing the result in braces, defaults to ``False``
+    :type enclose: bool, optional
+    :param level: Indentation level, defaults to ``1``
+    :type level: int, optional
+    :return: Serialized options
+    :rtype: str
+    """
     if isinstance(data, dict):
-        parts: List[str] = []
-        for key, value in data.items():
-            if not isinstance(key, str) or len(key) == 0 or value is None:
-                continue
-            elif value == "":
-                if key[0] == "`":
-                    parts.append(key[1:])
-                else:
-                    parts.append(key)
-            else:
-                new_value: str = dict2str(value, enclose=True, level=level + 1)
-                if replace_multiple(new_value, ["\t", "\n", " ", "%"]) == "{}":
-                    continue
-                parts.append(f"{key}={new_value}")
-        tabs = "\t" * level
-        result = f"%\n{tabs}" + (",%\n" + tabs).join(parts) + "%\n"
+        result = _serialize_options(data, level)[0]
         if enclose:
-            result += "\t" * max(level - 1, 0)
-    else:
-        result = str(data)
-    return f"{{{result}}}" if enclose else f"{result}"
+            return "{" + result + "\t" * max(level - 1, 0) + "}"
+        return result
+    result = str(data)
+    return f"{{{result}}}" if enclose else result
 
 
 @runtime_checkable
@@ -244,6 +321,70 @@ class DataFrameOuterIterator:
         return self.row_count + (1 if self.include_column_names else 0)
 
 
+class CSVRows:
+    """
+    Re-iterable view of the rows of a CSV file which never holds the whole file in memory.
+    Every iteration reads the file again and yields each row as a list of strings.
+    The number of rows is counted by one streaming pass on the first call of :func:`len`.
+
+    :param path: Path to the CSV file
+    :type path: str
+    :param delimiter: Column delimiter, defaults to ``","``
+    :type delimiter: str, optional
+    :param skip_rows: Number of rows skipped at the beginning of the file, defaults to ``0``
+    :type skip_rows: int, optional
+    """
+
+    def __init__(self, path: str, delimiter: str = ",", skip_rows: int = 0) -> None:
+        self.path = path
+        self.delimiter = delimiter
+        self.skip_rows = skip_rows
+        self._length: Optional[int] = None
+
+    def __iter__(self) -> Iterator[List[str]]:
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            for i, row in enumerate(csv.reader(f, delimiter=self.delimiter)):
+                if i >= self.skip_rows:
+                    yield row
+
+    def __len__(self) -> int:
+        if self._length is None:
+            self._length = sum(1 for _ in self)
+        return self._length
+
+    def header(self) -> List[str]:
+        """
+        Read the first row of the file regardless of ``skip_rows``.
+
+        :return: First row or empty list for an empty file
+        :rtype: List[str]
+        """
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            return next(csv.reader(f, delimiter=self.delimiter), [])
+
+
+class CSVColumn:
+    """
+    Re-iterable view of one numeric column of a CSV file which reads the file row by row.
+
+    :param rows: Rows of the CSV file
+    :type rows: CSVRows
+    :param index: Index of the column
+    :type index: int
+    """
+
+    def __init__(self, rows: CSVRows, index: int) -> None:
+        self.rows = rows
+        self.index = index
+
+    def __iter__(self) -> Iterator[float]:
+        for row in self.rows:
+            yield float(row[self.index])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
 DataFrameIterator = DataFrameOuterIterator
 ValidDataType: TypeAlias = Union[str, int, Integral, float, Number]
 KnownLengthIterable2D: TypeAlias = OuterKnownLengthIterable
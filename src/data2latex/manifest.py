@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+from typing import IO, Any, Dict, List, Optional
+
+# Extension of the manifest file which is saved next to the compiled document
+MANIFEST_EXTENSION: str = ".d2l.json"
+
+
+class HashingWriter:
+    """
+    Text file wrapper which computes SHA-256 hash of everything written through it.
+    """
+
+    def __init__(self, file: IO[str]) -> None:
+        self.file = file
+        self.hash = hashlib.sha256()
+
+    def write(self, data: str) -> int:
+        self.hash.update(data.encode("utf-8"))
+        return self.file.write(data)
+
+    def hexdigest(self) -> str:
+        return self.hash.hexdigest()
+
+
+def text_hash(text: str) -> str:
+    """
+    Compute SHA-256 hash of a text encoded in UTF-8.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(path: str) -> Optional[str]:
+    """
+    Compute SHA-256 hash of a file.
+
+    :param path: Path to the file
+    :type path: str
+    :return: Hex digest or ``None`` if the file does not exist
+    :rtype: Optional[str]
+    """
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+
+def file_stamp(path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class BuildManifest:
+    """
+    Record of the last successful compilation: hash of the generated source
+    and size with modification time of the PDF.
+
+    :param filepath: Absolute file path of the document without extension
+    :type filepath: str
+    """
+
+    def __init__(self, filepath: str) -> None:
+        self.filepath = filepath
+        self.tex_hash: Optional[str] = None
+        self.compiler: Optional[str] = None
+        self.pdf: Optional[List[int]] = None
+
+    @property
+    def path(self) -> str:
+        return self.filepath + MANIFEST_EXTENSION
+
+    @classmethod
+    def load(cls, filepath: str) -> "BuildManifest":
+        """
+        Load the manifest saved next to the document, missing or invalid manifest is empty.
+        """
+        manifest = cls(filepath)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data: Dict[str, Any] = json.load(f)
+            manifest.tex_hash = data.get("tex_hash")
+            manifest.compiler = data.get("compiler")
+            manifest.pdf = data.get("pdf")
+        except (OSError, ValueError, TypeError):
+            pass
+        return manifest
+
+    def save(self) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "tex_hash": self.tex_hash,
+                    "compiler": self.compiler,
+                    "pdf": self.pdf,
+                },
+                f,
+                indent=2,
+            )
+
+    def is_up_to_date(self, tex_hash: str, compiler: Optional[str]) -> bool:
+        """
+        Check whether the PDF compiled from the same source is still on disk.
+
+        :param tex_hash: Hash of the newly generated .tex file
+        :type tex_hash: str
+        :param compiler: Requested compiler
+        :type compiler: Optional[str]
+        :rtype: bool
+        """
+        return (
+            self.tex_hash == tex_hash
+            and (compiler is None or self.compiler == compiler)
+            and self.pdf is not None
+            and self.pdf == file_stamp(self.filepath + ".pdf")
+        )
+
+    def update(self, tex_hash: str, compiler: Optional[str]) -> None:
+        """
+        Record a successful compilation and save the manifest.
+        """
+        self.tex_hash = tex_hash
+        self.compiler = compiler
+        self.pdf = file_stamp(self.filepath + ".pdf")
+        self.save()
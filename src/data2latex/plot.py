@@ -1,6 +1,20 @@
-from itertools import cycle
+import math
+import time
+from itertools import cycle, islice
 from numbers import Integral, Number
-from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple, TypeAlias, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    TypeAlias,
+    Union,
+)
 
 from pylatex import (  # pyright: ignore [reportMissingTypeStubs]
     Axis,
@@ -12,9 +26,13 @@ from pylatex import (  # pyright: ignore [reportMissingTypeStubs]
 from pylatex.base_classes import Float  # pyright: ignore [reportMissingTypeStubs]
 from pylatex.utils import NoEscape  # pyright: ignore [reportMissingTypeStubs]
 
+from .budget import FragmentEstimate
+from .deferred import deferrable
 from .dm import gdm
 from .environments import CenteringFlagCommand, Label2, SetLengthCommand
-from .iter_protocols import dict2str
+from .iter_protocols import dict2str, is_ndarray
+from .profiling import active_profiler, profiled
+from .ticks import axis_tick_options, series_limits
 
 #
 # TypeAliases for input parameters for plot function
@@ -188,12 +206,23 @@ def process_data(
 ) -> Tuple[Iterable[Iterable[Numeric]], List[int]]:
     if not isinstance(data, Iterable):
         raise ValueError("X must be at least iterable.")
+    # Numeric NumPy arrays are valid as a whole, checking every entry would dominate huge plots
+    if is_ndarray(data) and data.dtype.kind in "iuf" and data.ndim in (1, 2):
+        if data.ndim == 1:
+            return ([data], [len(data)])
+        return (data, [data.shape[1]] * data.shape[0])
     lengths: List[int] = []
     outer_length: int = 0
     for i, x in enumerate(  # pyright: ignore [reportUnknownVariableType]
         data  # pyright: ignore [reportUnknownArgumentType]
     ):
-        if isinstance(x, Iterable):
+        # Numbers are checked first, the Iterable check is much slower
+        if isinstance(x, Number):
+            if len(lengths) > 0:
+                raise ValueError(
+                    f"Found a Number: '{name}[{i}]={x}', expected a Sequence based on the data so far."
+                )
+        elif isinstance(x, Iterable):
             if len(lengths) != outer_length:
                 raise ValueError(
                     f"Found a Sequence: '{name}[{i}]=[...]', expected a Number based on the data so far."
@@ -208,12 +237,8 @@ def process_data(
                     )
                 inner_length += 1
             lengths.append(inner_length)
-        elif not isinstance(x, Number):
+        else:
             raise ValueError(f"Found a non-numeric/sequence entry: '{name}[{i}]={x}'.")
-        elif len(lengths) > 0:
-            raise ValueError(
-                f"Found a Number: '{name}[{i}]={x}', expected a Sequence based on the data so far."
-            )
         outer_length += 1
     if len(lengths) == 0:
         lengths.append(outer_length)
@@ -221,6 +246,22 @@ def process_data(
     return (data, lengths)  # pyright: ignore [reportUnknownVariableType]
 
 
+def decimate(values: Iterable[Numeric], step: int) -> List[Numeric]:
+    """
+    Keep every ``step``-th value, NumPy arrays are sliced instead of iterated.
+
+    :param values: Values of one series
+    :type values: Iterable[Numeric]
+    :param step: Distance of the kept values
+    :type step: int
+    :return: Decimated values
+    :rtype: List[Numeric]
+    """
+    if is_ndarray(values):
+        return values[::step]  # pyright: ignore [reportIndexIssue]
+    return list(islice(values, 0, None, step))
+
+
 def check_data_lengths(x_lengths: List[int], y_lengths: List[int]) -> None:
     if len(x_lengths) != len(y_lengths):
         raise ValueError(
@@ -239,7 +280,9 @@ def create_cycle_iter(attribute: Any) -> "cycle[Any]":
     return cycle(attribute)  # pyright: ignore [reportUnknownArgumentType]
 
 
-def rgb2mixcolor(color: Union[Tuple[int, int, int], Tuple[float, float, float]]) -> str:
+def rgb2ints(
+    color: Union[Tuple[int, int, int], Tuple[float, float, float]]
+) -> Tuple[int, int, int]:
     if (
         not isinstance(color, tuple)  # pyright: ignore [reportUnnecessaryIsInstance]
         or len(color) != 3
@@ -250,7 +293,7 @@ def rgb2mixcolor(color: Union[Tuple[int, int, int], Tuple[float, float, float]])
         r, g, b = (min(max(round(x), 0), 255) for x in color)
     elif isinstance(color[0], float):  # pyright: ignore [reportUnnecessaryIsInstance]
         r, g, b = (min(max(round(255 * x), 0), 255) for x in color)
-    return f"rgb,255:red,{r};green,{g};blue,{b}"
+    return (r, g, b)
 
 
 # https://stackoverflow.com/a/214657/9318084
@@ -264,7 +307,25 @@ def hex2rgb(value: str) -> Tuple[int, int, int]:
     return tuple(int(value[i : i + 2], 16) for i in [0, 2, 4])
 
 
-def handle_color(color: Union[None, Color, List[Union[None, Color]]]) -> List[str]:
+def color2rgb(
+    color: Union[Tuple[Numeric, Numeric, Numeric], str]
+) -> Tuple[int, int, int]:
+    if isinstance(color, tuple):
+        return rgb2ints(color)  # pyright: ignore [reportGeneralTypeIssues]
+    return hex2rgb(color)
+
+
+def handle_color(
+    color: Union[None, Color, List[Union[None, Color]]],
+    define: Optional[Callable[[Tuple[int, int, int]], str]] = None,
+) -> List[str]:
+    """
+    Convert colors into names usable in ``pgfplots`` options. Tuples and hex values
+    are defined once in the document preamble (see :meth:`DocumentManager.define_color`)
+    unless ``define`` converts them into names in another way.
+    """
+    if define is None:
+        define = gdm().define_color
     if not isinstance(color, list):
         color = [color]
     valid_colors: List[Any] = [None] * len(color)
@@ -272,7 +333,7 @@ def handle_color(color: Union[None, Color, List[Union[None, Color]]]) -> List[st
         if c is None:
             valid_colors[i] = "none"
         elif isinstance(c, tuple):
-            valid_colors[i] = rgb2mixcolor(c)
+            valid_colors[i] = define(color2rgb(c))
         elif isinstance(c, str):  # pyright: ignore [reportUnnecessaryIsInstance]
             if (
                 c
@@ -280,7 +341,7 @@ def handle_color(color: Union[None, Color, List[Union[None, Color]]]) -> List[st
             ):
                 valid_colors[i] = c
             else:
-                valid_colors[i] = rgb2mixcolor(hex2rgb(c))
+                valid_colors[i] = define(color2rgb(c))
         else:
             valid_colors[i] = str(c)
     return valid_colors
@@ -341,11 +402,28 @@ def pgf_fixed_number_format(precision: int, zerofill: bool) -> Dict[str, Optiona
     }
 
 
+# Axis options specific to each plot, they are not shared in styles
+INLINE_AXIS_OPTIONS: Set[str] = {
+    "xlabel",
+    "ylabel",
+    "xmin",
+    "xmax",
+    "ymin",
+    "ymax",
+    "legend entries",
+    "xtick",
+    "ytick",
+    "minor xtick",
+    "minor ytick",
+}
+
 #
 # Plot function
 #
 
 
+@deferrable
+@profiled("plot")
 def plot(
     _X: Any,
     _Y: Any,
@@ -387,6 +465,7 @@ def plot(
     mark_stroke_color: Union[None, Color, List[Union[None, Color]]] = None,
     mark_fill_opacity: Union[float, List[float]] = 1.0,
     mark_stroke_opacity: Union[float, List[float]] = 0.0,
+    ticks: Literal["pgfplots", "python"] = "pgfplots",
 ) -> None:
     """
     Generate LaTeX scatter or line plot from input data. The plot is created with ``pgfplots`` package (``tikzpicture`` + ``axis`` environment). Data can be in the form of a list or an array of numbers for single line. For plotting more data sets, input data should be in the form of list of lists as shown below:
@@ -523,7 +602,13 @@ def plot(
 
     :param mark_stroke_opacity: Mark stroke opacity (0.0-1.0), defaults to ``0.0``.
     :type mark_stroke_opacity: Union[float, List[float]], optional
+
+    :param ticks: Tick placement: ``"pgfplots"`` leaves it to ``pgfplots``, ``"python"`` computes major ticks with nice step (respecting the label ``precision``) and minor ticks from the ``grid`` code in Python and writes them as explicit ``xtick``/``ytick`` lists, missing limits are set to the outer major ticks. Exact number of minor ticks works also on logaritmic axis, which gets the 2, 3, ..., 9 multiples by default. Defaults to ``"pgfplots"``.
+    :type ticks: Literal[``pgfplots``, ``python``], optional
     """
+    profiler = active_profiler()
+    profiler_mark: float = time.perf_counter() if profiler is not None else 0.0
+
     X, x_lengths = process_data(_X, "X")
     Y, y_lengths = process_data(_Y, "Y")
     check_data_lengths(x_lengths, y_lengths)
@@ -534,20 +619,26 @@ def plot(
     # show_extra_x_ticks: bool = False
     # show_extra_y_ticks: bool = False
     if xlimits == "exact":
-        xmax, xmin = float("-inf"), float("inf")
-        for x in X:
-            xmax = max(xmax, max(x))  # pyright: ignore [reportGeneralTypeIssues]
-            xmin = min(xmin, min(x))  # pyright: ignore [reportGeneralTypeIssues]
-        xlimits = (xmin, xmax)
+        xlimits = series_limits(X)
         # show_extra_x_ticks = True
     if ylimits == "exact":
-        ymax, ymin = float("-inf"), float("inf")
-        for y in Y:
-            ymax = max(ymax, max(y))  # pyright: ignore [reportGeneralTypeIssues]
-            ymin = min(ymin, min(y))  # pyright: ignore [reportGeneralTypeIssues]
-        ylimits = (ymin, ymax)
+        ylimits = series_limits(Y)
         # show_extra_y_ticks = True
 
+    # Check the TeX memory budget, plots over the budget can be decimated
+    budget = gdm().budget
+    step = budget.decimation_step(sum(lengths))
+    if step > 1:
+        X = [decimate(x, step) for x in X]
+        Y = [decimate(y, step) for y in Y]
+        lengths = [math.ceil(length / step) for length in lengths]
+    estimate = FragmentEstimate("plot", points=sum(lengths))
+    budget.check(estimate)
+    gdm().estimates.append(estimate)
+
+    if profiler is not None:
+        profiler_mark = profiler.lap("validate", profiler_mark)
+
     if not isinstance(legend, list):
         legend = [legend]
     if not isinstance(mode, tuple):
@@ -636,12 +727,20 @@ def plot(
         if plot_options["draw"] == "none" or next_line == None:
             plot_options["draw opacity"] = 0.0
 
+        # Series with the same options share one style defined in the preamble
+        series_style = gdm().define_pgfplots_style(
+            "series", dict2str(plot_options, level=2)
+        )
         plots.append(
             Plot(
                 coordinates=zip(x_iter, y_iter),
-                options=NoEscape(dict2str(plot_options)),
+                options=NoEscape(dict2str({series_style: ""})),
             )
         )
+    if profiler is not None:
+        profiler_mark = profiler.lap("series", profiler_mark)
+        profiler.count("plot.series", len(plots))
+        profiler.count("plot.points", sum(lengths))
 
     #
     # General axis settings
@@ -737,6 +836,28 @@ def plot(
         # values manually.
         axis_options.update(decode_grid_style_code(grid.strip()))
 
+    if ticks == "python":
+        for i, axis, data_series, limits in [
+            (0, "x", X, xlimits),
+            (1, "y", Y, ylimits),
+        ]:
+            minor_num = axis_options.get(f"minor {axis} tick num")
+            tick_options = axis_tick_options(
+                axis,
+                mode[i],
+                data_series,
+                limits,  # pyright: ignore [reportGeneralTypeIssues]
+                # Without grid code the axis gets the default minor ticks like in pgfplots
+                -1 if minor_num is None else int(minor_num),
+                precision[i],
+            )
+            if f"minor {axis}tick" in tick_options:
+                # Explicit minor ticks replace the number of minor ticks
+                axis_options[f"minor {axis} tick num"] = None
+            axis_options.update(tick_options)
+    if profiler is not None:
+        profiler_mark = profiler.lap("axis", profiler_mark)
+
     #
     # Creation of LaTeX environments
     #
@@ -766,9 +887,21 @@ def plot(
                     NoEscape(caption)
                 )
 
+    # Options which repeat across plots are moved into a style defined in the preamble,
+    # labels, limits and legend entries specific to this plot stay inline.
+    axis_style_options: Dict[str, Any] = {
+        k: v for k, v in axis_options.items() if k not in INLINE_AXIS_OPTIONS
+    }
+    axis_style = gdm().define_pgfplots_style(
+        "axis", dict2str(axis_style_options, level=2)
+    )
+    inline_axis_options: Dict[str, Any] = {axis_style: ""}
+    inline_axis_options.update(
+        {k: v for k, v in axis_options.items() if k in INLINE_AXIS_OPTIONS}
+    )
     axis = Axis(
         data=plots,
-        options=NoEscape(dict2str(axis_options)),
+        options=NoEscape(dict2str(inline_axis_options)),
     )
     axis.packages.append(Command("usetikzlibrary", "plotmarks"))
 
@@ -806,3 +939,5 @@ def plot(
         )
 
     gdm().append(figure)
+    if profiler is not None:
+        profiler.lap("environments", profiler_mark)
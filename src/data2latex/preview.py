@@ -0,0 +1,730 @@
+import html
+import inspect
+import math
+import re
+from itertools import islice
+from numbers import Integral, Number
+from typing import Any, Dict, List, Optional, Tuple
+
+from .iter_protocols import DataFrameIterator, is_DataFrame, is_ndarray
+from .plot import (
+    check_data_lengths,
+    color2rgb,
+    create_cycle_iter,
+    decimate,
+    decode_grid_style_code,
+    handle_color,
+    legend_dir_to_pos,
+    line_symbol_to_style,
+    plot,
+    process_data,
+)
+from .table import Rule, decode_rule_style_code, table
+from .ticks import linear_ticks, log_ticks, series_limits
+
+# Approximate metrics of the 12pt Latin Modern font, all lengths are in points
+FONT_SIZE: float = 12.0
+# Digits are exactly half of the font size wide, average width of other characters is similar
+CHAR_WIDTH: float = 0.5 * FONT_SIZE
+BOLD_WIDTH_RATIO: float = 1.1
+# tabularray defaults: 6pt column separation, 2pt row separation
+CELL_PADDING_X: float = 6.0
+ROW_HEIGHT: float = 1.2 * FONT_SIZE + 2 * 2.0
+# Default size of pgfplots axis
+AXIS_WIDTH: float = 240.0
+AXIS_HEIGHT: float = 207.0
+# Previews of huge inputs show only a part of them
+PREVIEW_MAX_ROWS: int = 100
+# Points drawn per pixel of the axis width, more of them would not be visible
+PREVIEW_POINTS_PER_PIXEL: float = 2.0
+# Grid lines are thin and gray like the pgfplots default
+GRID_STYLE: str = ' stroke-opacity="0.25"'
+
+# Base colors of xcolor
+NAMED_COLOR_RGB: Dict[str, Tuple[int, int, int]] = {
+    "red": (255, 0, 0),
+    "green": (0, 255, 0),
+    "blue": (0, 0, 255),
+    "cyan": (0, 255, 255),
+    "magenta": (255, 0, 255),
+    "yellow": (255, 255, 0),
+    "black": (0, 0, 0),
+    "gray": (128, 128, 128),
+    "white": (255, 255, 255),
+    "darkgray": (64, 64, 64),
+    "lightgray": (191, 191, 191),
+    "brown": (191, 128, 64),
+    "lime": (191, 255, 0),
+    "olive": (128, 128, 0),
+    "orange": (255, 128, 0),
+    "pink": (255, 191, 191),
+    "purple": (191, 0, 64),
+    "teal": (0, 128, 128),
+    "violet": (128, 0, 128),
+}
+
+# TikZ dash patterns (on, off, ...) in points
+LINE_DASH_ARRAYS: Dict[str, Optional[str]] = {
+    "solid": None,
+    "loosely dashed": "3,6",
+    "dashed": "3,3",
+    "densely dashed": "3,2",
+    "loosely dotted": "0.4,4",
+    "dotted": "0.4,2",
+    "densely dotted": "0.4,1",
+    "loosely dashdotted": "3,4,0.4,4",
+    "dashdotted": "3,2,0.4,2",
+    "densely dashdotted": "3,1,0.4,1",
+    "loosely dashdotdotted": "3,4,0.4,4,0.4,4",
+    "dashdotdotted": "3,2,0.4,2,0.4,2",
+    "densely dashdotdotted": "3,1,0.4,1,0.4,1",
+}
+
+# Lengths in TeX units converted into points
+LENGTH_PATTERN = re.compile(r"\s*(-?[\d.]+)\s*(pt|bp|mm|cm|in|em|ex|px)?\s*$")
+UNIT_POINTS: Dict[str, float] = {
+    "pt": 1.0,
+    "bp": 72.27 / 72,
+    "mm": 72.27 / 25.4,
+    "cm": 72.27 / 2.54,
+    "in": 72.27,
+    "em": FONT_SIZE,
+    "ex": FONT_SIZE / 2,
+    "px": 72.27 / 96,
+}
+
+
+class SVGPreview:
+    """
+    Approximate rendering of a table or plot, which is displayed by Jupyter notebooks.
+
+    :param svg: SVG document
+    :type svg: str
+    """
+
+    def __init__(self, svg: str) -> None:
+        self.svg = svg
+
+    def __str__(self) -> str:
+        return self.svg
+
+    def _repr_svg_(self) -> str:
+        return self.svg
+
+    def save(self, filepath: str) -> None:
+        """
+        Save the preview into .svg file.
+
+        :param filepath: File path with extension
+        :type filepath: str
+        """
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write(self.svg)
+
+
+#
+# Helper functions
+#
+
+
+def bind_arguments(function: Any, args: Any, kwargs: Any) -> Dict[str, Any]:
+    """
+    Bind the arguments in the same way as the function does and fill in the defaults.
+    """
+    bound = inspect.signature(function).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def parse_length(length: Optional[str], default: float) -> float:
+    if length is None:
+        return default
+    match = LENGTH_PATTERN.match(str(length))
+    if match is None:
+        return default
+    return float(match.group(1)) * UNIT_POINTS[match.group(2) or "pt"]
+
+
+def text_width(text: str, bold: bool = False) -> float:
+    return len(text) * CHAR_WIDTH * (BOLD_WIDTH_RATIO if bold else 1.0)
+
+
+def svg_color(name: str) -> str:
+    """
+    Convert color name returned by :func:`handle_color` into SVG color.
+    """
+    if name == "none":
+        return "none"
+    rgb = NAMED_COLOR_RGB.get(name)
+    if rgb is None:
+        rgb = color2rgb(name)
+    return "#{:02x}{:02x}{:02x}".format(*rgb)
+
+
+def rgb2hex(rgb: Tuple[int, int, int]) -> str:
+    return "#{:02x}{:02x}{:02x}".format(*rgb)
+
+
+def svg_text(
+    x: float,
+    y: float,
+    text: str,
+    anchor: str = "middle",
+    bold: bool = False,
+    size: float = FONT_SIZE,
+    rotate: bool = False,
+) -> str:
+    attributes = f'x="{x:.2f}" y="{y:.2f}" text-anchor="{anchor}" font-size="{size:g}"'
+    if bold:
+        attributes += ' font-weight="bold"'
+    if rotate:
+        attributes += f' transform="rotate(-90 {x:.2f} {y:.2f})"'
+    return f"<text {attributes}>{html.escape(text)}</text>"
+
+
+def svg_line(x1: float, y1: float, x2: float, y2: float, style: str = "") -> str:
+    return (
+        f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" '
+        f'stroke="black" stroke-width="0.4"{style}/>'
+    )
+
+
+def svg_document(width: float, height: float, body: List[str]) -> str:
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.2f}pt" height="{height:.2f}pt" '
+        f'viewBox="0 0 {width:.2f} {height:.2f}" font-family="Latin Modern Roman, serif">\n'
+        + "\n".join(body)
+        + "\n</svg>\n"
+    )
+
+
+#
+# Table preview
+#
+
+
+def format_preview_cell(
+    item: Any,
+    float_format: str,
+    str_convertor: Any,
+    str_try_number: bool,
+) -> Tuple[str, bool]:
+    """
+    Format the cell in the same way as :func:`table` without LaTeX escaping and ``str_format``.
+
+    :return: Text of the cell and ``True`` if it is a number
+    """
+    if isinstance(item, bool):
+        return (str(item), False)
+    if isinstance(item, Integral):
+        return (str(item), True)
+    if isinstance(item, Number):
+        return (float_format.format(item), True)
+    text = item if isinstance(item, str) else str_convertor(item)
+    if str_try_number:
+        try:
+            return (str(int(text)), True)
+        except ValueError:
+            try:
+                return (float_format.format(float(text)), True)
+            except ValueError:
+                pass
+    return (text, False)
+
+
+def table_rows(arguments: Dict[str, Any]) -> Tuple[List[List[Any]], bool]:
+    """
+    Get the first :data:`PREVIEW_MAX_ROWS` rows of the table data.
+
+    :return: Rows and ``True`` if some rows were left out
+    """
+    data = arguments["data"]
+    if is_DataFrame(data):
+        data = DataFrameIterator(
+            data,
+            include_column_names=arguments["dataframe_column_names"],
+            include_row_names=arguments["dataframe_row_names"],
+        )
+    elif is_ndarray(data) and data.ndim <= 1:
+        raise ValueError("Input data must have at least two dimensions.")
+    rows = [list(row) for row in islice(data, PREVIEW_MAX_ROWS + 1)]
+    return (rows[:PREVIEW_MAX_ROWS], len(rows) > PREVIEW_MAX_ROWS)
+
+
+def preview_table(*args: Any, **kwargs: Any) -> SVGPreview:
+    """
+    Quickly render approximate SVG preview of the table without LaTeX. Takes the same arguments
+    as :func:`data2latex.table`, the rules, header settings, alignment and number formatting are respected.
+    Only the first :data:`PREVIEW_MAX_ROWS` rows are shown.
+
+    :return: SVG preview
+    :rtype: SVGPreview
+    """
+    arguments = bind_arguments(table, args, kwargs)
+    rows, truncated = table_rows(arguments)
+    column_count = max((len(row) for row in rows), default=0)
+    use_siunitx: bool = arguments["use_siunitx"]
+
+    # Format the cells and measure the numbers for the decimal alignment
+    cells: List[List[Tuple[str, bool]]] = []
+    max_pre: List[int] = [0] * column_count
+    max_post: List[int] = [0] * column_count
+    for row in rows:
+        formatted = [
+            format_preview_cell(
+                item,
+                arguments["float_format"],
+                arguments["str_convertor"],
+                arguments["str_try_number"],
+            )
+            for item in row
+        ]
+        for i, (text, number) in enumerate(formatted):
+            if number:
+                pre, _, post = text.partition(".")
+                max_pre[i] = max(max_pre[i], len(pre))
+                max_post[i] = max(max_post[i], len(post))
+        cells.append(formatted)
+
+    def is_bold(r: int, c: int) -> bool:
+        return (r == 0 and arguments["top_head_bold"]) or (
+            c == 0 and arguments["left_head_bold"]
+        )
+
+    def cell_align(r: int, c: int) -> str:
+        align = arguments["col_align"]
+        if c == 0 and arguments["left_head_col_align"] is not None:
+            align = arguments["left_head_col_align"]
+        if r == 0 and arguments["top_head_col_align"] is not None:
+            align = arguments["top_head_col_align"]
+        return align
+
+    number_widths = [
+        (pre + post + (1 if post > 0 else 0)) * CHAR_WIDTH
+        for pre, post in zip(max_pre, max_post)
+    ]
+    widths: List[float] = [0.0] * column_count
+    for r, row_cells in enumerate(cells):
+        for c, (text, number) in enumerate(row_cells):
+            if number and use_siunitx:
+                width = number_widths[c]
+            else:
+                width = text_width(text, is_bold(r, c))
+            widths[c] = max(widths[c], width + 2 * CELL_PADDING_X)
+
+    caption: Optional[str] = arguments["caption"]
+    caption_height = ROW_HEIGHT if caption is not None else 0.0
+    top = caption_height if arguments["caption_pos"] == "above" else 0.0
+    row_count = len(cells) + (1 if truncated else 0)
+    table_width = sum(widths)
+    table_height = row_count * ROW_HEIGHT
+    body: List[str] = []
+
+    xs: List[float] = [0.0]
+    for width in widths:
+        xs.append(xs[-1] + width)
+    for r, row_cells in enumerate(cells):
+        baseline = top + r * ROW_HEIGHT + ROW_HEIGHT / 2 + 0.35 * FONT_SIZE
+        for c, (text, number) in enumerate(row_cells):
+            bold = is_bold(r, c)
+            align = cell_align(r, c)
+            if number and use_siunitx:
+                # Numbers are aligned at the decimal point like siunitx does
+                left = xs[c] + CELL_PADDING_X
+                inner = widths[c] - 2 * CELL_PADDING_X
+                offset = {"l": 0.0, "r": inner - number_widths[c]}.get(
+                    align, (inner - number_widths[c]) / 2
+                )
+                point = left + offset + max_pre[c] * CHAR_WIDTH
+                pre, dot, post = text.partition(".")
+                body.append(svg_text(point, baseline, pre, "end", bold))
+                if dot:
+                    body.append(svg_text(point, baseline, "." + post, "start", bold))
+                continue
+            if align == "l":
+                x, anchor = xs[c] + CELL_PADDING_X, "start"
+            elif align == "r":
+                x, anchor = xs[c + 1] - CELL_PADDING_X, "end"
+            else:
+                x, anchor = (xs[c] + xs[c + 1]) / 2, "middle"
+            body.append(svg_text(x, baseline, text, anchor, bold))
+    if truncated:
+        baseline = top + len(cells) * ROW_HEIGHT + ROW_HEIGHT / 2 + 0.35 * FONT_SIZE
+        for c in range(column_count):
+            body.append(svg_text((xs[c] + xs[c + 1]) / 2, baseline, "⋮"))
+
+    # Rules at the boundaries: before the header, after the header, inside the body, after the body
+    rules = decode_rule_style_code(arguments["rules"])
+
+    def boundary_kind(index: int, count: int) -> Optional[int]:
+        if index == 0:
+            return Rule.BEFORE_HEADER
+        if index == 1:
+            return Rule.AFTER_HEADER
+        if index == count:
+            return Rule.AFTER_BODY
+        return Rule.INNER_BODY
+
+    for c in range(column_count + 1):
+        if boundary_kind(c, column_count) in rules[Rule.COL]:
+            body.append(svg_line(xs[c], top, xs[c], top + table_height))
+    for r in range(row_count + 1):
+        if boundary_kind(r, row_count) in rules[Rule.ROW]:
+            y = top + r * ROW_HEIGHT
+            body.append(svg_line(0.0, y, table_width, y))
+
+    if caption is not None:
+        y = (
+            0.0 if arguments["caption_pos"] == "above" else table_height
+        ) + ROW_HEIGHT / 2
+        body.append(
+            svg_text(table_width / 2, y + 0.35 * FONT_SIZE, f"Table: {caption}")
+        )
+    return SVGPreview(
+        svg_document(
+            max(table_width, text_width(f"Table: {caption}") if caption else 0.0),
+            table_height + caption_height,
+            body,
+        )
+    )
+
+
+#
+# Plot preview
+#
+
+
+def format_tick(value: float, log: bool, precision: int, zerofill: bool) -> str:
+    if log:
+        return f"10^{round(math.log10(value))}"
+    text = f"{value:.{precision}f}"
+    if not zerofill and "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def axis_ticks(
+    vmin: float, vmax: float, log: bool, minor: int, precision: int
+) -> Tuple[List[float], List[float]]:
+    if log:
+        return log_ticks(vmin, vmax, minor)
+    return linear_ticks(vmin, vmax, minor, precision)
+
+
+def mark_shape(
+    mark: str, x: float, y: float, size: float, fill: str, stroke: str
+) -> str:
+    """
+    Draw one plot mark, marks without SVG counterpart are drawn as circles.
+    """
+    filled = mark in ["*", "ball"] or mark.endswith("*")
+    fill = fill if filled else "none"
+    paint = f'fill="{fill}" stroke="{stroke}" stroke-width="0.4"'
+    if mark == "x":
+        return (
+            f'<path d="M{x - size:.2f},{y - size:.2f}L{x + size:.2f},{y + size:.2f}'
+            f'M{x - size:.2f},{y + size:.2f}L{x + size:.2f},{y - size:.2f}" stroke="{stroke}"/>'
+        )
+    if mark == "+":
+        return (
+            f'<path d="M{x - size:.2f},{y:.2f}H{x + size:.2f}'
+            f'M{x:.2f},{y - size:.2f}V{y + size:.2f}" stroke="{stroke}"/>'
+        )
+    if mark == "-":
+        return f'<path d="M{x - size:.2f},{y:.2f}H{x + size:.2f}" stroke="{stroke}"/>'
+    if mark == "|":
+        return f'<path d="M{x:.2f},{y - size:.2f}V{y + size:.2f}" stroke="{stroke}"/>'
+    if mark.startswith("square"):
+        return f'<rect x="{x - size:.2f}" y="{y - size:.2f}" width="{2 * size:.2f}" height="{2 * size:.2f}" {paint}/>'
+    if mark.startswith("triangle"):
+        return (
+            f'<path d="M{x:.2f},{y - size:.2f}L{x + size:.2f},{y + size / 2:.2f}'
+            f'L{x - size:.2f},{y + size / 2:.2f}Z" {paint}/>'
+        )
+    if mark.startswith("diamond"):
+        return (
+            f'<path d="M{x:.2f},{y - size:.2f}L{x + size * 0.75:.2f},{y:.2f}'
+            f'L{x:.2f},{y + size:.2f}L{x - size * 0.75:.2f},{y:.2f}Z" {paint}/>'
+        )
+    return f'<circle cx="{x:.2f}" cy="{y:.2f}" r="{size:.2f}" {paint}/>'
+
+
+def preview_plot(*args: Any, **kwargs: Any) -> SVGPreview:
+    """
+    Quickly render approximate SVG preview of the plot without LaTeX. Takes the same arguments
+    as :func:`data2latex.plot`, the series styles, colors, axis modes, limits, grid and legend are respected.
+    Ticks are placed by the same algorithm as ``ticks="python"`` of :func:`data2latex.plot`.
+    Series with more than :data:`PREVIEW_POINTS_PER_PIXEL` points per pixel of the axis width
+    are thinned out before drawing.
+
+    :return: SVG preview
+    :rtype: SVGPreview
+    """
+    arguments = bind_arguments(plot, args, kwargs)
+    X, x_lengths = process_data(arguments["_X"], "X")
+    Y, y_lengths = process_data(arguments["_Y"], "Y")
+    check_data_lengths(x_lengths, y_lengths)
+    width = parse_length(arguments["width"], AXIS_WIDTH)
+    height = parse_length(arguments["height"], AXIS_HEIGHT)
+    max_points = max(math.ceil(width * PREVIEW_POINTS_PER_PIXEL), 1)
+    series: List[Tuple[List[float], List[float]]] = []
+    for x, y, length in zip(X, Y, x_lengths):
+        step = max(math.ceil(length / max_points), 1)
+        series.append(
+            (
+                [float(v) for v in decimate(x, step)],
+                [float(v) for v in decimate(y, step)],
+            )
+        )
+
+    mode = arguments["mode"]
+    if not isinstance(mode, tuple):
+        mode = (mode, mode)
+    precision = arguments["precision"]
+    if not isinstance(precision, tuple):
+        precision = (precision, precision)
+    zerofill = arguments["zerofill"]
+    if not isinstance(zerofill, tuple):
+        zerofill = (zerofill, zerofill)
+    log = (mode[0] == "log", mode[1] == "log")
+
+    # Axis ranges, limits and ticks
+    grid = (
+        decode_grid_style_code(arguments["grid"].strip()) if arguments["grid"] else {}
+    )
+    ranges: List[Tuple[float, float]] = []
+    all_ticks: List[Tuple[List[float], List[float]]] = []
+    for i, axis in enumerate(["x", "y"]):
+        vmin, vmax = series_limits([s[i] for s in series], positive=log[i])
+        limits = arguments[f"{axis}limits"]
+        if isinstance(limits, tuple):
+            vmin = vmin if limits[0] is None else float(limits[0])
+            vmax = vmax if limits[1] is None else float(limits[1])
+        if vmin > vmax:
+            vmin, vmax = (1.0, 10.0) if log[i] else (0.0, 1.0)
+        minor = grid.get(f"minor {axis} tick num")
+        ticks = axis_ticks(
+            vmin, vmax, log[i], 0 if minor is None else int(minor), precision[i]
+        )
+        if vmin == vmax and ticks[0]:
+            vmin, vmax = ticks[0][0], ticks[0][-1]
+        ranges.append((vmin, vmax))
+        all_ticks.append(ticks)
+
+    def scale(value: float, i: int) -> float:
+        vmin, vmax = ranges[i]
+        if log[i]:
+            value, vmin, vmax = math.log10(value), math.log10(vmin), math.log10(vmax)
+        return 0.5 if vmax == vmin else (value - vmin) / (vmax - vmin)
+
+    if arguments["equal_axis"] and not any(log):
+        x_span = ranges[0][1] - ranges[0][0]
+        y_span = ranges[1][1] - ranges[1][0]
+        if x_span > 0 and y_span > 0:
+            if x_span / width > y_span / height:
+                height = width * y_span / x_span
+            else:
+                width = height * x_span / y_span
+
+    margin_left = (
+        max(
+            (
+                text_width(format_tick(t, log[1], precision[1], zerofill[1]))
+                for t in all_ticks[1][0]
+            ),
+            default=0.0,
+        )
+        + 8.0
+        + (FONT_SIZE * 1.5 if arguments["ylabel"] else 0.0)
+    )
+    margin_top = FONT_SIZE
+    margin_bottom = FONT_SIZE * 2 + (FONT_SIZE * 1.5 if arguments["xlabel"] else 0.0)
+    caption: Optional[str] = arguments["caption"]
+    caption_height = FONT_SIZE * 2 if caption is not None else 0.0
+    if arguments["caption_pos"] == "above":
+        margin_top += caption_height
+    body: List[str] = []
+
+    def px(value: float) -> float:
+        return margin_left + scale(value, 0) * width
+
+    def py(value: float) -> float:
+        return margin_top + (1 - scale(value, 1)) * height
+
+    def visible(value: float, i: int) -> bool:
+        vmin, vmax = ranges[i]
+        return vmin <= value <= vmax and (not log[i] or value > 0)
+
+    # Grid and ticks
+    for i, axis in enumerate(["x", "y"]):
+        major, minor_ticks = all_ticks[i]
+        for ticks, kind in [(minor_ticks, "minor"), (major, "major")]:
+            show_grid = grid.get(f"{axis}{kind}grids") == "true"
+            for tick in ticks:
+                if not visible(tick, i):
+                    continue
+                if i == 0:
+                    x = px(tick)
+                    if show_grid:
+                        body.append(
+                            svg_line(x, margin_top, x, margin_top + height, GRID_STYLE)
+                        )
+                    if kind == "major":
+                        body.append(
+                            svg_text(
+                                x,
+                                margin_top + height + FONT_SIZE * 1.2,
+                                format_tick(tick, log[0], precision[0], zerofill[0]),
+                            )
+                        )
+                else:
+                    y = py(tick)
+                    if show_grid:
+                        body.append(
+                            svg_line(margin_left, y, margin_left + width, y, GRID_STYLE)
+                        )
+                    if kind == "major":
+                        body.append(
+                            svg_text(
+                                margin_left - 4.0,
+                                y + 0.35 * FONT_SIZE,
+                                format_tick(tick, log[1], precision[1], zerofill[1]),
+                                "end",
+                            )
+                        )
+
+    # Series
+    line_iter = create_cycle_iter(arguments["line"])
+    line_width_iter = create_cycle_iter(arguments["line_width"])
+    line_color_iter = create_cycle_iter(handle_color(arguments["line_color"], rgb2hex))
+    line_opacity_iter = create_cycle_iter(arguments["line_opacity"])
+    mark_iter = create_cycle_iter(arguments["mark"])
+    mark_size_iter = create_cycle_iter(arguments["mark_size"])
+    mark_fill_color_iter = create_cycle_iter(
+        handle_color(arguments["mark_fill_color"], rgb2hex)
+    )
+    mark_stroke_color_iter = create_cycle_iter(
+        handle_color(arguments["mark_stroke_color"], rgb2hex)
+    )
+    mark_fill_opacity_iter = create_cycle_iter(arguments["mark_fill_opacity"])
+    mark_stroke_opacity_iter = create_cycle_iter(arguments["mark_stroke_opacity"])
+    legend_samples: List[str] = []
+    for xs, ys in series:
+        if len(xs) == 0:
+            continue
+        line = next(line_iter)
+        line = line_symbol_to_style.get(line, line)
+        line_width = parse_length(next(line_width_iter), 0.75)
+        line_color = svg_color(next(line_color_iter))
+        line_opacity = next(line_opacity_iter)
+        mark = next(mark_iter)
+        mark_size = parse_length(next(mark_size_iter), 2.0)
+        mark_fill = svg_color(next(mark_fill_color_iter))
+        mark_stroke = svg_color(next(mark_stroke_color_iter))
+        mark_fill_opacity = next(mark_fill_opacity_iter)
+        mark_stroke_opacity = next(mark_stroke_opacity_iter)
+        points = [
+            (px(x), py(y)) for x, y in zip(xs, ys) if visible(x, 0) and visible(y, 1)
+        ]
+        sample: List[str] = []
+        if line is not None and line_color != "none":
+            dash = LINE_DASH_ARRAYS.get(line)
+            line_style = (
+                f'fill="none" stroke="{line_color}" stroke-opacity="{line_opacity}" '
+                f'stroke-width="{line_width:g}" stroke-linejoin="round" stroke-linecap="round"'
+                + (f' stroke-dasharray="{dash}"' if dash else "")
+            )
+            body.append(
+                '<polyline points="'
+                + " ".join(f"{x:.2f},{y:.2f}" for x, y in points)
+                + f'" {line_style}/>'
+            )
+            sample.append(f'<path d="M0,0H20" {line_style}/>')
+        if mark is not None:
+            mark_group = (
+                f'<g fill-opacity="{mark_fill_opacity}" '
+                f'stroke-opacity="{mark_stroke_opacity}">'
+            )
+            body.append(mark_group)
+            body.extend(
+                mark_shape(mark, x, y, mark_size, mark_fill, mark_stroke)
+                for x, y in points
+            )
+            body.append("</g>")
+            sample.append(
+                mark_group
+                + mark_shape(mark, 10, 0, mark_size, mark_fill, mark_stroke)
+                + "</g>"
+            )
+        legend_samples.append("".join(sample))
+
+    # Axis frame and labels
+    body.append(
+        f'<rect x="{margin_left:.2f}" y="{margin_top:.2f}" width="{width:.2f}" '
+        f'height="{height:.2f}" fill="none" stroke="black" stroke-width="0.4"/>'
+    )
+    if arguments["xlabel"]:
+        body.append(
+            svg_text(
+                margin_left + width / 2,
+                margin_top + height + FONT_SIZE * 2.8,
+                arguments["xlabel"],
+            )
+        )
+    if arguments["ylabel"]:
+        body.append(
+            svg_text(
+                FONT_SIZE,
+                margin_top + height / 2,
+                arguments["ylabel"],
+                rotate=True,
+            )
+        )
+
+    # Legend
+    legend = arguments["legend"]
+    if not isinstance(legend, list):
+        legend = [legend]
+    entries = [
+        (sample, text)
+        for sample, text in zip(legend_samples, legend)
+        if text is not None
+    ]
+    total_width = margin_left + width + FONT_SIZE
+    if entries:
+        legend_width = 34.0 + max(text_width(str(t)) for _, t in entries)
+        legend_height = len(entries) * ROW_HEIGHT + 4.0
+        position = legend_dir_to_pos.get(arguments["legend_pos"], "north east")
+        if position.startswith("outer"):
+            lx = margin_left + width + 4.0
+            total_width += legend_width + 4.0
+        elif position.endswith("west"):
+            lx = margin_left + 4.0
+        else:
+            lx = margin_left + width - legend_width - 4.0
+        if position.startswith("south"):
+            ly = margin_top + height - legend_height - 4.0
+        else:
+            ly = margin_top + 4.0
+        body.append(
+            f'<rect x="{lx:.2f}" y="{ly:.2f}" width="{legend_width:.2f}" height="{legend_height:.2f}" '
+            'fill="white" stroke="black" stroke-width="0.4"/>'
+        )
+        for j, (sample, text) in enumerate(entries):
+            y = ly + 2.0 + (j + 0.5) * ROW_HEIGHT
+            body.append(
+                f'<g transform="translate({lx + 4.0:.2f},{y:.2f})">{sample}</g>'
+            )
+            body.append(svg_text(lx + 30.0, y + 0.35 * FONT_SIZE, str(text), "start"))
+
+    total_height = margin_top + height + margin_bottom
+    if caption is not None:
+        y = (
+            FONT_SIZE
+            if arguments["caption_pos"] == "above"
+            else total_height + FONT_SIZE * 0.5
+        )
+        body.append(svg_text(total_width / 2, y, f"Figure: {caption}"))
+        if arguments["caption_pos"] != "above":
+            total_height += caption_height
+    return SVGPreview(svg_document(total_width, total_height, body))
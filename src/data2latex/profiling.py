@@ -0,0 +1,202 @@
+import inspect
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class PhaseStats:
+    """
+    Timing of one phase and of its nested phases.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls: int = 0
+        self.total_time: float = 0.0
+        self.children: Dict[str, "PhaseStats"] = {}
+
+    def child(self, name: str) -> "PhaseStats":
+        stats = self.children.get(name)
+        if stats is None:
+            stats = self.children[name] = PhaseStats(name)
+        return stats
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "total_time": self.total_time,
+            "children": {k: v.to_dict() for k, v in self.children.items()},
+        }
+
+
+class _Phase:
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start: float = 0.0
+
+    def __enter__(self) -> "_Phase":
+        stack = self.profiler.stack
+        stack.append(stack[-1].child(self.name))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        stats = self.profiler.stack.pop()
+        stats.calls += 1
+        stats.total_time += time.perf_counter() - self.start
+
+
+class _NoPhase:
+    def __enter__(self) -> "_NoPhase":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+
+_no_phase = _NoPhase()
+
+
+class Profiler:
+    """
+    Collector of nested phase timings and counters of :func:`data2latex.table`,
+    :func:`data2latex.plot` and :func:`data2latex.finish`. Use :func:`profile` to activate it.
+    """
+
+    def __init__(self) -> None:
+        self.root = PhaseStats("root")
+        self.stack: List[PhaseStats] = [self.root]
+        self.counters: Dict[str, int] = {}
+
+    def phase(self, name: str) -> _Phase:
+        """
+        Context manager measuring a phase nested in the currently running phase.
+        """
+        return _Phase(self, name)
+
+    def add_time(
+        self, name: str, seconds: float, calls: int = 1, parent: Optional[str] = None
+    ) -> None:
+        """
+        Add time measured elsewhere as a phase nested in the currently running phase
+        or in its already recorded child phase ``parent``.
+        """
+        node = self.stack[-1]
+        if parent is not None:
+            node = node.child(parent)
+        stats = node.child(name)
+        stats.calls += calls
+        stats.total_time += seconds
+
+    def lap(self, name: str, since: float) -> float:
+        """
+        Add the time elapsed from ``since`` as a phase nested in the currently running phase.
+        Used for consecutive sections of one function.
+
+        :return: Current time, which is the start of the next lap
+        :rtype: float
+        """
+        now = time.perf_counter()
+        self.add_time(name, now - since)
+        return now
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "phases": {k: v.to_dict() for k, v in self.root.children.items()},
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self, **kwargs: Any) -> str:
+        """
+        Dump the collected statistics as JSON, keyword arguments are passed into :func:`json.dumps`.
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+_active: Optional[Profiler] = None
+
+
+def active_profiler() -> Optional[Profiler]:
+    """
+    Get the active profiler or ``None`` if profiling is disabled.
+    """
+    return _active
+
+
+def phase(name: str) -> Any:
+    """
+    Measure a phase if profiling is enabled, otherwise return shared context which does nothing.
+    """
+    if _active is None:
+        return _no_phase
+    return _active.phase(name)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """
+    Decorator measuring every call of the function as a phase. Coroutine functions are measured until they return.
+    """
+
+    def decorator(function: F) -> F:
+        if inspect.iscoroutinefunction(function):
+
+            @wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _active is None:
+                    return await function(*args, **kwargs)
+                with _active.phase(name):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper  # pyright: ignore [reportGeneralTypeIssues]
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _active is None:
+                return function(*args, **kwargs)
+            with _active.phase(name):
+                return function(*args, **kwargs)
+
+        return wrapper  # pyright: ignore [reportGeneralTypeIssues]
+
+    return decorator
+
+
+@contextmanager
+def profile(
+    callback: Optional[Callable[[Profiler], None]] = None
+) -> Iterator[Profiler]:
+    """
+    Collect timings of the phases (input validation, cell formatting, ``siunitx`` measurement, option building, LaTeX generation, compilation...) and counters (formatted cells, escaped cells, emitted points...) of every :func:`table`, :func:`plot` and :func:`finish` call inside the ``with`` block. Profiling is disabled outside of the block. Not intended for concurrent builds.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import data2latex as dtol
+        with dtol.profile() as stats:
+            dtol.table([[1, 2], [3, 4]])
+            dtol.finish()
+        print(stats.to_json(indent=2))
+
+    :param callback: Function which receives the profiler at the end of the block, defaults to ``None``.
+    :type callback: Optional[Callable[[Profiler], None]], optional
+    :return: Profiler collecting the statistics.
+    :rtype: Iterator[Profiler]
+    """
+    global _active
+    previous = _active
+    profiler = Profiler()
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+        if callback is not None:
+            callback(profiler)
@@ -0,0 +1,198 @@
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Literal, Optional, Tuple, TypeAlias
+
+from .compiler import max_concurrent_compilations
+from .manifest import text_hash
+from .report import BuildReport, FragmentStats
+
+# Image formats supported by pdftoppm
+ImageFormat: TypeAlias = Literal["png", "jpeg"]
+
+IMAGE_EXTENSIONS: Dict[str, str] = {"png": "png", "jpeg": "jpg"}
+
+# Fragment kinds which get their own page in multi page standalone mode,
+# same as the environments passed to the standalone class
+PAGE_KINDS: List[str] = ["table", "figure"]
+
+# Extension of the file in the output directory with hashes of the rasterized pages
+PAGES_MANIFEST_EXTENSION: str = ".pages.json"
+
+# Characters of labels which are replaced in file names, e.g. "plot:results" -> "plot-results"
+UNSAFE_NAME_PATTERN = re.compile(r"[^\w.-]+")
+
+
+def rasterize_page(
+    pdf_path: str,
+    page: int,
+    image_path: str,
+    dpi: int = 150,
+    image_format: ImageFormat = "png",
+) -> None:
+    """
+    Rasterize one page of the PDF with ``pdftoppm`` from Poppler. The image is written
+    next to the destination first and then renamed, so it is never seen half written.
+
+    :param pdf_path: Path to the PDF file
+    :type pdf_path: str
+    :param page: Page number starting from 1
+    :type page: int
+    :param image_path: Path to the image with extension
+    :type image_path: str
+    :param dpi: Resolution of the image, defaults to ``150``
+    :type dpi: int, optional
+    :param image_format: Image format, defaults to ``"png"``
+    :type image_format: ImageFormat, optional
+    :raises RuntimeError: ``pdftoppm`` is not installed.
+    :raises subprocess.CalledProcessError: ``pdftoppm`` failed.
+    """
+    # pdftoppm appends the extension to the output prefix
+    prefix = f"{image_path}.{os.getpid()}.tmp"
+    temporary = f"{prefix}.{IMAGE_EXTENSIONS[image_format]}"
+    command: List[str] = [
+        "pdftoppm",
+        f"-{image_format}",
+        "-r",
+        str(dpi),
+        "-f",
+        str(page),
+        "-l",
+        str(page),
+        "-singlefile",
+        pdf_path,
+        prefix,
+    ]
+    try:
+        subprocess.run(
+            command, check=True, capture_output=True, stdin=subprocess.DEVNULL
+        )
+    except FileNotFoundError:
+        raise RuntimeError(
+            "Program 'pdftoppm' was not found, install Poppler utilities (e.g. package poppler-utils)."
+        ) from None
+    try:
+        os.replace(temporary, image_path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def page_image_name(basename: str, page: int, fragment: FragmentStats) -> str:
+    if fragment.label is None:
+        return f"{basename}-page{page}"
+    return UNSAFE_NAME_PATTERN.sub("-", fragment.label)
+
+
+def load_pages_manifest(path: str) -> Dict[str, str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return dict(json.load(f))
+    except (OSError, ValueError, TypeError):
+        return {}
+
+
+def rasterize_pages(
+    report: BuildReport,
+    output_directory: str,
+    dpi: int = 150,
+    image_format: ImageFormat = "png",
+    max_workers: Optional[int] = None,
+    force: bool = False,
+) -> List[str]:
+    """
+    Rasterize every table and plot of the document compiled with :func:`use_multi_page_standalone`
+    into its own image, e.g. for thumbnails. The images are named after the labels of the tables and plots
+    (``plot:results`` gives ``plot-results.png``), pages without label are named after the document
+    and the page number. The pages are rasterized in parallel with ``pdftoppm``. Hashes of the LaTeX source
+    of the pages are saved in the output directory and pages whose source has not changed since the last
+    call are not rasterized again. The hash of a page covers the preamble without colors, styles and table
+    environments defined for the other pages, so adding or changing one plot does not rasterize all pages.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import data2latex as dtol
+        dtol.use_multi_page_standalone()
+        dtol.plot(X, Y, label="results")
+        report = dtol.finish("figures")
+        dtol.rasterize_pages(report, "thumbnails")
+
+    :param report: Build report returned by :func:`finish`
+    :type report: BuildReport
+    :param output_directory: Directory for the images, created if needed
+    :type output_directory: str
+    :param dpi: Resolution of the images, defaults to ``150``
+    :type dpi: int, optional
+    :param image_format: Image format, defaults to ``"png"``
+    :type image_format: ImageFormat, optional
+    :param max_workers: Maximum number of pages rasterized at the same time, ``None`` for the limit of concurrent compilations, defaults to ``None``
+    :type max_workers: Optional[int], optional
+    :param force: ``True`` for rasterizing also the unchanged pages, defaults to ``False``
+    :type force: bool, optional
+    :return: Paths to the images of all pages in page order
+    :rtype: List[str]
+    :raises RuntimeError: The document is not in multi page standalone mode or ``pdftoppm`` is not installed.
+    :raises FileNotFoundError: The document was not compiled.
+    """
+    from .dm import gdm
+
+    if not gdm().using_standalone_multi:
+        raise RuntimeError(
+            "Only documents with one table or plot per page can be rasterized, call use_multi_page_standalone() first."
+        )
+    pdf_path = report.filepath + ".pdf"
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(
+            f"The document was not compiled, '{pdf_path}' does not exist."
+        )
+    os.makedirs(output_directory, exist_ok=True)
+    basename = os.path.basename(report.filepath)
+    manifest_path = os.path.join(output_directory, basename + PAGES_MANIFEST_EXTENSION)
+    old_hashes = {} if force else load_pages_manifest(manifest_path)
+    extension = IMAGE_EXTENSIONS[image_format]
+
+    hashes: Dict[str, str] = {}
+    paths: List[str] = []
+    outdated: List[Tuple[int, str]] = []
+    pages = [f for f in report.fragments if f.kind in PAGE_KINDS]
+    for page, fragment in enumerate(pages, 1):
+        path = os.path.join(
+            output_directory, f"{page_image_name(basename, page, fragment)}.{extension}"
+        )
+        # Packages and the definitions used by the page are a part of the hash,
+        # definitions used only by other pages are not
+        page_hash = text_hash(
+            f"{report.head_base_hash}:{fragment.definitions}:{fragment.digest}:{dpi}:{image_format}"
+        )
+        hashes[os.path.basename(path)] = page_hash
+        paths.append(path)
+        if (
+            fragment.digest is None
+            or fragment.definitions is None
+            or old_hashes.get(os.path.basename(path)) != page_hash
+            or not os.path.exists(path)
+        ):
+            outdated.append((page, path))
+
+    workers = max_workers or max_concurrent_compilations()
+    if len(outdated) == 1 or workers == 1:
+        for page, path in outdated:
+            rasterize_page(pdf_path, page, path, dpi, image_format)
+    elif outdated:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(rasterize_page, pdf_path, page, path, dpi, image_format)
+                for page, path in outdated
+            ]
+            for future in futures:
+                future.result()
+
+    # The manifest is written only after all pages succeeded
+    temporary = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, indent=2)
+    os.replace(temporary, manifest_path)
+    return paths
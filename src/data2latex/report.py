@@ -0,0 +1,258 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .budget import FragmentEstimate
+
+# Patterns for the statistics block which TeX writes at the end of the .log file:
+#
+#   Here is how much of TeX's memory you used:
+#    5039 strings out of 478287
+#    68937 string characters out of 5849607
+#    1923557 words of memory out of 5000000
+#    ...
+#    57i,19n,65p,1009b,1302s stack positions out of 10000i,1000n,20000p,200000b,200000s
+MEMORY_BLOCK_PATTERN = re.compile(r"Here is how much of \S+ memory you used:")
+STRINGS_PATTERN = re.compile(r"(\d+) strings out of (\d+)")
+POOL_SIZE_PATTERN = re.compile(r"(\d+) string characters out of (\d+)")
+MAIN_MEMORY_PATTERN = re.compile(r"(\d+) words of memory out of (\d+)")
+SAVE_STACK_PATTERN = re.compile(r"(\d+)s stack positions out of .*?(\d+)s")
+CAPACITY_EXCEEDED_PATTERN = re.compile(r"! TeX capacity exceeded, sorry \[(.*?)\]")
+LATEXMK_RUN_PATTERN = re.compile(r"Run number \d+ of rule '[^']*(?:latex|tex)[^']*'")
+# Messages of LaTeX and packages asking for another run, e.g. "Label(s) may have changed.
+# Rerun to get cross-references right." or "Table widths have changed. Rerun LaTeX."
+RERUN_PATTERN = re.compile(r"Rerun to get|Rerun LaTeX|Please rerun LaTeX")
+
+
+class TeXMemoryUsage:
+    """
+    TeX memory statistics parsed from the compilation log. Every value is a tuple ``(used, available)``
+    or ``None`` if the value was not found in the log (e.g. LuaTeX reports memory differently).
+    """
+
+    def __init__(
+        self,
+        main_memory: Optional[Tuple[int, int]] = None,
+        pool_size: Optional[Tuple[int, int]] = None,
+        strings: Optional[Tuple[int, int]] = None,
+        save_stack: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        self.main_memory = main_memory
+        self.pool_size = pool_size
+        self.strings = strings
+        self.save_stack = save_stack
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "main_memory": self.main_memory,
+            "pool_size": self.pool_size,
+            "strings": self.strings,
+            "save_stack": self.save_stack,
+        }
+
+
+class CompilerPass:
+    """
+    One invocation of the LaTeX compiler. ``runs`` is the number of engine runs
+    done by this invocation, which is more than one if ``latexmk`` decided to rerun.
+    """
+
+    def __init__(
+        self, command: List[str], wall_time: float, returncode: int, runs: int = 1
+    ) -> None:
+        self.command = command
+        self.wall_time = wall_time
+        self.returncode = returncode
+        self.runs = runs
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "command": self.command,
+            "wall_time": self.wall_time,
+            "returncode": self.returncode,
+            "runs": self.runs,
+        }
+
+
+class FragmentStats:
+    """
+    Size of one top level object of the document body (table, figure, section, text...).
+    ``digest`` is SHA-256 hash of the LaTeX source of the object, ``definitions`` is SHA-256 hash
+    of the named preamble definitions (colors, styles, table environments) used by the object.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        kind: str,
+        characters: int,
+        label: Optional[str] = None,
+        digest: Optional[str] = None,
+        definitions: Optional[str] = None,
+    ) -> None:
+        self.index = index
+        self.kind = kind
+        self.characters = characters
+        self.label = label
+        self.digest = digest
+        self.definitions = definitions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "kind": self.kind,
+            "characters": self.characters,
+            "label": self.label,
+            "digest": self.digest,
+            "definitions": self.definitions,
+        }
+
+
+class BuildReport:
+    """
+    Structured report about one call of :func:`data2latex.finish`.
+    """
+
+    def __init__(self, filepath: str, compiler: Optional[str] = None) -> None:
+        self.filepath = filepath
+        self.compiler = compiler
+        self.generate_time: float = 0.0
+        self.passes: List[CompilerPass] = []
+        self.memory: Optional[TeXMemoryUsage] = None
+        self.capacity_exceeded: Optional[str] = None
+        self.fragments: List[FragmentStats] = []
+        self.succeeded: bool = True
+        self.tex_hash: Optional[str] = None
+        self.head_hash: Optional[str] = None
+        # Hash of the head without the named preamble definitions
+        self.head_base_hash: Optional[str] = None
+        self.skipped: bool = False
+        self.estimates: List[FragmentEstimate] = []
+        self.shards: int = 1
+        self.errors: List[str] = []
+        self.build_directory: Optional[str] = None
+        self.cached_fragments: int = 0
+
+    @property
+    def compile_time(self) -> float:
+        return sum(p.wall_time for p in self.passes)
+
+    @property
+    def reruns(self) -> int:
+        return max(sum(p.runs for p in self.passes) - 1, 0)
+
+    def largest_fragments(self, count: int = 5) -> List[FragmentStats]:
+        """
+        Get the tables, plots and other objects which produced the largest output.
+
+        :param count: Maximum number of returned fragments, defaults to ``5``.
+        :type count: int, optional
+        :return: Fragments sorted from the largest one
+        :rtype: List[FragmentStats]
+        """
+        return sorted(self.fragments, key=lambda f: f.characters, reverse=True)[:count]
+
+    def parse_log(self, log: str) -> None:
+        """
+        Extract memory statistics and capacity errors from the compilation log.
+
+        :param log: Content of the .log file
+        :type log: str
+        """
+        self.memory = parse_tex_memory(log)
+        match = CAPACITY_EXCEEDED_PATTERN.search(log)
+        self.capacity_exceeded = None if match is None else match.group(1)
+
+    def merge(self, other: "BuildReport") -> None:
+        """
+        Add compiler passes, errors and memory statistics of another compilation, e.g. of one shard.
+
+        :param other: Report of the other compilation
+        :type other: BuildReport
+        """
+        if other.compiler is not None:
+            self.compiler = other.compiler
+        self.passes.extend(other.passes)
+        self.errors.extend(other.errors)
+        self.succeeded = self.succeeded and other.succeeded
+        if other.memory is not None:
+            self.memory = other.memory
+        if self.capacity_exceeded is None:
+            self.capacity_exceeded = other.capacity_exceeded
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "filepath": self.filepath,
+            "compiler": self.compiler,
+            "succeeded": self.succeeded,
+            "skipped": self.skipped,
+            "shards": self.shards,
+            "build_directory": self.build_directory,
+            "cached_fragments": self.cached_fragments,
+            "tex_hash": self.tex_hash,
+            "head_hash": self.head_hash,
+            "head_base_hash": self.head_base_hash,
+            "generate_time": self.generate_time,
+            "compile_time": self.compile_time,
+            "reruns": self.reruns,
+            "passes": [p.to_dict() for p in self.passes],
+            "memory": None if self.memory is None else self.memory.to_dict(),
+            "capacity_exceeded": self.capacity_exceeded,
+            "errors": self.errors,
+            "largest_fragments": [f.to_dict() for f in self.largest_fragments()],
+            "estimated_compile_time": sum(e.compile_time for e in self.estimates),
+            "estimated_peak_memory": max((e.memory for e in self.estimates), default=0),
+        }
+
+
+def _int_pair(pattern: "re.Pattern[str]", text: str) -> Optional[Tuple[int, int]]:
+    match = pattern.search(text)
+    if match is None:
+        return None
+    return (int(match.group(1)), int(match.group(2)))
+
+
+def parse_tex_memory(log: str) -> Optional[TeXMemoryUsage]:
+    """
+    Parse the TeX memory statistics from the compilation log.
+
+    :param log: Content of the .log file
+    :type log: str
+    :return: Memory statistics or ``None`` if the log does not contain them
+    :rtype: Optional[TeXMemoryUsage]
+    """
+    match = MEMORY_BLOCK_PATTERN.search(log)
+    if match is None:
+        return None
+    block = log[match.end() :]
+    return TeXMemoryUsage(
+        main_memory=_int_pair(MAIN_MEMORY_PATTERN, block),
+        pool_size=_int_pair(POOL_SIZE_PATTERN, block),
+        strings=_int_pair(STRINGS_PATTERN, block),
+        save_stack=_int_pair(SAVE_STACK_PATTERN, block),
+    )
+
+
+def count_latexmk_runs(output: str) -> int:
+    """
+    Count the engine runs reported in the ``latexmk`` console output.
+
+    :param output: Console output of ``latexmk``
+    :type output: str
+    :return: Number of runs, at least one
+    :rtype: int
+    """
+    return max(len(LATEXMK_RUN_PATTERN.findall(output)), 1)
+
+
+def needs_rerun(log: str) -> bool:
+    """
+    Check whether the compilation log asks for another run because labels, references
+    or other data stored in auxiliary files have changed.
+
+    :param log: Content of the .log file
+    :type log: str
+    :return: ``True`` if the compiler should run again
+    :rtype: bool
+    """
+    # TeX wraps the log lines, so the message can be split over two lines
+    return RERUN_PATTERN.search(log.replace("\n", "")) is not None
@@ -0,0 +1,327 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from .compiler import (
+    CompilationError,
+    clean_auxiliary_files,
+    compile_tex,
+    max_concurrent_compilations,
+    read_log,
+)
+from .fragments import write_if_changed
+from .report import BuildReport, FragmentStats
+
+if TYPE_CHECKING:
+    from .dm import DocumentManager
+
+# Kinds of top level fragments which can start a new shard
+SHARD_BOUNDARY_KINDS: List[str] = ["part", "chapter", "section"]
+# Counters which continue from the previous shard, every boundary kind has its counter
+SHARED_COUNTERS: List[str] = SHARD_BOUNDARY_KINDS + [
+    "figure",
+    "table",
+    "equation",
+    "footnote",
+]
+COUNTER_PATTERN = re.compile(r"DTOL-COUNTER (\w+)=(-?\d+)")
+SETCOUNTER_PATTERN = re.compile(r"\\setcounter\{(\w+)\}\{(-?\d+)\}")
+# Counters reset by stepping another counter, e.g. sections by chapters in the report class
+RESET_PATTERN = re.compile(r"DTOL-RESET (\w+)>(\w+)")
+
+# Written at the end of each shard: flush the last page and report the counters
+# and the counters they reset (the \cl@<counter> list) into the log
+COUNTER_REPORT: str = (
+    "\\clearpage%\n"
+    "\\makeatletter%\n"
+    "\\def\\dtol@reset#1{\\typeout{DTOL-RESET \\dtol@counter>#1}}%\n"
+    f"\\@for\\dtol@counter:=page,{','.join(SHARED_COUNTERS)}\\do{{%\n"
+    "\\@ifundefined{c@\\dtol@counter}{}"
+    "{\\typeout{DTOL-COUNTER \\dtol@counter=\\the\\value{\\dtol@counter}}}%\n"
+    "\\@ifundefined{cl@\\dtol@counter}{}"
+    "{{\\let\\@elt\\dtol@reset\\csname cl@\\dtol@counter\\endcsname}}}%\n"
+    "\\makeatother%\n"
+)
+
+
+def shard_ranges(fragments: List[FragmentStats], shards: int) -> List[Tuple[int, int]]:
+    """
+    Split the body into at most ``shards`` contiguous ranges of fragments. Ranges start
+    at section (chapter, part) boundaries and have similar number of characters: a range
+    ends at the boundary closest to its share of the characters.
+
+    :param fragments: Top level fragments of the document body
+    :type fragments: List[FragmentStats]
+    :param shards: Maximum number of shards
+    :type shards: int
+    :return: Ranges of fragment indices, start inclusive and end exclusive
+    :rtype: List[Tuple[int, int]]
+    """
+    boundaries: List[int] = [0] + [
+        i for i, f in enumerate(fragments) if i > 0 and f.kind in SHARD_BOUNDARY_KINDS
+    ]
+    total: int = sum(f.characters for f in fragments)
+    target: float = total / max(shards, 1)
+    ranges: List[Tuple[int, int]] = []
+    start: int = 0
+    position: int = 0
+    for segment_start, segment_end in zip(
+        boundaries, boundaries[1:] + [len(fragments)]
+    ):
+        size = sum(f.characters for f in fragments[segment_start:segment_end])
+        # Split before the segment if its middle is past the end of the current range
+        if (
+            len(ranges) < shards - 1
+            and segment_start > start
+            and position + size / 2 > (len(ranges) + 1) * target
+        ):
+            ranges.append((start, segment_start))
+            start = segment_start
+        position += size
+    ranges.append((start, len(fragments)))
+    return ranges
+
+
+def shard_filepath(filepath: str, index: int) -> str:
+    return f"{filepath}-shard{index + 1}"
+
+
+def write_shards(
+    dm: "DocumentManager",
+    filepath: str,
+    fragments: List[FragmentStats],
+    ranges: List[Tuple[int, int]],
+) -> bool:
+    """
+    Copy the fragments of the already written .tex file into one .tex file per shard.
+    Each shard has the shared preamble, reads labels of the other shards with the ``xr`` package
+    and inputs its counter settings, which are written between the compiler passes.
+
+    :return: ``True`` if the document references labels
+    :rtype: bool
+    """
+    separator: str = dm.document.content_separator
+    names: List[str] = [
+        os.path.basename(shard_filepath(filepath, i)) for i in range(len(ranges))
+    ]
+    has_references: bool = False
+    with open(filepath + ".tex", "r", encoding="utf-8", newline="") as source:
+        source.read(len(dm.dumps_head()))
+        for i, (start, end) in enumerate(ranges):
+            external = "".join(
+                f"\\externaldocument{{{name}}}%\n" for name in names if name != names[i]
+            )
+            head = dm.dumps_head("\\usepackage{xr}%\n" + external)
+            with open(shard_filepath(filepath, i) + ".tex", "w", encoding="utf-8") as f:
+                f.write(head)
+                f.write(f"\\InputIfFileExists{{{names[i]}-counters}}{{}}{{}}%\n")
+                for j in range(start, end):
+                    if j > 0:
+                        source.read(len(separator))
+                    fragment = source.read(fragments[j].characters)
+                    has_references = has_references or "ref{" in fragment
+                    if j > start:
+                        f.write(separator)
+                    f.write(fragment)
+                f.write(separator + COUNTER_REPORT)
+                f.write(dm.dumps_tail())
+    return has_references
+
+
+def counters_filepath(filepath: str, index: int) -> str:
+    return shard_filepath(filepath, index) + "-counters.tex"
+
+
+def read_counters(path: str) -> Dict[str, int]:
+    """
+    Read counter settings written by :func:`write_counters`, missing file has no settings.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {k: int(v) for k, v in SETCOUNTER_PATTERN.findall(f.read())}
+    except FileNotFoundError:
+        return {}
+
+
+def write_counters(filepath: str, logs: List[str]) -> bool:
+    """
+    Write counter settings of every shard, so the numbering continues from the previous shards.
+    The counters stepped by the shards are summed, except counters reset inside the shard (e.g. sections
+    after a chapter), which continue from their value at the end of the shard. The shards may have been
+    compiled with the settings of the previous build, their values are subtracted. Only counters defined
+    by the document class and packages are written.
+
+    :param filepath: File path of the document without extension
+    :type filepath: str
+    :param logs: Compilation logs of the shards with reported counters
+    :type logs: List[str]
+    :return: ``True`` if the settings of some shard have changed, so the shards must be compiled again
+    :rtype: bool
+    """
+    changed: bool = False
+    page: int = 1
+    offsets: Dict[str, int] = {}
+    for i, log in enumerate(logs):
+        path = counters_filepath(filepath, i)
+        started = read_counters(path)
+        settings = f"\\setcounter{{page}}{{{page}}}%\n" + "".join(
+            f"\\setcounter{{{counter}}}{{{value}}}%\n"
+            for counter, value in offsets.items()
+        )
+        changed = write_if_changed(path, settings) or changed
+        counters = {k: int(v) for k, v in COUNTER_PATTERN.findall(log)}
+        # Counters stepped in this shard reset their dependent counters
+        reset: Set[str] = {
+            child
+            for parent, child in RESET_PATTERN.findall(log)
+            if counters.get(parent, 0) > 0
+        }
+        # The page counter is already increased by \clearpage at the end of the shard
+        page += counters.get("page", 1) - started.get("page", 1)
+        for counter in SHARED_COUNTERS:
+            if counter not in counters:
+                continue
+            if counter in reset:
+                offsets[counter] = counters[counter]
+            else:
+                offsets[counter] = (
+                    offsets.get(counter, 0)
+                    + counters[counter]
+                    - started.get(counter, 0)
+                )
+    return changed
+
+
+def compile_shards(
+    filepath: str,
+    report: BuildReport,
+    compiler: Optional[str],
+    count: int,
+) -> List[str]:
+    """
+    Compile all shards in parallel, the number of concurrent compilers is limited
+    by :func:`set_max_concurrent_compilations`. The passes are driven by :func:`compile_sharded`,
+    so the shards are not rerun on their own. Each shard is recorded into its own report,
+    the reports are merged into ``report`` in shard order after all shards have finished.
+
+    :return: Compilation logs of the shards
+    :rtype: List[str]
+    :raises CompilationError: Compilation of some shard has failed, the exception carries ``report``.
+    """
+    reports = [BuildReport(shard_filepath(filepath, i), compiler) for i in range(count)]
+
+    def compile_shard(i: int) -> str:
+        shard = shard_filepath(filepath, i)
+        compile_tex(
+            shard,
+            reports[i],
+            compiler=compiler,
+            clean=False,
+            clean_tex=False,
+            rerun=False,
+        )
+        return read_log(shard)
+
+    with ThreadPoolExecutor(min(count, max_concurrent_compilations())) as executor:
+        futures = [executor.submit(compile_shard, i) for i in range(count)]
+    for shard_report in reports:
+        report.merge(shard_report)
+    logs: List[str] = []
+    for future in futures:
+        error = future.exception()
+        if isinstance(error, CompilationError):
+            error.report = report
+        if error is not None:
+            raise error
+        logs.append(future.result())
+    return logs
+
+
+def merge_shards(
+    filepath: str, report: BuildReport, compiler: Optional[str], count: int
+) -> None:
+    """
+    Merge PDF files of the shards into the final PDF with the ``pdfpages`` package.
+    ``pdfpages`` includes the pages of the shards as graphics, so hyperlinks and the PDF outline
+    (bookmarks) of the shards are not kept in the merged PDF.
+    """
+    merged = filepath + "-merged"
+    with open(merged + ".tex", "w", encoding="utf-8") as f:
+        f.write(
+            "\\documentclass{article}%\n\\usepackage{pdfpages}%\n\\begin{document}%\n"
+        )
+        for i in range(count):
+            name = os.path.basename(shard_filepath(filepath, i))
+            f.write(f"\\includepdf[pages=-,fitpaper]{{{name}.pdf}}%\n")
+        f.write("\\end{document}")
+    compile_tex(
+        merged,
+        report,
+        compiler=compiler if compiler in ["pdflatex", "lualatex"] else "pdflatex",
+    )
+    os.replace(merged + ".pdf", filepath + ".pdf")
+
+
+def remove_shards(filepath: str, count: int) -> None:
+    """
+    Remove the files of the shards. The counter settings are kept for the next build,
+    only the settings of shards which no longer exist are removed.
+    """
+    for i in range(count):
+        shard = shard_filepath(filepath, i)
+        clean_auxiliary_files(shard)
+        for suffix in [".tex", ".pdf"]:
+            try:
+                os.remove(shard + suffix)
+            except FileNotFoundError:
+                pass
+    i = count
+    while os.path.exists(counters_filepath(filepath, i)):
+        os.remove(counters_filepath(filepath, i))
+        i += 1
+
+
+def compile_sharded(
+    dm: "DocumentManager",
+    filepath: str,
+    report: BuildReport,
+    compiler: Optional[str],
+    shards: int,
+) -> None:
+    """
+    Compile already written .tex file as independent shards split at section boundaries
+    and merge them into one PDF. The shards are compiled in parallel, the first pass measures
+    the counters of each shard. If the page, section, figure and table numbering does not continue
+    from the previous shards, the counter settings are updated and the shards are compiled again.
+    The settings are kept next to the document, so a rebuild with unchanged numbering needs only
+    one pass. If the document references labels, one more pass resolves references between
+    the shards through their .aux files.
+
+    :param dm: Document manager which wrote the .tex file
+    :type dm: DocumentManager
+    :param filepath: Absolute file path without extension
+    :type filepath: str
+    :param report: Build report with sizes of the fragments, the compiler passes are added into it
+    :type report: BuildReport
+    :param compiler: Compiler name
+    :type compiler: Optional[str]
+    :param shards: Maximum number of shards
+    :type shards: int
+    :raises CompilationError: Compilation of some shard has failed.
+    """
+    ranges = shard_ranges(report.fragments, shards)
+    if len(ranges) < 2:
+        compile_tex(filepath, report, compiler=compiler, clean_tex=False)
+        return
+    report.shards = len(ranges)
+    try:
+        has_references = write_shards(dm, filepath, report.fragments, ranges)
+        logs = compile_shards(filepath, report, compiler, len(ranges))
+        if write_counters(filepath, logs):
+            compile_shards(filepath, report, compiler, len(ranges))
+        if has_references:
+            compile_shards(filepath, report, compiler, len(ranges))
+        merge_shards(filepath, report, compiler, len(ranges))
+    finally:
+        remove_shards(filepath, len(ranges))
@@ -0,0 +1,170 @@
+import io
+import pickle
+import sys
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+# Smaller arrays are pickled with the fragment, copying them is cheaper than mapping a block
+SHARED_MEMORY_MIN_BYTES: int = 64 * 1024
+
+# Offsets of the arrays in the block, aligned for every dtype
+ARRAY_ALIGNMENT: int = 64
+
+# Dtype, shape and offset of an array in the shared memory block
+ArrayView = Tuple[Any, Tuple[int, ...], int]
+
+
+def shareable(obj: Any) -> bool:
+    """
+    Check if the object is a NumPy array which should be placed in shared memory.
+    NumPy is not imported, if it was not imported yet there are no arrays.
+    """
+    numpy = sys.modules.get("numpy")
+    if numpy is None or type(obj) not in (numpy.ndarray, numpy.memmap):
+        return False
+    return not obj.dtype.hasobject and obj.nbytes >= SHARED_MEMORY_MIN_BYTES
+
+
+class SharingPickler(pickle.Pickler):
+    """
+    Pickler which replaces large NumPy arrays (also inside lists, dictionaries or DataFrames)
+    by their views into the shared memory block.
+    """
+
+    def __init__(self, file: io.BytesIO, shared: "SharedArrays") -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.shared = shared
+
+    def persistent_id(self, obj: Any) -> Any:
+        if shareable(obj):
+            return self.shared.view(obj)
+        return None
+
+
+class SharingUnpickler(pickle.Unpickler):
+    """
+    Unpickler which restores the arrays as read-only views into the shared memory block.
+    """
+
+    def __init__(self, file: io.BytesIO, block: Optional[SharedMemory]) -> None:
+        super().__init__(file)
+        self.block = block
+
+    def persistent_load(self, pid: Any) -> Any:
+        import numpy as np
+
+        if self.block is None:
+            raise pickle.UnpicklingError("Shared memory block is missing.")
+        dtype, shape, offset = pid
+        array = np.ndarray(shape, dtype, buffer=self.block.buf, offset=offset)
+        array.flags.writeable = False
+        return array
+
+
+class SharedArrays:
+    """
+    One shared memory block holding the large NumPy arrays of objects sent to worker processes.
+    Objects are pickled by :meth:`dumps` with views (dtype, shape, offset) instead of the arrays,
+    then :meth:`allocate` copies every array into the block once, no matter how many objects
+    or workers use it. Arrays used several times are stored only once. The block is removed
+    when leaving the context, also if a worker failed.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        with SharedArrays() as shared:
+            payloads = [shared.dumps(o) for o in objects]
+            name = shared.allocate()
+            results = list(executor.map(work, [name] * len(payloads), payloads))
+    """
+
+    def __init__(self) -> None:
+        self.arrays: List[Any] = []
+        self.views: Dict[int, ArrayView] = {}
+        self.size: int = 0
+        self.block: Optional[SharedMemory] = None
+
+    def view(self, array: Any) -> ArrayView:
+        """
+        Reserve space for the array in the block.
+        """
+        view = self.views.get(id(array))
+        if view is None:
+            offset = -(-self.size // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+            view = (array.dtype, array.shape, offset)
+            self.size = offset + array.nbytes
+            self.views[id(array)] = view
+            # Keep the reference, so the id is not reused by another array
+            self.arrays.append(array)
+        return view
+
+    def dumps(self, obj: Any) -> bytes:
+        """
+        Pickle the object with views of its large arrays.
+        """
+        if self.block is not None:
+            raise RuntimeError("Objects cannot be added after the block was allocated.")
+        buffer = io.BytesIO()
+        SharingPickler(buffer, self).dump(obj)
+        return buffer.getvalue()
+
+    def allocate(self) -> Optional[str]:
+        """
+        Create the block and copy the arrays into it.
+
+        :return: Name of the block or ``None`` if no array was large enough
+        :rtype: Optional[str]
+        """
+        if len(self.arrays) == 0:
+            return None
+        import numpy as np
+
+        self.block = SharedMemory(create=True, size=self.size)
+        for array in self.arrays:
+            dtype, shape, offset = self.views[id(array)]
+            np.ndarray(shape, dtype, buffer=self.block.buf, offset=offset)[...] = array
+        return self.block.name
+
+    def close(self) -> None:
+        """
+        Remove the block, the workers must have finished.
+        """
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+        self.arrays = []
+        self.views = {}
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def attach(name: Optional[str]) -> Optional[SharedMemory]:
+    """
+    Open the shared memory block in a worker process.
+    """
+    return None if name is None else SharedMemory(name)
+
+
+def loads(payload: bytes, block: Optional[SharedMemory]) -> Any:
+    """
+    Unpickle the object pickled by :meth:`SharedArrays.dumps`, its arrays are views into the block.
+    """
+    return SharingUnpickler(io.BytesIO(payload), block).load()
+
+
+def detach(block: Optional[SharedMemory]) -> None:
+    """
+    Close the shared memory block in a worker process. If some view is still alive
+    (e.g. in a traceback), the block is unmapped when the view is collected.
+    """
+    if block is None:
+        return
+    try:
+        block.close()
+    except BufferError:
+        pass
@@ -0,0 +1,85 @@
+import shutil
+from tempfile import SpooledTemporaryFile
+from typing import IO, List, Optional
+
+from .manifest import text_hash
+from .report import FragmentStats
+
+
+class BodySpool:
+    """
+    Storage for already serialized fragments of the document body. Fragments are kept
+    in memory until their total size exceeds ``max_memory`` characters, then everything
+    is moved into a temporary file and all following fragments are written there.
+
+    :param max_memory: Number of characters kept in memory before spilling to disk
+    :type max_memory: int
+    :param separator: String placed between the fragments
+    :type separator: str
+    """
+
+    def __init__(self, max_memory: int, separator: str = "%\n") -> None:
+        self.max_memory = max_memory
+        self.separator = separator
+        self.file: "SpooledTemporaryFile[str]" = SpooledTemporaryFile(
+            max_size=max_memory, mode="w+", encoding="utf-8", newline=""
+        )
+        self.fragments: List[FragmentStats] = []
+
+    def __len__(self) -> int:
+        return len(self.fragments)
+
+    @property
+    def spilled(self) -> bool:
+        """
+        ``True`` if the fragments were moved from memory into a temporary file.
+        """
+        return bool(self.file._rolled)  # pyright: ignore [reportPrivateUsage]
+
+    def write(
+        self,
+        fragment: str,
+        kind: str = "text",
+        label: Optional[str] = None,
+        definitions: Optional[str] = None,
+    ) -> None:
+        """
+        Append serialized fragment to the end of the spool.
+
+        :param fragment: LaTeX source of the fragment
+        :type fragment: str
+        :param kind: Kind of the fragment used in the build report, defaults to ``"text"``
+        :type kind: str, optional
+        :param label: Label of the fragment used in the build report, defaults to ``None``
+        :type label: Optional[str], optional
+        :param definitions: Hash of the preamble definitions used by the fragment, defaults to ``None``
+        :type definitions: Optional[str], optional
+        """
+        if len(self.fragments) > 0:
+            self.file.write(self.separator)
+        self.file.write(fragment)
+        self.fragments.append(
+            FragmentStats(
+                index=len(self.fragments),
+                kind=kind,
+                characters=len(fragment),
+                label=label,
+                digest=text_hash(fragment),
+                definitions=definitions,
+            )
+        )
+
+    def copy_to(self, f: IO[str]) -> None:
+        """
+        Copy all the fragments into another file. The spool stays untouched.
+
+        :param f: Destination file opened for writing
+        :type f: IO[str]
+        """
+        self.file.flush()
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, f)
+        self.file.seek(0, 2)
+
+    def close(self) -> None:
+        self.file.close()
@@ -1,5 +1,20 @@
+import inspect
+import time
 from numbers import Integral, Number
-from typing import Any, Callable, Dict, List, Literal, Optional, Union, cast, Set
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 from pylatex import Table, Package  # pyright: ignore [reportMissingTypeStubs]
 from pylatex.utils import (  # pyright: ignore [reportMissingTypeStubs]
@@ -7,6 +22,8 @@ from pylatex.utils import (  # pyright: ignore [reportMissingTypeStubs]
     escape_latex,  # pyright: ignore [reportUnknownVariableType]
 )
 
+from .budget import FragmentEstimate
+from .deferred import deferrable
 from .dm import gdm
 from .environments import (
     AdjustBoxCommand,
@@ -26,6 +43,17 @@ from .iter_protocols import (
     Sequence2D,
     dict2str,
 )
+from .profiling import active_profiler, profiled
+
+# Column type for numeric columns aligned by siunitx, the arguments are
+# table-format, table-number-alignment and horizontal alignment of the cell.
+SIUNITX_COLUMN_TYPE: str = "N"
+SIUNITX_COLUMN_TYPE_DEFINITION: str = (
+    f"\\NewColumnType{{{SIUNITX_COLUMN_TYPE}}}[3]"
+    "{Q[si={table-format=#1,table-number-alignment=#2},#3]}"
+)
+# End of every table row
+ROW_END: str = " \\\\\n"
 
 
 class Rule:
@@ -86,6 +114,360 @@ def decode_rule_style_code(code: str) -> Dict[Literal["v", "h"], Set[int]]:
     return {"v": v, "h": h}
 
 
+def validate_table_data(
+    data: Any, dataframe_column_names: bool, dataframe_row_names: bool
+) -> KnownLengthIterable2D:
+    """
+    Check the type of the table data and wrap ``pandas.DataFrame`` into :class:`DataFrameIterator`.
+
+    :raises ValueError: Input data must have at least two dimensions.
+    :raises ValueError: Unknown input data type.
+    """
+    if isinstance(data, DataFrameIterator):
+        pass
+    elif "DataFrame" in str(type(data)) and isinstance(data, DataFrameLike):
+        data = DataFrameIterator(
+            data,
+            include_column_names=dataframe_column_names,
+            include_row_names=dataframe_row_names,
+        )
+    elif "ndarray" in str(type(data)) and isinstance(data, NDArrayLike):
+        if data.ndim <= 1:
+            raise ValueError("Input data must have at least two dimensions.")
+    elif (
+        isinstance(data, OuterKnownLengthIterable)
+        and all(
+            [
+                isinstance(
+                    x, KnownLengthIterable
+                )  # pyright: ignore [reportUnnecessaryIsInstance]
+                for x in data
+            ]
+        )
+        and len(data) > 0
+    ):
+        pass
+    else:
+        raise ValueError(
+            "Unknown input data type. "
+            "Supporting List[List[Any]], numpy.ndarray{ndim >= 2} and pandas.DataFrame."
+        )
+    return cast(KnownLengthIterable2D, data)
+
+
+class RowFormatter:
+    """
+    Converts table rows into LaTeX source code and measures the numbers for ``siunitx``.
+    See :func:`table` for the meaning of the options. The counters are increased
+    only when profiling, in the slow branches of the formatting.
+    """
+
+    def __init__(
+        self,
+        float_format: str,
+        str_format: str,
+        str_convertor: Callable[[Any], str],
+        str_try_number: bool,
+        escape_cells: bool,
+        use_siunitx: bool,
+        profiling: bool = False,
+    ) -> None:
+        self.float_format = float_format
+        self.str_format = str_format
+        self.str_convertor = str_convertor
+        self.str_try_number = str_try_number
+        self.escape_cells = escape_cells
+        self.use_siunitx = use_siunitx
+        self.profiling = profiling
+        self.cell_count: int = 0
+        self.try_number_fallbacks: int = 0
+        self.escaped_cells: int = 0
+        self.siunitx_time: float = 0.0
+
+    def format_rows(
+        self,
+        data: Iterable[Any],
+        column_count: int,
+        max_pre: List[int],
+        max_post: List[int],
+    ) -> List[str]:
+        """
+        Format the rows, the widths of the integer and decimal parts of the numbers
+        are maximized into ``max_pre`` and ``max_post``.
+
+        :return: LaTeX source code of every row
+        :rtype: List[str]
+        """
+        float_format = self.float_format
+        str_format = self.str_format
+        str_convertor = self.str_convertor
+        str_try_number = self.str_try_number
+        escape_cells = self.escape_cells
+        use_siunitx = self.use_siunitx
+        profiling = self.profiling
+        lines: List[str] = []
+        row_data: List[str] = [""] * column_count
+        cell_count: int = 0
+        try_number_fallbacks: int = 0
+        escaped_cells: int = 0
+        siunitx_time: float = 0.0
+        measure_start: float = 0.0
+        for row in data:
+            if profiling:
+                cell_count += len(row)
+            for i, item in enumerate(row):
+                if isinstance(item, bool):
+                    row_data[i] = str_format.format(str(item))
+                elif isinstance(item, Integral):  # standard int + numpy.int
+                    row_data[i] = str(item)
+                elif isinstance(item, Number):
+                    row_data[i] = float_format.format(item)
+                else:
+                    item2: str = ""
+                    converted: bool = False
+                    if isinstance(item, str):
+                        item2 = item
+                    else:
+                        item2 = str_convertor(item)
+                    if str_try_number:
+                        try:
+                            item2 = str(int(item2))
+                            converted = True
+                        except ValueError:
+                            try:
+                                item2 = float_format.format(float(item2))
+                                converted = True
+                            except ValueError:
+                                converted = False
+                                if profiling:
+                                    try_number_fallbacks += 1
+                    if converted:
+                        row_data[i] = item2
+                    else:
+                        if escape_cells:
+                            item2 = escape_latex(item2)
+                            if profiling:
+                                escaped_cells += 1
+                        row_data[i] = str_format.format(item2)
+
+                # Measuring width of the numbers for the siunitx package.
+                # Doing it here so we don't skip numbers that where saved
+                # as string in the original data. We will also catch all the
+                # possible numbers from custom number/str_format and str_convertor().
+                if use_siunitx:
+                    if profiling:
+                        measure_start = time.perf_counter()
+                    try:
+                        item2 = row_data[i].strip(" {}$")
+                        # float() will error on text and we will skip the max_pre/post measurement
+                        float(item2)
+                        parts = item2.split(".")
+                        if len(parts) >= 1:
+                            max_pre[i] = max(max_pre[i], len(parts[0]))
+                        if len(parts) >= 2:
+                            max_post[i] = max(max_post[i], len(parts[1].split("e")[0]))
+                    except:
+                        pass
+                    if profiling:
+                        siunitx_time += time.perf_counter() - measure_start
+            # Short rows end with empty cells instead of the cells of previous rows
+            if len(row) < column_count:
+                row_data[len(row) :] = [""] * (column_count - len(row))
+            lines.append(" & ".join(row_data) + ROW_END)
+        self.cell_count += cell_count
+        self.try_number_fallbacks += try_number_fallbacks
+        self.escaped_cells += escaped_cells
+        self.siunitx_time += siunitx_time
+        return lines
+
+
+def table_specification(
+    row_count: int,
+    max_pre: List[int],
+    max_post: List[int],
+    rules: str,
+    col_align: Literal["l", "c", "r", "j"],
+    row_align: Literal["t", "m", "b", "h", "f"],
+    left_head_bold: bool,
+    left_head_col_align: Optional[Literal["l", "c", "r", "j"]],
+    top_head_bold: bool,
+    top_head_col_align: Optional[Literal["l", "c", "r", "j"]],
+    use_siunitx: bool,
+) -> Tuple[List[str], List[str], str]:
+    """
+    Build column and row specification of the ``tblr`` environment and define
+    the environment with the header settings in the preamble.
+
+    :return: Column specification, row specification and environment name
+    :rtype: Tuple[List[str], List[str], str]
+    """
+    #
+    # Columns and rows configuration (align)
+    #
+    column_type: Dict[str, Any] = {
+        "si": {"table-format": None, "table-number-alignment": None}
+    }
+    column_type[col_align] = ""
+    if use_siunitx:
+        column_type["si"]["table-number-alignment"] = {
+            "l": "left",
+            "c": "center",
+            "r": "right",
+        }.get(col_align, "center")
+
+    rowspec: List[str] = [f"Q[{row_align}]"] * row_count
+    colspec: List[str] = [""] * len(max_pre)
+    if use_siunitx:
+        # Column type with siunitx settings is defined once in the preamble
+        # and every column only passes its number format and alignment.
+        gdm().add_preamble_definition(SIUNITX_COLUMN_TYPE_DEFINITION)
+    for i, (max_pre_i, max_post_i) in enumerate(zip(max_pre, max_post)):
+        if use_siunitx:
+            colspec[i] = (
+                f"{SIUNITX_COLUMN_TYPE}{{{max_pre_i}.{max_post_i}}}"
+                f"{{{column_type['si']['table-number-alignment']}}}{{{col_align}}}"
+            )
+        else:
+            colspec[i] = f"Q[{dict2str(column_type)}]"
+
+    #
+    # Columns and rows configuration (rules/lines)
+    #
+    RULES = decode_rule_style_code(rules)
+    colspec_header: str = ""
+    colspec_body: List[str] = []
+    if len(colspec) == 0:
+        pass  # Maybe error?
+    elif len(colspec) == 1:
+        colspec_header = colspec[0]
+    else:
+        colspec_header = colspec[0]
+        colspec_body = colspec[1:]
+    colspec = [
+        "%\n",
+        "|" if Rule.BEFORE_HEADER in RULES[Rule.COL] else "",
+        colspec_header,
+        "|" if Rule.AFTER_HEADER in RULES[Rule.COL] else "",
+        ("|" if Rule.INNER_BODY in RULES[Rule.COL] else "").join(colspec_body),
+        "|" if Rule.AFTER_BODY in RULES[Rule.COL] and len(colspec_body) > 0 else "",
+        "%\n",
+    ]
+    rowspec_header: str = ""
+    rowspec_body: List[str] = []
+    if len(rowspec) == 0:
+        pass  # Maybe error?
+    elif len(rowspec) == 1:
+        rowspec_header = rowspec[0]
+    else:
+        rowspec_header = rowspec[0]
+        rowspec_body = rowspec[1:]
+    rowspec = [
+        "|" if Rule.BEFORE_HEADER in RULES[Rule.ROW] else "",
+        rowspec_header,
+        "|" if Rule.AFTER_HEADER in RULES[Rule.ROW] else "",
+        ("|" if Rule.INNER_BODY in RULES[Rule.ROW] else "").join(rowspec_body),
+        "|" if Rule.AFTER_BODY in RULES[Rule.ROW] and len(rowspec_body) > 0 else "",
+    ]
+
+    #
+    # Columns and rows configuration (header)
+    #
+    additional_tblr_parameters = {}
+    first_row_params: Dict[str, str] = {}
+    if top_head_bold:
+        first_row_params["font"] = r"\bfseries"
+    if top_head_col_align is not None:
+        first_row_params["halign"] = top_head_col_align
+    additional_tblr_parameters["row{1}"] = Parameters2(first_row_params)
+    first_col_params: Dict[str, str] = {}
+    if left_head_bold:
+        first_col_params["font"] = r"\bfseries"
+    if left_head_col_align is not None:
+        first_col_params["halign"] = left_head_col_align
+    additional_tblr_parameters["column{1}"] = Parameters2(first_col_params)
+
+    # Header settings are the default inner specification of an environment
+    # defined in the preamble, which is shared by tables with the same settings.
+    tblr_environment = gdm().define_tblr_environment(
+        Parameters2(**additional_tblr_parameters).dumps()
+    )
+    return (colspec, rowspec, tblr_environment)
+
+
+def table_environment(
+    latex_data: str,
+    colspec: List[str],
+    rowspec: List[str],
+    tblr_environment: str,
+    caption: Optional[str],
+    caption_pos: Literal["above", "below"],
+    escape_caption: bool,
+    label: Optional[str],
+    position: str,
+    center: bool,
+    use_adjustbox: bool,
+) -> Table:
+    """
+    Wrap the rows into ``tblr`` and ``table`` environments with caption and label.
+    """
+    #
+    # LaTeX environments completion
+    #
+
+    table = Table(position=position)
+    table.packages.append(Package("float"))  # pyright: ignore [reportUnknownMemberType]
+    table.separate_paragraph = False  # Fix new lines before \begin{table}
+
+    if center:
+        table.append(  # pyright: ignore [reportUnknownMemberType]
+            CenteringFlagCommand()
+        )
+
+    if caption is not None:
+        table.append(  # pyright: ignore [reportUnknownMemberType]
+            SetLengthCommand("abovecaptionskip", "5pt plus 2pt minus 2pt")
+        )
+        table.append(  # pyright: ignore [reportUnknownMemberType]
+            SetLengthCommand("belowcaptionskip", "5pt plus 2pt minus 2pt")
+        )
+        if caption_pos == "above":
+            if escape_caption:
+                table.add_caption(caption)  # pyright: ignore [reportUnknownMemberType]
+            else:
+                table.add_caption(  # pyright: ignore [reportUnknownMemberType]
+                    NoEscape(caption)
+                )
+
+    tabular = tblr(
+        colspec="".join(colspec),
+        rowspec="".join(rowspec),
+        data=NoEscape(latex_data),
+    )
+    tabular._latex_name = tblr_environment  # pyright: ignore [reportPrivateUsage]
+
+    if use_adjustbox:
+        adjustbox = AdjustBoxCommand(data=tabular)
+        table.append(adjustbox)  # pyright: ignore [reportUnknownMemberType]
+    else:
+        table.append(tabular)  # pyright: ignore [reportUnknownMemberType]
+
+    if caption is not None and caption_pos == "below":
+        if escape_caption:
+            table.add_caption(caption)  # pyright: ignore [reportUnknownMemberType]
+        else:
+            table.add_caption(  # pyright: ignore [reportUnknownMemberType]
+                NoEscape(caption)
+            )
+
+    if label is not None:
+        table.append(  # pyright: ignore [reportUnknownMemberType]
+            Label2(label, "table")
+        )
+    return table
+
+
+@deferrable
+@profiled("table")
 def table(
     data: Union[
         Sequence2D,
@@ -240,227 +622,347 @@ def table(
     :raises ValueError: Input data must have at least two dimensions.
     :raises ValueError: Unknown input data type. Supporting ``List[List[Any]]``, ``numpy.ndarray{ndim >= 2}`` and ``pandas.DataFrame``.
     """
+    profiler = active_profiler()
+    profiling: bool = profiler is not None
+    mark: float = time.perf_counter() if profiling else 0.0
+
     #
     # Handle different types of input data
     #
-    if isinstance(data, DataFrameIterator):
-        pass
-    elif "DataFrame" in str(type(data)) and isinstance(data, DataFrameLike):
-        data = DataFrameIterator(
-            data,
-            include_column_names=dataframe_column_names,
-            include_row_names=dataframe_row_names,
-        )
-    elif "ndarray" in str(type(data)) and isinstance(data, NDArrayLike):
-        if data.ndim <= 1:
-            raise ValueError("Input data must have at least two dimensions.")
-    elif (
-        isinstance(data, OuterKnownLengthIterable)
-        and all(
-            [
-                isinstance(
-                    x, KnownLengthIterable
-                )  # pyright: ignore [reportUnnecessaryIsInstance]
-                for x in data
-            ]
-        )
-        and len(data) > 0
-    ):
-        pass
-    else:
-        raise ValueError(
-            "Unknown input data type. "
-            "Supporting List[List[Any]], numpy.ndarray{ndim >= 2} and pandas.DataFrame."
-        )
-    data = cast(KnownLengthIterable2D, data)
+    data = validate_table_data(data, dataframe_column_names, dataframe_row_names)
+    if profiler is not None:
+        mark = profiler.lap("validate", mark)
 
     #
     # Build the string representation of the table
     #
-    latex_data: str = ""
+    formatter = RowFormatter(
+        float_format,
+        str_format,
+        str_convertor,
+        str_try_number,
+        escape_cells,
+        use_siunitx,
+        profiling,
+    )
     max_column_count = max((len(row) for row in data))
-    row_data: List[str] = [""] * max_column_count
     max_pre: List[int] = [0] * max_column_count
     max_post: List[int] = [0] * max_column_count
-    for row in data:
-        for i, item in enumerate(row):
-            if isinstance(item, bool):
-                row_data[i] = str_format.format(str(item))
-            elif isinstance(item, Integral):  # standard int + numpy.int
-                row_data[i] = str(item)
-            elif isinstance(item, Number):
-                row_data[i] = float_format.format(item)
-            else:
-                item2: str = ""
-                converted: bool = False
-                if isinstance(item, str):
-                    item2 = item
-                else:
-                    item2 = str_convertor(item)
-                if str_try_number:
-                    try:
-                        item2 = str(int(item2))
-                        converted = True
-                    except ValueError:
-                        try:
-                            item2 = float_format.format(float(item2))
-                            converted = True
-                        except ValueError:
-                            converted = False
-                if converted:
-                    row_data[i] = item2
-                else:
-                    if escape_cells:
-                        item2 = escape_latex(item2)
-                    row_data[i] = str_format.format(item2)
-
-            # Measuring width of the numbers for the siunitx package.
-            # Doing it here so we don't skip numbers that where saved
-            # as string in the original data. We will also catch all the
-            # possible numbers from custom number/str_format and str_convertor().
-            if use_siunitx:
-                try:
-                    item2 = row_data[i].strip(" {}$")
-                    # float() will error on text and we will skip the max_pre/post measurement
-                    float(item2)
-                    parts = item2.split(".")
-                    if len(parts) >= 1:
-                        max_pre[i] = max(max_pre[i], len(parts[0]))
-                    if len(parts) >= 2:
-                        max_post[i] = max(max_post[i], len(parts[1].split("e")[0]))
-                except:
-                    pass
-        latex_data += " & ".join(row_data) + r" \\" + "\n"
+    latex_data: str = "".join(
+        formatter.format_rows(data, max_column_count, max_pre, max_post)
+    )
+    # Every row is written with all the columns
+    estimate = FragmentEstimate(
+        "table", cells=len(data) * max_column_count, characters=len(latex_data)
+    )
+    gdm().budget.check(estimate)
+    gdm().estimates.append(estimate)
+    if profiler is not None:
+        mark = profiler.lap("format", mark)
+        if use_siunitx:
+            profiler.add_time("siunitx", formatter.siunitx_time, parent="format")
+        profiler.count("table.rows", len(data))
+        profiler.count("table.cells", formatter.cell_count)
+        profiler.count("table.str_try_number_fallbacks", formatter.try_number_fallbacks)
+        profiler.count("table.escaped_cells", formatter.escaped_cells)
+
+    colspec, rowspec, tblr_environment = table_specification(
+        len(data),
+        max_pre,
+        max_post,
+        rules,
+        col_align,
+        row_align,
+        left_head_bold,
+        left_head_col_align,
+        top_head_bold,
+        top_head_col_align,
+        use_siunitx,
+    )
+    if profiler is not None:
+        mark = profiler.lap("spec", mark)
 
     #
-    # Columns and rows configuration (align)
+    # LaTeX environments completion
     #
-    column_type: Dict[str, Any] = {
-        "si": {"table-format": None, "table-number-alignment": None}
-    }
-    column_type[col_align] = ""
-    if use_siunitx:
-        column_type["si"]["table-number-alignment"] = {
-            "l": "left",
-            "c": "center",
-            "r": "right",
-        }.get(col_align, "center")
+    table = table_environment(
+        latex_data,
+        colspec,
+        rowspec,
+        tblr_environment,
+        caption,
+        caption_pos,
+        escape_caption,
+        label,
+        position,
+        center,
+        use_adjustbox,
+    )
+    gdm().append(table)
+    if profiler is not None:
+        profiler.lap("environments", mark)
 
-    rowspec: List[str] = [f"Q[{row_align}]"] * len(data)
-    colspec: List[str] = [""] * max_column_count
-    for i, (max_pre_i, max_post_i) in enumerate(zip(max_pre, max_post)):
-        if use_siunitx:
-            column_type["si"]["table-format"] = f"{max_pre_i}.{max_post_i}"
-        colspec[i] = f"Q[{dict2str(column_type)}]"
 
-    #
-    # Columns and rows configuration (rules/lines)
-    #
-    RULES = decode_rule_style_code(rules)
-    colspec_header: str = ""
-    colspec_body: List[str] = []
-    if len(colspec) == 0:
-        pass  # Maybe error?
-    elif len(colspec) == 1:
-        colspec_header = colspec[0]
-    else:
-        colspec_header = colspec[0]
-        colspec_body = colspec[1:]
-    colspec = [
-        "%\n",
-        "|" if Rule.BEFORE_HEADER in RULES[Rule.COL] else "",
-        colspec_header,
-        "|" if Rule.AFTER_HEADER in RULES[Rule.COL] else "",
-        ("|" if Rule.INNER_BODY in RULES[Rule.COL] else "").join(colspec_body),
-        "|" if Rule.AFTER_BODY in RULES[Rule.COL] and len(colspec_body) > 0 else "",
-        "%\n",
-    ]
-    rowspec_header: str = ""
-    rowspec_body: List[str] = []
-    if len(rowspec) == 0:
-        pass  # Maybe error?
-    elif len(rowspec) == 1:
-        rowspec_header = rowspec[0]
-    else:
-        rowspec_header = rowspec[0]
-        rowspec_body = rowspec[1:]
-    rowspec = [
-        "|" if Rule.BEFORE_HEADER in RULES[Rule.ROW] else "",
-        rowspec_header,
-        "|" if Rule.AFTER_HEADER in RULES[Rule.ROW] else "",
-        ("|" if Rule.INNER_BODY in RULES[Rule.ROW] else "").join(rowspec_body),
-        "|" if Rule.AFTER_BODY in RULES[Rule.ROW] and len(rowspec_body) > 0 else "",
-    ]
+#
+# Incremental tables
+#
 
-    #
-    # Columns and rows configuration (header)
-    #
-    additional_tblr_parameters = {}
-    first_row_params: Dict[str, str] = {}
-    if top_head_bold:
-        first_row_params["font"] = r"\bfseries"
-    if top_head_col_align is not None:
-        first_row_params["halign"] = top_head_col_align
-    additional_tblr_parameters["row{1}"] = Parameters2(first_row_params)
-    first_col_params: Dict[str, str] = {}
-    if left_head_bold:
-        first_col_params["font"] = r"\bfseries"
-    if left_head_col_align is not None:
-        first_col_params["halign"] = left_head_col_align
-    additional_tblr_parameters["column{1}"] = Parameters2(first_col_params)
 
-    #
-    # LaTeX environments completion
-    #
+class KeyedRow:
+    """
+    Formatted row of :class:`KeyedTable` with its values and the widths of its numbers.
+    """
 
-    table = Table(position=position)
-    table.packages.append(Package("float"))  # pyright: ignore [reportUnknownMemberType]
-    table.separate_paragraph = False  # Fix new lines before \begin{table}
+    __slots__ = ("row_hash", "values", "types", "latex", "cells", "pre", "post")
+
+    def __init__(
+        self,
+        row_hash: int,
+        values: Tuple[Any, ...],
+        latex: str,
+        cells: int,
+        pre: List[int],
+        post: List[int],
+    ) -> None:
+        self.row_hash = row_hash
+        self.values = values
+        # Types are compared too, because e.g. 1, 1.0 and True are equal but formatted differently
+        self.types = tuple(map(type, values))
+        self.latex = latex
+        self.cells = cells
+        self.pre = pre
+        self.post = post
+
+    def unchanged(self, values: Tuple[Any, ...], new_hash: int) -> bool:
+        """
+        Check if the row has the same values, the hash is only a fast pre-check
+        because different values may have the same hash, e.g. ``hash(-1) == hash(-2)``.
+        """
+        if self.row_hash != new_hash or self.types != tuple(map(type, values)):
+            return False
+        try:
+            if not self.values == values:
+                return False
+        except (TypeError, ValueError):
+            # Cells whose comparison is not a boolean, e.g. arrays
+            return False
+        # Equal values can be formatted differently, e.g. 0.0 and -0.0
+        return repr(self.values) == repr(values)
+
+    def padded(self, column_count: int) -> str:
+        """
+        LaTeX source of the row with empty cells up to ``column_count`` like :func:`table` writes short rows.
+        """
+        if self.cells >= column_count:
+            return self.latex
+        separators = column_count - self.cells - (1 if self.cells == 0 else 0)
+        return self.latex[: -len(ROW_END)] + " & " * separators + ROW_END
+
+
+def row_hash(values: Tuple[Any, ...]) -> int:
+    types = tuple(map(type, values))
+    try:
+        return hash((values, types))
+    except TypeError:
+        return hash((repr(values), types))
+
+
+class WidthCounter:
+    """
+    Number of rows with each width of the integer or decimal part of the numbers in one column,
+    so the maximum width can be updated when rows are removed.
+    """
 
-    if center:
-        table.append(  # pyright: ignore [reportUnknownMemberType]
-            CenteringFlagCommand()
-        )
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
 
-    if caption is not None:
-        table.append(  # pyright: ignore [reportUnknownMemberType]
-            SetLengthCommand("abovecaptionskip", "5pt plus 2pt minus 2pt")
-        )
-        table.append(  # pyright: ignore [reportUnknownMemberType]
-            SetLengthCommand("belowcaptionskip", "5pt plus 2pt minus 2pt")
-        )
-        if caption_pos == "above":
-            if escape_caption:
-                table.add_caption(caption)  # pyright: ignore [reportUnknownMemberType]
+    def add(self, width: int) -> None:
+        if width > 0:
+            self.counts[width] = self.counts.get(width, 0) + 1
+
+    def remove(self, width: int) -> None:
+        if width > 0:
+            count = self.counts[width] - 1
+            if count == 0:
+                del self.counts[width]
             else:
-                table.add_caption(  # pyright: ignore [reportUnknownMemberType]
-                    NoEscape(caption)
-                )
+                self.counts[width] = count
 
-    tabular = tblr(
-        colspec="".join(colspec),
-        rowspec="".join(rowspec),
-        data=NoEscape(latex_data),
-        arguments=additional_tblr_parameters,
-    )
+    def maximum(self) -> int:
+        return max(self.counts, default=0)
 
-    if use_adjustbox:
-        adjustbox = AdjustBoxCommand(data=tabular)
-        table.append(adjustbox)  # pyright: ignore [reportUnknownMemberType]
-    else:
-        table.append(tabular)  # pyright: ignore [reportUnknownMemberType]
 
-    if caption is not None and caption_pos == "below":
-        if escape_caption:
-            table.add_caption(caption)  # pyright: ignore [reportUnknownMemberType]
-        else:
-            table.add_caption(  # pyright: ignore [reportUnknownMemberType]
-                NoEscape(caption)
-            )
+class KeyedTable:
+    """
+    Table for documents which are regenerated with slightly changed data, e.g. dashboards.
+    Formatted rows are kept between the updates together with the widths of their numbers
+    for ``siunitx``. :meth:`update` formats only the rows whose key is new or whose content
+    has changed, the column widths are updated by adding and removing the widths of the changed rows.
 
-    if label is not None:
-        table.append(  # pyright: ignore [reportUnknownMemberType]
-            Label2(label, "table")
+    .. highlight:: python
+    .. code-block:: python
+
+        import data2latex as dtol
+        dashboard = dtol.KeyedTable(key=0, rules="_2", top_head_bold=True)
+        while True:
+            dashboard.update(load_data())  # Only changed rows are formatted
+            dtol.reset()
+            dashboard.append()
+            dtol.finish("dashboard")
+
+    :param key: Index of the column with unique row keys or function which returns the key of a row,
+        rows with the same key are distinguished by their order. Defaults to ``0``.
+    :type key: Union[int, Callable[[Any], Hashable]], optional
+    :param options: Options of :func:`table` except ``data``
+    :raises TypeError: Unknown option.
+    """
+
+    def __init__(
+        self, key: Union[int, Callable[[Any], Hashable]] = 0, **options: Any
+    ) -> None:
+        arguments = inspect.signature(table).bind(None, **options)
+        arguments.apply_defaults()
+        self.options: Dict[str, Any] = dict(arguments.arguments)
+        del self.options["data"]
+        self.key = key
+        self.formatter = RowFormatter(
+            self.options["float_format"],
+            self.options["str_format"],
+            self.options["str_convertor"],
+            self.options["str_try_number"],
+            self.options["escape_cells"],
+            self.options["use_siunitx"],
+        )
+        self.rows: Dict[Hashable, KeyedRow] = {}
+        self.column_counts = WidthCounter()
+        self.max_pre: List[WidthCounter] = []
+        self.max_post: List[WidthCounter] = []
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def row_key(self, row: Tuple[Any, ...]) -> Hashable:
+        if callable(self.key):
+            return self.key(row)
+        return row[self.key]
+
+    def format_row(self, row: Tuple[Any, ...], row_hash: int) -> KeyedRow:
+        cells = len(row)
+        pre: List[int] = [0] * cells
+        post: List[int] = [0] * cells
+        latex = self.formatter.format_rows([row], cells, pre, post)[0]
+        return KeyedRow(row_hash, row, latex, cells, pre, post)
+
+    def add_widths(self, row: KeyedRow) -> None:
+        self.column_counts.add(row.cells)
+        while len(self.max_pre) < row.cells:
+            self.max_pre.append(WidthCounter())
+            self.max_post.append(WidthCounter())
+        for i in range(row.cells):
+            self.max_pre[i].add(row.pre[i])
+            self.max_post[i].add(row.post[i])
+
+    def remove_widths(self, row: KeyedRow) -> None:
+        self.column_counts.remove(row.cells)
+        for i in range(row.cells):
+            self.max_pre[i].remove(row.pre[i])
+            self.max_post[i].remove(row.post[i])
+
+    def update(self, data: Any) -> int:
+        """
+        Replace the table data. Rows are shown in the order of the new data.
+
+        :param data: 2D structure holding your data, see :func:`table`
+        :type data: Union[Sequence2D, KnownLengthIterable2D, DataFrameIterator, DataFrameLike, NDArrayLike]
+        :return: Number of formatted rows, the other rows were reused
+        :rtype: int
+        :raises ValueError: Unknown input data type.
+        """
+        data = validate_table_data(
+            data,
+            self.options["dataframe_column_names"],
+            self.options["dataframe_row_names"],
+        )
+        rows: Dict[Hashable, KeyedRow] = {}
+        occurrences: Dict[Hashable, int] = {}
+        formatted: int = 0
+        for row in data:
+            # Rows of DataFrame can be iterated only once
+            values = tuple(row)
+            key = self.row_key(values)
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            if occurrence > 0:
+                key = (key, occurrence)
+            new_hash = row_hash(values)
+            old = self.rows.pop(key, None)
+            if old is not None:
+                if old.unchanged(values, new_hash):
+                    rows[key] = old
+                    continue
+                self.remove_widths(old)
+            new = self.format_row(values, new_hash)
+            self.add_widths(new)
+            rows[key] = new
+            formatted += 1
+        # Rows missing in the new data
+        for old in self.rows.values():
+            self.remove_widths(old)
+        self.rows = rows
+        return formatted
+
+    def build(self) -> Table:
+        """
+        Create the ``table`` environment from the current rows.
+
+        :rtype: Table
+        :raises ValueError: The table has no rows.
+        """
+        if len(self.rows) == 0:
+            raise ValueError("The table has no rows, call update() first.")
+        options = self.options
+        column_count = self.column_counts.maximum()
+        latex_data: str = "".join(
+            row.padded(column_count) for row in self.rows.values()
+        )
+        estimate = FragmentEstimate(
+            "table",
+            cells=len(self.rows) * column_count,
+            characters=len(latex_data),
+        )
+        gdm().budget.check(estimate)
+        gdm().estimates.append(estimate)
+        colspec, rowspec, tblr_environment = table_specification(
+            len(self.rows),
+            [c.maximum() for c in self.max_pre[:column_count]],
+            [c.maximum() for c in self.max_post[:column_count]],
+            options["rules"],
+            options["col_align"],
+            options["row_align"],
+            options["left_head_bold"],
+            options["left_head_col_align"],
+            options["top_head_bold"],
+            options["top_head_col_align"],
+            options["use_siunitx"],
+        )
+        return table_environment(
+            latex_data,
+            colspec,
+            rowspec,
+            tblr_environment,
+            options["caption"],
+            options["caption_pos"],
+            options["escape_caption"],
+            options["label"],
+            options["position"],
+            options["center"],
+            options["use_adjustbox"],
         )
 
-    gdm().append(table)
+    def append(self) -> None:
+        """
+        Append the table with the current rows into the document.
+
+        :raises ValueError: The table has no rows.
+        """
+        gdm().append(self.build())
@@ -0,0 +1,211 @@
+import math
+from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple
+
+from .iter_protocols import is_ndarray
+
+# Maximum number of major ticks on one axis
+MAX_MAJOR_TICKS: int = 7
+# Minor ticks of logarithmic axis if their number is not given, the 2, 3, ..., 9 multiples
+DEFAULT_LOG_MINOR_TICKS: int = 8
+
+
+def series_limits(
+    series: Iterable[Iterable[Any]], positive: bool = False
+) -> Tuple[float, float]:
+    """
+    Find minimum and maximum over all data series. NumPy arrays are reduced
+    without iterating over their elements in Python. Empty series are skipped,
+    NaN and infinite values are ignored because they have no position on the axis.
+
+    :param series: Data series
+    :type series: Iterable[Iterable[Any]]
+    :param positive: ``True`` for ignoring values which are not positive (logarithmic axis), defaults to ``False``
+    :type positive: bool, optional
+    :return: Minimum and maximum, ``(inf, -inf)`` if there are no values
+    :rtype: Tuple[float, float]
+    """
+    vmin, vmax = float("inf"), float("-inf")
+    for s in series:
+        if is_ndarray(s):
+            values: Any = s
+            if values.dtype.kind not in "biu":
+                import numpy as np
+
+                values = values[np.isfinite(values)]
+            if positive:
+                values = values[values > 0]
+            if values.size == 0:
+                continue
+            vmin = min(vmin, float(values.min()))
+            vmax = max(vmax, float(values.max()))
+        else:
+            for v in s:
+                v = float(v)
+                if not math.isfinite(v) or (positive and v <= 0):
+                    continue
+                vmin = min(vmin, v)
+                vmax = max(vmax, v)
+    return (vmin, vmax)
+
+
+def nice_number(x: float, round_result: bool) -> float:
+    """
+    Find a number close to ``x`` which is 1, 2 or 5 (or 10) times a power of ten.
+    Heckbert, P. S. (1990), Nice numbers for graph labels, Graphics Gems.
+
+    :param x: Positive number
+    :type x: float
+    :param round_result: ``True`` for the nearest nice number, ``False`` for the nearest greater one
+    :type round_result: bool
+    :rtype: float
+    """
+    exponent = math.floor(math.log10(x))
+    fraction = x / 10**exponent
+    nice: float = 10
+    if round_result:
+        if fraction < 1.5:
+            nice = 1
+        elif fraction < 3:
+            nice = 2
+        elif fraction < 7:
+            nice = 5
+    else:
+        if fraction <= 1:
+            nice = 1
+        elif fraction <= 2:
+            nice = 2
+        elif fraction <= 5:
+            nice = 5
+    return nice * 10**exponent
+
+
+def step_decimals(step: float) -> int:
+    return max(0, -math.floor(math.log10(step)) + 1)
+
+
+def linear_ticks(
+    vmin: float,
+    vmax: float,
+    minor: int = 0,
+    precision: Optional[int] = None,
+    max_ticks: int = MAX_MAJOR_TICKS,
+) -> Tuple[List[float], List[float]]:
+    """
+    Select major and minor ticks covering the range of linear axis.
+
+    :param vmin: Minimum of the axis
+    :type vmin: float
+    :param vmax: Maximum of the axis
+    :type vmax: float
+    :param minor: Number of minor ticks between two major ticks, defaults to ``0``
+    :type minor: int, optional
+    :param precision: Number of decimal places of the tick labels, the major ticks are at least
+        one label digit apart if not ``None``, defaults to ``None``
+    :type precision: Optional[int], optional
+    :param max_ticks: Maximum number of major ticks, defaults to :data:`MAX_MAJOR_TICKS`
+    :type max_ticks: int, optional
+    :return: Major and minor ticks
+    :rtype: Tuple[List[float], List[float]]
+    """
+    if vmin > vmax or not (math.isfinite(vmin) and math.isfinite(vmax)):
+        return ([], [])
+    if vmin == vmax:
+        # Single value gets a range of its own magnitude
+        half = abs(vmin) / 2 if vmin != 0 else 1.0
+        vmin, vmax = vmin - half, vmax + half
+    step = nice_number(nice_number(vmax - vmin, False) / max(max_ticks - 1, 1), True)
+    if precision is not None:
+        step = max(step, 10.0**-precision)
+    while math.ceil(vmax / step) - math.floor(vmin / step) + 1 > max_ticks:
+        step = nice_number(step * 1.5, False)
+    decimals = step_decimals(step / (minor + 1))
+    first, last = math.floor(vmin / step), math.ceil(vmax / step)
+    major = [round(i * step, decimals) for i in range(first, last + 1)]
+    minor_ticks: List[float] = []
+    if minor > 0:
+        minor_step = step / (minor + 1)
+        for tick in major[:-1]:
+            minor_ticks.extend(
+                round(tick + j * minor_step, decimals) for j in range(1, minor + 1)
+            )
+    return (major, minor_ticks)
+
+
+def log_ticks(
+    vmin: float, vmax: float, minor: int = 0, max_ticks: int = MAX_MAJOR_TICKS
+) -> Tuple[List[float], List[float]]:
+    """
+    Select major ticks at powers of ten and minor ticks inside the decades of logarithmic axis.
+    Unlike ``pgfplots``, any number of minor ticks is supported; ``8`` gives the usual 2, 3, ..., 9 multiples.
+
+    :param vmin: Minimum of the axis, must be positive
+    :type vmin: float
+    :param vmax: Maximum of the axis
+    :type vmax: float
+    :param minor: Number of minor ticks inside one decade, defaults to ``0``
+    :type minor: int, optional
+    :param max_ticks: Maximum number of major ticks, defaults to :data:`MAX_MAJOR_TICKS`
+    :type max_ticks: int, optional
+    :return: Major and minor ticks
+    :rtype: Tuple[List[float], List[float]]
+    """
+    if vmin > vmax or vmin <= 0 or not math.isfinite(vmax):
+        return ([], [])
+    first = math.floor(math.log10(vmin))
+    last = math.ceil(math.log10(vmax))
+    if first == last:
+        last += 1
+    decade_step = max(1, math.ceil((last - first + 1) / max_ticks))
+    exponents = list(range(first, last + 1, decade_step))
+    major = [float(f"1e{e}") for e in exponents]
+    minor_ticks: List[float] = []
+    if minor > 0 and decade_step == 1:
+        multipliers = [1 + j * 9 / (minor + 1) for j in range(1, minor + 1)]
+        for e in exponents[:-1]:
+            minor_ticks.extend(float(f"{m:.6g}e{e}") for m in multipliers)
+    return (major, minor_ticks)
+
+
+def format_ticks(ticks: List[float]) -> str:
+    return ",".join(repr(t) for t in ticks)
+
+
+def axis_tick_options(
+    axis: Literal["x", "y"],
+    mode: str,
+    series: Iterable[Iterable[Any]],
+    limits: Optional[Tuple[Optional[float], Optional[float]]],
+    minor: int,
+    precision: int,
+) -> Dict[str, str]:
+    """
+    Compute ``pgfplots`` options with explicit major and minor ticks of one axis.
+    Missing limits are replaced by the minimum and maximum of the data for selecting the ticks,
+    then by the outer major ticks, so ``pgfplots`` does not clip them. Negative ``minor`` stands
+    for the default minor ticks: none on linear axis, :data:`DEFAULT_LOG_MINOR_TICKS` on logarithmic axis.
+
+    :return: Axis options, empty if there is no data
+    :rtype: Dict[str, str]
+    """
+    vmin, vmax = series_limits(series, positive=mode == "log")
+    if limits is not None:
+        if limits[0] is not None:
+            vmin = float(limits[0])
+        if limits[1] is not None:
+            vmax = float(limits[1])
+    if mode == "log":
+        if minor < 0:
+            minor = DEFAULT_LOG_MINOR_TICKS
+        major, minor_ticks = log_ticks(vmin, vmax, minor)
+    else:
+        major, minor_ticks = linear_ticks(vmin, vmax, max(minor, 0), precision)
+    if len(major) == 0:
+        return {}
+    options: Dict[str, str] = {f"{axis}tick": format_ticks(major)}
+    if limits is None or limits[0] is None:
+        options[f"{axis}min"] = repr(major[0])
+    if limits is None or limits[1] is None:
+        options[f"{axis}max"] = repr(major[-1])
+    if len(minor_ticks) > 0:
+        options[f"minor {axis}tick"] = format_ticks(minor_ticks)
+    return options
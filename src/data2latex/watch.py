@@ -0,0 +1,258 @@
+import hashlib
+import os
+import pickle
+import sys
+import time
+import traceback
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .deferred import (
+    DeferredFragment,
+    FragmentRecorder,
+    render_fragment,
+    replay,
+    use_fragment_cache,
+)
+from .iter_protocols import CSVRows
+from .manifest import file_hash, file_stamp
+
+if TYPE_CHECKING:
+    from .dm import DocumentManager
+    from .report import BuildReport
+
+
+class FileTracker:
+    """
+    Hashes of the input files. A file is hashed again only when its size or modification
+    time changes, and it counts as changed only when its hash changes, so touching
+    a file or copying the same content over it does not trigger anything.
+    """
+
+    def __init__(self) -> None:
+        self.files: Dict[str, Tuple[Optional[List[int]], Optional[str]]] = {}
+
+    def digest(self, path: str) -> Optional[str]:
+        """
+        Get SHA-256 hash of the file, ``None`` if the file does not exist.
+        """
+        path = os.path.abspath(path)
+        stamp = file_stamp(path)
+        cached = self.files.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        digest = None if stamp is None else file_hash(path)
+        self.files[path] = (stamp, digest)
+        return digest
+
+
+def watched_files(paths: List[str], filepath: str) -> List[str]:
+    """
+    Expand the watched directories into the files directly inside them. Files generated
+    for the document (``filepath`` with any extension) are skipped, so writing the output
+    into a watched directory does not trigger another run.
+    """
+    output = os.path.abspath(filepath) + "."
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                sorted(
+                    entry.path
+                    for entry in os.scandir(path)
+                    if entry.is_file()
+                    and not entry.name.startswith(".")
+                    and not os.path.abspath(entry.path).startswith(output)
+                )
+            )
+        else:
+            files.append(path)
+    return files
+
+
+class HashStream:
+    """
+    Binary file which feeds everything written into SHA-256 instead of storing it,
+    so large arrays are hashed while being pickled without a copy of the pickle in memory.
+    """
+
+    def __init__(self) -> None:
+        self.hash = hashlib.sha256()
+
+    def write(self, data: Any) -> int:
+        self.hash.update(data)
+        return memoryview(data).nbytes
+
+    def hexdigest(self) -> str:
+        return self.hash.hexdigest()
+
+
+class FingerprintPickler(pickle.Pickler):
+    """
+    Pickler which replaces views of input files (:class:`CSVRows`, also inside :class:`CSVColumn`)
+    by the path and hash of the file, so the fingerprint changes with the content of the file.
+    Other data, e.g. NumPy arrays and memory maps, are pickled with their content.
+    """
+
+    def __init__(self, file: HashStream, tracker: FileTracker) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.tracker = tracker
+
+    def persistent_id(self, obj: Any) -> Any:
+        if isinstance(obj, CSVRows):
+            return (
+                "csv",
+                os.path.abspath(obj.path),
+                self.tracker.digest(obj.path),
+                obj.delimiter,
+                obj.skip_rows,
+            )
+        return None
+
+
+def fragment_fingerprint(
+    dm: "DocumentManager", fragment: DeferredFragment, tracker: FileTracker
+) -> Optional[str]:
+    """
+    Compute SHA-256 hash of the function, its arguments and the document settings
+    which change the rendered fragment (standalone mode, budget and escaping).
+
+    :return: Hex digest or ``None`` if some argument cannot be pickled, e.g. a lambda function
+    :rtype: Optional[str]
+    """
+    settings = (
+        dm.using_standalone,
+        dm.using_standalone_multi,
+        dm.budget.policy,
+        dm.budget.memory_limit,
+        dm.document.escape,
+    )
+    stream = HashStream()
+    try:
+        FingerprintPickler(stream, tracker).dump(
+            (settings, fragment.function.__qualname__, fragment.args, fragment.kwargs)
+        )
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return stream.hexdigest()
+
+
+class FragmentCache:
+    """
+    Rendered tables and plots kept between the runs of :func:`watch`, keyed by the fingerprint
+    of the call. Input files read by the fragments are part of the fingerprint, so a fragment
+    is rendered again only if its arguments or its input files have changed. Fragments which
+    were not used by the last run are evicted.
+    """
+
+    def __init__(self) -> None:
+        self.tracker = FileTracker()
+        self.fragments: Dict[str, FragmentRecorder] = {}
+        self.used: Set[str] = set()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def start_run(self) -> None:
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def finish_run(self) -> None:
+        self.fragments = {k: v for k, v in self.fragments.items() if k in self.used}
+
+    def call(self, dm: "DocumentManager", fragment: DeferredFragment) -> None:
+        """
+        Append the rendered fragment into the document, render it only if it is not cached.
+        """
+        key = fragment_fingerprint(dm, fragment, self.tracker)
+        recorder = None if key is None else self.fragments.get(key)
+        if recorder is None:
+            self.misses += 1
+            recorder = render_fragment(
+                fragment, dm.using_standalone, dm.budget, dm.document.escape
+            )
+            if key is not None:
+                self.fragments[key] = recorder
+        else:
+            self.hits += 1
+        if key is not None:
+            self.used.add(key)
+        for rendered in replay(dm, recorder):
+            dm.append(rendered)
+
+
+def watch(
+    build: Callable[[], Any],
+    paths: List[str],
+    filepath: str = "document",
+    interval: float = 1.0,
+    max_runs: Optional[int] = None,
+    report_callback: Optional[Callable[["BuildReport"], None]] = None,
+    **finish_options: Any,
+) -> int:
+    """
+    Rebuild the document whenever some of the watched files changes. Every run resets the document,
+    calls ``build`` to add the content (including the setup functions) and calls :func:`finish`.
+    Tables and plots are kept in memory between the runs, a table or plot is rendered again only if
+    its arguments or the input files it reads have changed. The compilation is skipped if the generated
+    source has not changed. Errors of a run are printed and the next change is awaited.
+
+    .. highlight:: python
+    .. code-block:: python
+
+        import data2latex as dtol
+
+        def build():
+            for path in sorted(glob("incoming/*.csv")):
+                dtol.table(pd.read_csv(path), caption=path)
+
+        dtol.watch(build, ["incoming"], "report")
+
+    :param build: Function adding the content of the document
+    :type build: Callable[[], Any]
+    :param paths: Watched files and directories, a directory is changed when a file directly inside it is added, removed or changed
+    :type paths: List[str]
+    :param filepath: File path of the document without extension, defaults to ``"document"``
+    :type filepath: str, optional
+    :param interval: Seconds between the checks of the watched files, defaults to ``1.0``
+    :type interval: float, optional
+    :param max_runs: Stop after this number of runs, ``None`` for watching until interrupted, defaults to ``None``
+    :type max_runs: Optional[int], optional
+    :param report_callback: Function called with the build report of every run, defaults to ``None``
+    :type report_callback: Optional[Callable[[BuildReport], None]], optional
+    :param finish_options: Other arguments of :func:`finish`
+    :return: Number of runs
+    :rtype: int
+    """
+    from .features import finish, reset
+
+    cache = FragmentCache()
+    tracker = FileTracker()
+    state: Optional[Dict[str, Optional[str]]] = None
+    runs: int = 0
+    try:
+        while max_runs is None or runs < max_runs:
+            current = {
+                path: tracker.digest(path) for path in watched_files(paths, filepath)
+            }
+            if current == state:
+                time.sleep(interval)
+                continue
+            state = current
+            runs += 1
+            reset()
+            cache.start_run()
+            use_fragment_cache(cache)
+            try:
+                build()
+                report = finish(filepath, **finish_options)
+                cache.finish_run()
+                report.cached_fragments = cache.hits
+                if report_callback is not None:
+                    report_callback(report)
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+            finally:
+                use_fragment_cache(None)
+    except KeyboardInterrupt:
+        pass
+    return runs
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+import warnings
+
+from data2latex.cli import columns, load_input
+
+# Selecting the columns of a CSV file must not lose rows or leave the file open
+
+warnings.simplefilter("error", ResourceWarning)
+failed = False
+with tempfile.TemporaryDirectory() as directory:
+    for header, content, expected_names in [
+        (True, "x,a,b\n1,2,3\n4,5,6\n", ["a", "b"]),
+        (False, "1,2,3\n4,5,6\n", ["1", "2"]),
+    ]:
+        path = os.path.join(directory, "data.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        data, names = load_input(path, header=header)
+        x, y, y_names = columns(data, names, header, "0", None)
+        values = [list(x)] + [list(column) for column in y]
+        ok = y_names == expected_names and values == [[1, 4], [2, 5], [3, 6]]
+        print(
+            f"columns header={header}: {'OK' if ok else f'FAILED {y_names} {values}'}"
+        )
+        failed = failed or not ok
+
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+import data2latex as dtol
+
+# Deferred rendering must generate the same .tex file as rendering right away
+
+
+def generate(directory: str, executor: Optional[str]) -> str:
+    dtol.reset()
+    if executor is not None:
+        dtol.use_deferred_rendering(executor)  # pyright: ignore
+    rng = np.random.default_rng(0)
+    for i in range(4):
+        dtol.section(f"Section {i}")
+        dtol.table(rng.random((20, 5)), rules="#", caption="Table", label=f"t{i}")
+        dtol.plot(
+            rng.random((2, 50)),
+            rng.random((2, 50)),
+            mode=("log", "lin"),
+            legend=["a", "b"],
+            line_color=["red", (0.1, 0.2, 0.3 + i / 10)],
+        )
+        dtol.text("Text")
+    # Large arrays are handed to worker processes in shared memory
+    large = rng.random((2, 10_000))
+    dtol.plot(large[0], large[1], mark=None, caption="Shared")
+    dtol.plot(large[0], large[1] ** 2, mark=None, caption="Shared again")
+    filepath = os.path.join(directory, executor or "eager")
+    dtol.finish(filepath, compile_tex=False)
+    with open(filepath + ".tex", "r", encoding="utf-8") as f:
+        return f.read()
+
+
+with tempfile.TemporaryDirectory() as directory:
+    expected = generate(directory, None)
+    failed = False
+    for executor in ["thread", "process"]:
+        same = generate(directory, executor) == expected
+        print(f"{executor}: {'OK' if same else 'DIFFERENT'}")
+        failed = failed or not same
+
+sys.exit(1 if failed else 0)
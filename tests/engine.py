@@ -0,0 +1,70 @@
+import os
+import stat
+import sys
+import tempfile
+import warnings
+
+import data2latex as dtol
+
+# Budget policy "lualatex" must warn when another engine compiles the oversized tables,
+# the manifest must skip compilation of an unchanged document
+
+STUB_COMPILER = """#!{python}
+import os, sys
+tex = [a for a in sys.argv[1:] if a.endswith(".tex")][0]
+directory = ([a.split("=", 1)[1] for a in sys.argv[1:] if a.startswith("--output-directory=")] or [os.getcwd()])[0]
+base = os.path.join(directory, os.path.splitext(os.path.basename(tex))[0])
+with open(base + ".calls", "a") as f:
+    f.write(os.path.basename(sys.argv[0]) + "\\n")
+for extension, content in [(".log", ""), (".aux", ""), (".pdf", "%PDF-1.5 stub")]:
+    with open(base + extension, "w") as f:
+        f.write(content)
+"""
+
+
+def build(filepath: str, compiler: str) -> "dtol.BuildReport":
+    dtol.reset()
+    dtol.set_budget("lualatex", memory_limit=1_000)
+    dtol.table([[i, i * 2] for i in range(100)])
+    return dtol.finish(
+        filepath, compiler=compiler
+    )  # pyright: ignore [reportArgumentType]
+
+
+def calls(filepath: str) -> int:
+    with open(filepath + ".calls", "r", encoding="utf-8") as f:
+        return len(f.readlines())
+
+
+failed = False
+with tempfile.TemporaryDirectory() as directory:
+    for name in ["pdflatex", "lualatex"]:
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(STUB_COMPILER.format(python=sys.executable))
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = directory + os.pathsep + os.environ["PATH"]
+    filepath = os.path.join(directory, "engine")
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        build(filepath, "pdflatex")
+    warned = any(issubclass(w.category, dtol.BudgetWarning) for w in caught)
+    print(f"engine mismatch warning: {'OK' if warned else 'FAILED'}")
+    failed |= not warned
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        build(filepath, "lualatex")
+    warned = any(issubclass(w.category, dtol.BudgetWarning) for w in caught)
+    print(f"no warning for lualatex: {'OK' if not warned else 'FAILED'}")
+    failed |= warned
+
+    before = calls(filepath)
+    report = build(filepath, "lualatex")
+    skipped = report.skipped and calls(filepath) == before
+    print(f"manifest skips unchanged document: {'OK' if skipped else 'FAILED'}")
+    failed |= not skipped
+
+
+sys.exit(1 if failed else 0)
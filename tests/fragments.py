@@ -0,0 +1,33 @@
+import json
+import os
+import sys
+import tempfile
+
+import data2latex as dtol
+from data2latex.fragments import MANIFEST_FILENAME
+
+# Fragments can be added after finish, labels which map to the same file name get their own files
+
+with tempfile.TemporaryDirectory() as directory:
+    dtol.reset()
+    dtol.use_fragment_output(directory)
+    dtol.table([[1, 2]], label="tab:a")
+    dtol.table([[3, 4]], label="tab:a;")
+    dtol.finish(os.path.join(directory, "document"))
+    dtol.table([[5, 6]], label="tab:a")
+    report = dtol.finish(os.path.join(directory, "document"))
+    with open(os.path.join(directory, MANIFEST_FILENAME), "r", encoding="utf-8") as f:
+        files = [entry["file"] for entry in json.load(f)["fragments"]]
+    contents = set()
+    for name in files:
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            contents.add(f.read())
+    failed = (
+        files != ["tab-a.tex", "tab-a-2.tex", "tab-a-3.tex"]
+        or len(contents) != 3
+        or len(report.fragments) != 3
+    )
+    print(f"fragments: {'OK' if not failed else f'FAILED {files}'}")
+
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,56 @@
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Cumulative import time of the data2latex package in microseconds (best of all runs)
+# which should not be exceeded. Importing the package must not import these modules.
+LIMIT_US: int = 30_000
+RUNS: int = 5
+FORBIDDEN_MODULES: List[str] = ["pylatex", "asyncio", "numpy", "pandas"]
+
+IMPORTTIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure() -> Tuple[int, Dict[str, int]]:
+    """
+    Import data2latex in a fresh interpreter with ``-X importtime``.
+
+    :return: Cumulative time of the package and self time of every imported module
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import data2latex"],
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    cumulative: int = 0
+    modules: Dict[str, int] = {}
+    for line in process.stderr.decode().splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        modules[name] = int(self_us)
+        if name == "data2latex":
+            cumulative = int(cumulative_us)
+    return cumulative, modules
+
+
+results = [measure() for _ in range(RUNS)]
+best, modules = min(results, key=lambda r: r[0])
+
+print(f"import data2latex: {best} us (best of {RUNS}, limit {LIMIT_US} us)")
+print("Slowest modules:")
+for name, self_us in sorted(modules.items(), key=lambda m: m[1], reverse=True)[:10]:
+    print(f"\t{self_us:>8} us  {name}")
+
+failed: bool = False
+for forbidden in FORBIDDEN_MODULES:
+    if any(name == forbidden or name.startswith(forbidden + ".") for name in modules):
+        print(f"REGRESSION: '{forbidden}' is imported by 'import data2latex'")
+        failed = True
+if best > LIMIT_US:
+    print(f"REGRESSION: import time {best} us exceeds the limit {LIMIT_US} us")
+    failed = True
+
+sys.exit(1 if failed else 0)
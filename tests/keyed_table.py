@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+from typing import Any, List
+
+import data2latex as dtol
+
+# KeyedTable must generate the same table as table() after every update
+
+
+def generate(directory: str, data: List[List[Any]], keyed: dtol.KeyedTable) -> bool:
+    dtol.reset()
+    dtol.table(data, caption="Keyed")
+    filepath = os.path.join(directory, "expected")
+    dtol.finish(filepath, compile_tex=False)
+    with open(filepath + ".tex", "r", encoding="utf-8") as f:
+        expected = f.read()
+    dtol.reset()
+    keyed.append()
+    filepath = os.path.join(directory, "keyed")
+    dtol.finish(filepath, compile_tex=False)
+    with open(filepath + ".tex", "r", encoding="utf-8") as f:
+        return f.read() == expected
+
+
+updates: List[List[List[Any]]] = [
+    [["a", -1], ["b", 5], ["c", 1.5]],
+    # hash(-1) == hash(-2), the row must be formatted again
+    [["a", -2], ["b", 5], ["c", 1.5]],
+    # Equal values of other types are formatted differently
+    [["a", -2.0], ["b", True], ["c", 1.5]],
+    [["c", 100.25], ["a", 0.0]],
+    # 0.0 == -0.0, but the sign is written
+    [["c", 100.25], ["a", -0.0]],
+    # Short rows are padded with empty cells like in table()
+    [["c", 100.25, 7], ["a"], ["b", 3]],
+    [["c", 100.25, 7], ["a"], ["b", 3, 4, 5]],
+]
+expected_formatted: List[int] = [3, 1, 2, 2, 1, 3, 1]
+
+with tempfile.TemporaryDirectory() as directory:
+    keyed = dtol.KeyedTable(key=0, caption="Keyed")
+    failed = False
+    for data, expected in zip(updates, expected_formatted):
+        formatted = keyed.update(data)
+        same = generate(directory, data, keyed)
+        print(f"{data}: {'OK' if same and formatted == expected else 'FAILED'}")
+        failed = failed or not same or formatted != expected
+
+sys.exit(1 if failed else 0)
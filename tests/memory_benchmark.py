@@ -0,0 +1,170 @@
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import tracemalloc
+import warnings
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import data2latex as dtol
+
+# Peak and retained allocations (in bytes, measured by tracemalloc) of every case
+# at increasing input sizes are compared with the stored baselines.
+# Run with --update to store new baselines after an intended change.
+BASELINES_PATH: str = os.path.join(os.path.dirname(__file__), "memory_baselines.json")
+# Allowed ratio between measured and baseline allocations
+TOLERANCE: float = 1.25
+# Allowed exponent of the growth between two consecutive sizes, 1.0 is linear growth
+MAX_GROWTH_EXPONENT: float = 1.2
+# Allocations smaller than this are ignored by the growth check (constant overhead)
+MIN_GROWTH_BYTES: int = 256 * 1024
+
+# The largest plots are over the TeX memory budget on purpose, only Python allocations are measured
+warnings.filterwarnings("ignore", category=dtol.BudgetWarning)
+
+TABLE_COLUMNS: int = 8
+TABLE_ROWS: List[int] = [500, 2_000, 8_000]
+PLOT_POINTS: List[int] = [10_000, 40_000, 160_000]
+
+
+def measure(prepare: Callable[[], Any], run: Callable[[Any], Any]) -> Tuple[int, int]:
+    """
+    Measure peak and retained allocations of ``run``. Input data created by ``prepare``
+    is allocated before the measurement starts and is not counted.
+
+    :return: Peak and retained allocations in bytes
+    """
+    dtol.reset()
+    data = prepare()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = run(data)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    dtol.reset()
+    return peak - start, current - start
+
+
+def table_list(rows: int) -> Tuple[Callable[[], Any], Callable[[Any], Any]]:
+    return (
+        lambda: np.random.default_rng(0).random((rows, TABLE_COLUMNS)).tolist(),
+        lambda data: dtol.table(data),
+    )
+
+
+def table_ndarray(rows: int) -> Tuple[Callable[[], Any], Callable[[Any], Any]]:
+    return (
+        lambda: np.random.default_rng(0).random((rows, TABLE_COLUMNS)),
+        lambda data: dtol.table(data),
+    )
+
+
+def table_dataframe(rows: int) -> Tuple[Callable[[], Any], Callable[[Any], Any]]:
+    return (
+        lambda: pd.DataFrame(np.random.default_rng(0).random((rows, TABLE_COLUMNS))),
+        lambda data: dtol.table(data),
+    )
+
+
+def plot_series(points: int) -> Tuple[Callable[[], Any], Callable[[Any], Any]]:
+    def run(data: Any) -> int:
+        dtol.plot(data[0], data[1])
+        # The plot is serialized lazily, only the length of the source is kept
+        return len(dtol.gdm().document.dumps())
+
+    return (lambda: np.random.default_rng(0).random((2, points)), run)
+
+
+def finish_document(rows: int) -> Tuple[Callable[[], Any], Callable[[Any], Any]]:
+    def prepare() -> None:
+        dtol.table(np.random.default_rng(0).random((rows, TABLE_COLUMNS)))
+        data = np.random.default_rng(0).random((2, rows * 10))
+        dtol.plot(data[0], data[1])
+
+    def run(_: Any) -> Any:
+        with tempfile.TemporaryDirectory() as directory:
+            return dtol.finish(os.path.join(directory, "document"), compile_tex=False)
+
+    return (prepare, run)
+
+
+CASES: Dict[str, Tuple[Callable[[int], Any], List[int]]] = {
+    "table(list)": (table_list, TABLE_ROWS),
+    "table(ndarray)": (table_ndarray, TABLE_ROWS),
+    "table(DataFrame)": (table_dataframe, TABLE_ROWS),
+    "plot(ndarray) + dumps()": (plot_series, PLOT_POINTS),
+    "finish(compile_tex=False)": (finish_document, TABLE_ROWS),
+}
+
+
+def growth_exponent(size1: int, bytes1: int, size2: int, bytes2: int) -> float:
+    if bytes1 <= 0 or bytes2 < MIN_GROWTH_BYTES:
+        return 1.0
+    return math.log(bytes2 / bytes1) / math.log(size2 / size1)
+
+
+parser = argparse.ArgumentParser(description="Memory benchmark of data2latex.")
+parser.add_argument("--update", action="store_true", help="Store new baselines.")
+args = parser.parse_args()
+
+results: Dict[str, Dict[str, Dict[str, int]]] = {}
+failed: bool = False
+for name, (case, sizes) in CASES.items():
+    results[name] = {}
+    print(f"{name}")
+    # Warm-up run, so lazy imports and caches are not counted
+    measure(*case(sizes[0]))
+    for size in sizes:
+        peak, retained = measure(*case(size))
+        results[name][str(size)] = {"peak": peak, "retained": retained}
+        print(
+            f"\t{size:>8}: peak {peak / 1024:>10.1f} KiB, retained {retained / 1024:>10.1f} KiB"
+        )
+    for size1, size2 in zip(sizes, sizes[1:]):
+        for kind in ["peak", "retained"]:
+            exponent = growth_exponent(
+                size1,
+                results[name][str(size1)][kind],
+                size2,
+                results[name][str(size2)][kind],
+            )
+            if exponent > MAX_GROWTH_EXPONENT:
+                print(
+                    f"REGRESSION: {kind} allocations of {name} grow superlinearly "
+                    f"(exponent {exponent:.2f}) between sizes {size1} and {size2}"
+                )
+                failed = True
+
+if args.update:
+    with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+        f.write("\n")
+    print(f"Baselines stored in '{BASELINES_PATH}'")
+elif os.path.exists(BASELINES_PATH):
+    with open(BASELINES_PATH, "r", encoding="utf-8") as f:
+        baselines: Dict[str, Dict[str, Dict[str, int]]] = json.load(f)
+    for name, measurements in results.items():
+        for size, measured in measurements.items():
+            baseline = baselines.get(name, {}).get(size)
+            if baseline is None:
+                continue
+            for kind in ["peak", "retained"]:
+                if measured[kind] > baseline[kind] * TOLERANCE:
+                    print(
+                        f"REGRESSION: {kind} allocations of {name} at size {size} "
+                        f"{measured[kind]} B exceed the baseline {baseline[kind]} B"
+                    )
+                    failed = True
+else:
+    print(f"No baselines in '{BASELINES_PATH}', run with --update to store them")
+
+sys.exit(1 if failed else 0)
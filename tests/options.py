@@ -0,0 +1,25 @@
+import sys
+
+from data2latex.iter_protocols import dict2str
+
+# Memoized option dicts must be serialized exactly like the first time
+
+CASES = [
+    ({"a": -0.0}, {"a": 0.0}),
+    ({"a": 0}, {"a": 0.0}),
+    ({"a": (1, 2.0)}, {"a": (1.0, 2)}),
+    ({"a": True}, {"a": 1}),
+]
+
+failed = False
+for first, second in CASES:
+    fresh = dict2str(second)
+    dict2str(first)
+    cached = dict2str(second)
+    if cached != fresh or cached == dict2str(first):
+        print(f"FAILED {first} {second}: {cached!r}")
+        failed = True
+print(f"options cache: {'OK' if not failed else 'FAILED'}")
+
+
+sys.exit(1 if failed else 0)
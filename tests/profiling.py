@@ -0,0 +1,21 @@
+import sys
+
+import data2latex as dtol
+
+# Only cells which stay text count as str_try_number fallbacks, float strings are numbers
+
+dtol.reset()
+with dtol.profile() as profiler:
+    dtol.table([["1", "2.5", "x"], ["a", "3", "4.0"]])
+counters = profiler.to_dict()["counters"]
+expected = {
+    "table.rows": 2,
+    "table.cells": 6,
+    "table.str_try_number_fallbacks": 2,
+    "table.escaped_cells": 2,
+}
+failed = counters != expected
+print(f"profiling counters: {'OK' if not failed else f'FAILED {counters}'}")
+
+
+sys.exit(1 if failed else 0)
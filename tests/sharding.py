@@ -0,0 +1,145 @@
+import os
+import stat
+import sys
+import tempfile
+from typing import Dict, List
+
+import data2latex as dtol
+from data2latex.report import FragmentStats
+from data2latex.sharding import shard_filepath, shard_ranges, write_counters
+
+# Numbering must continue across the shards, counters reset by chapters included
+
+
+def log(counters: Dict[str, int], resets: Dict[str, List[str]]) -> str:
+    lines = [f"DTOL-COUNTER {k}={v}" for k, v in counters.items()]
+    lines += [f"DTOL-RESET {k}>{c}" for k, v in resets.items() for c in v]
+    return "\n".join(lines) + "\n"
+
+
+# Report class: chapters reset sections and figures, article has no chapter counter
+report_resets = {"chapter": ["section", "figure"], "section": ["subsection"]}
+cases = [
+    (
+        "report",
+        [
+            log({"page": 3, "chapter": 2, "section": 1, "figure": 2}, report_resets),
+            # Starts in the middle of the second chapter
+            log({"page": 2, "chapter": 0, "section": 2, "figure": 1}, report_resets),
+            log({"page": 4, "chapter": 1, "section": 3, "figure": 0}, report_resets),
+        ],
+        [
+            "\\setcounter{page}{3}%\n"
+            "\\setcounter{chapter}{2}%\n"
+            "\\setcounter{section}{1}%\n"
+            "\\setcounter{figure}{2}%\n",
+            "\\setcounter{page}{4}%\n"
+            "\\setcounter{chapter}{2}%\n"
+            "\\setcounter{section}{3}%\n"
+            "\\setcounter{figure}{3}%\n",
+        ],
+    ),
+    (
+        "article",
+        [
+            log({"page": 2, "section": 2, "table": 1}, {"section": ["subsection"]}),
+            log({"page": 2, "section": 1, "table": 0}, {"section": ["subsection"]}),
+        ],
+        [
+            "\\setcounter{page}{2}%\n"
+            "\\setcounter{section}{2}%\n"
+            "\\setcounter{table}{1}%\n",
+        ],
+    ),
+]
+
+failed = False
+with tempfile.TemporaryDirectory() as directory:
+    for name, logs, expected in cases:
+        filepath = os.path.join(directory, name)
+        write_counters(filepath, logs)
+        written: List[str] = []
+        for i in range(1, len(logs)):
+            with open(shard_filepath(filepath, i) + "-counters.tex", "r") as f:
+                written.append(f.read())
+        same = written == expected
+        print(f"{name}: {'OK' if same else 'DIFFERENT'}")
+        if not same:
+            print(written)
+        failed = failed or not same
+
+# Ranges of evenly sized sections must be balanced
+for sections, shards in [(20, 3), (10, 4), (7, 2)]:
+    fragments: List[FragmentStats] = []
+    for i in range(sections):
+        fragments.append(FragmentStats(len(fragments), "section", 20))
+        fragments.append(FragmentStats(len(fragments), "text", 80))
+    ranges = shard_ranges(fragments, shards)
+    sizes = [(end - start) // 2 for start, end in ranges]
+    balanced = len(ranges) == shards and max(sizes) - min(sizes) <= 1
+    print(f"ranges {sections}/{shards}: {'OK' if balanced else f'FAILED {ranges}'}")
+    failed = failed or not balanced
+
+# Stub compiler which reports the page and section counters like COUNTER_REPORT
+STUB_COMPILER = """#!{python}
+import os, re, sys
+tex = [a for a in sys.argv[1:] if a.endswith(".tex")][0]
+base = os.path.splitext(os.path.abspath(tex))[0]
+with open(base + ".tex") as f:
+    source = f.read()
+start = {{"page": 1, "section": 0}}
+if os.path.exists(base + "-counters.tex"):
+    with open(base + "-counters.tex") as f:
+        start.update({{k: int(v) for k, v in re.findall(r"setcounter{{(\\w+)}}{{(\\d+)}}", f.read())}})
+with open(os.path.join(os.path.dirname(base), "calls.log"), "a") as f:
+    f.write(os.path.basename(base) + "\\n")
+with open(base + ".log", "w") as f:
+    f.write(f"DTOL-COUNTER page={{start['page'] + 1}}\\n")
+    f.write(f"DTOL-COUNTER section={{start['section'] + source.count('section{{')}}\\n")
+for extension, content in [(".aux", ""), (".pdf", "%PDF-1.5 stub")]:
+    with open(base + extension, "w") as f:
+        f.write(content)
+"""
+
+
+def build(filepath: str, reference: bool) -> List[str]:
+    dtol.reset()
+    for i in range(6):
+        dtol.section(f"Section {i}", numbering=True)
+        dtol.text("Text " * 20)
+    if reference:
+        dtol.text("\\ref{sec:x}", escape=False)
+    calls = os.path.join(os.path.dirname(filepath), "calls.log")
+    if os.path.exists(calls):
+        os.remove(calls)
+    dtol.finish(filepath, compiler="pdflatex", shards=3, force=True)
+    with open(calls, "r", encoding="utf-8") as f:
+        return f.read().split()
+
+
+# Passes per shard: measure and continue the numbering, one pass when the numbering
+# of the previous build still holds, one more pass for references
+with tempfile.TemporaryDirectory() as directory:
+    stub = os.path.join(directory, "pdflatex")
+    with open(stub, "w", encoding="utf-8") as f:
+        f.write(STUB_COMPILER.format(python=sys.executable))
+    os.chmod(stub, os.stat(stub).st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = directory + os.pathsep + os.environ["PATH"]
+    filepath = os.path.join(directory, "sharded")
+    shard_calls = [
+        build(filepath, False),
+        build(filepath, False),
+        build(filepath, True),
+    ]
+    first_shard = os.path.basename(shard_filepath(filepath, 0))
+    passes = [calls.count(first_shard) for calls in shard_calls]
+    merged = [calls.count("sharded-merged") for calls in shard_calls]
+    with open(shard_filepath(filepath, 2) + "-counters.tex", "r") as f:
+        counters = f.read()
+    same_passes = passes == [2, 1, 2] and merged == [1, 1, 1]
+    numbering = counters == "\\setcounter{page}{3}%\n\\setcounter{section}{4}%\n"
+    print(f"passes: {'OK' if same_passes else f'FAILED {shard_calls}'}")
+    print(f"pass numbering: {'OK' if numbering else f'FAILED {counters!r}'}")
+    failed = failed or not same_passes or not numbering
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,66 @@
+import math
+import sys
+from typing import Any, List, Tuple
+
+import numpy as np
+
+import data2latex as dtol
+from data2latex.ticks import axis_tick_options, linear_ticks, log_ticks, series_limits
+
+# NaN and infinite values must not break the limits and the ticks computed in Python
+
+nan, inf = math.nan, math.inf
+cases: List[Tuple[str, Any, Tuple[float, float]]] = [
+    ("list", [[1.0, nan, 3.0, inf], [-inf, 2.0]], (1.0, 3.0)),
+    ("ndarray", [np.array([1.0, nan, 3.0, inf, -inf])], (1.0, 3.0)),
+    ("integers", [np.array([4, 2, 9])], (2.0, 9.0)),
+    ("only NaN", [np.array([nan, nan]), [nan]], (inf, -inf)),
+]
+
+failed = False
+for name, series, expected in cases:
+    same = series_limits(series) == expected
+    print(f"series_limits {name}: {'OK' if same else 'DIFFERENT'}")
+    failed = failed or not same
+
+positive = series_limits([np.array([-1.0, 0.0, nan, 10.0, inf])], positive=True)
+failed = failed or positive != (10.0, 10.0)
+print(f"series_limits positive: {'OK' if positive == (10.0, 10.0) else 'DIFFERENT'}")
+
+empty = linear_ticks(0.0, inf) == ([], []) and log_ticks(1.0, inf) == ([], [])
+failed = failed or not empty
+print(f"infinite range: {'OK' if empty else 'DIFFERENT'}")
+
+for mode in ["lin", "log"]:
+    options = axis_tick_options(
+        "x", mode, [np.array([1.0, nan, 100.0, inf])], None, 1, 2
+    )
+    ok = "xtick" in options and "nan" not in options["xtick"]
+    print(f"axis_tick_options {mode}: {'OK' if ok else 'DIFFERENT'}")
+    failed = failed or not ok
+
+# The axis must reach the outer major ticks, given limits are kept
+options = axis_tick_options("x", "lin", [[0.3, 9.2]], None, 0, 2)
+ok = (options["xmin"], options["xmax"]) == ("0", "10")
+options = axis_tick_options("x", "lin", [[0.3, 9.2]], (0.3, None), 0, 2)
+ok = ok and "xmin" not in options and options["xmax"] == "10"
+print(f"outer ticks limits: {'OK' if ok else 'DIFFERENT'}")
+failed = failed or not ok
+
+# Grid code without number of minor ticks, e.g. "_-", uses the default minor ticks
+options = axis_tick_options("y", "log", [[3.0, 40.0]], None, -1, 2)
+expected_minor = ",".join(repr(float(f"{m}e{e}")) for e in [0, 1] for m in range(2, 10))
+ok = options.get("minor ytick") == expected_minor
+ok = ok and "minor xtick" not in axis_tick_options("x", "lin", [[1, 2]], None, -1, 2)
+print(f"default minor ticks: {'OK' if ok else 'DIFFERENT'}")
+failed = failed or not ok
+
+# The whole plot with ticks computed in Python
+dtol.reset()
+dtol.plot([1, 2, 3, 4], [1.0, nan, inf, 2.0], ticks="python")
+dtol.plot(np.array([1.0, 2.0, 3.0]), np.array([nan, nan, nan]), ticks="python")
+dtol.plot([1, 2, 3], [1, 20, 300], mode=("lin", "log"), grid="_-", ticks="python")
+dtol.plot([1, 2, 3], [1, 20, 300], grid="|-", ticks="python")
+dtol.reset()
+
+sys.exit(1 if failed else 0)
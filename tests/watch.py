@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+import data2latex as dtol
+from data2latex.cli import load_input
+from data2latex.deferred import DeferredFragment
+from data2latex.dm import gdm
+from data2latex.watch import FileTracker, fragment_fingerprint
+
+# Watch mode must allow setup functions in the build and render only the changed tables
+
+
+def build(directory: str) -> None:
+    dtol.use_multi_page_standalone()
+    for name in ["one.csv", "two.csv"]:
+        rows, _ = load_input(os.path.join(directory, name), header=True)
+        dtol.table(rows, caption=name)
+
+
+def expected(directory: str) -> str:
+    dtol.reset()
+    build(directory)
+    filepath = os.path.join(directory, "fresh")
+    dtol.finish(filepath, compile_tex=False)
+    with open(filepath + ".tex", "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def change(path: str) -> None:
+    time.sleep(0.5)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("5,6\n")
+
+
+with tempfile.TemporaryDirectory() as directory:
+    for name in ["one.csv", "two.csv"]:
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write("a,b\n1,2\n3,4\n")
+    filepath = os.path.join(directory, "watched")
+    cached: List[int] = []
+    threading.Thread(target=change, args=(os.path.join(directory, "one.csv"),)).start()
+    runs = dtol.watch(
+        lambda: build(directory),
+        [directory],
+        filepath,
+        interval=0.05,
+        max_runs=2,
+        report_callback=lambda r: cached.append(r.cached_fragments),
+        compile_tex=False,
+    )
+    with open(filepath + ".tex", "r", encoding="utf-8") as f:
+        same = f.read() == expected(directory)
+    failed = runs != 2 or cached != [0, 1] or not same
+    print(f"watch: {'OK' if not failed else f'FAILED {runs} {cached} {same}'}")
+
+
+# Fingerprints must change with the data and with the settings which change the output
+def fingerprint(*args: object) -> object:
+    fragment = DeferredFragment(dtol.plot, args, {})
+    return fragment_fingerprint(gdm(), fragment, FileTracker())
+
+
+dtol.reset()
+x = np.arange(100_000, dtype=float)
+plain = fingerprint(x, x)
+other_data = fingerprint(x, x + 1)
+dtol.set_budget("decimate")
+decimated = fingerprint(x, x)
+dtol.reset()
+dtol.use_multi_page_standalone()
+standalone = fingerprint(x, x)
+dtol.reset()
+same = fingerprint(x, x)
+keys = [plain, other_data, decimated, standalone]
+settings_failed = plain != same or len(set(keys)) != len(keys)
+print(f"watch fingerprint: {'OK' if not settings_failed else 'FAILED'}")
+failed = failed or settings_failed
+
+
+sys.exit(1 if failed else 0)